@@ -53,6 +53,9 @@ class Events:
     # STT events
     STT_TRANSCRIPT_FINALIZED = "stt_transcript_finalized"
     STT_SENDING_TO_V34 = "stt_sending_to_v34"
+    STT_FINAL_PASS_START = "stt_final_pass_start"
+    STT_FINAL_PASS_COMPLETE = "stt_final_pass_complete"
+    STT_DISPATCH_DEQUEUED = "stt_dispatch_dequeued"
     
     # v34 events
     V34_WEBHOOK_RECEIVED = "v34_webhook_received"
@@ -64,10 +67,13 @@ class Events:
     V34_RETRIEVAL_QUERY_START = "v34_retrieval_query_start"
     V34_RETRIEVAL_QUERY_COMPLETE = "v34_retrieval_query_complete"
     V34_RETRIEVAL_COMPLETE = "v34_retrieval_complete"
+    V34_PREFETCH_HIT = "v34_prefetch_hit"
+    V34_PREFETCH_MISS = "v34_prefetch_miss"
     V34_PROMPT_BUILT = "v34_prompt_built"
     V34_OLLAMA_SENT = "v34_ollama_sent"
     V34_OLLAMA_RECEIVED = "v34_ollama_received"
     V34_SENDING_TO_TTS = "v34_sending_to_tts"
+    V34_FIRST_SENTENCE_TO_TTS = "v34_first_sentence_to_tts"
     
     # TTS events
     TTS_REQUEST_RECEIVED = "tts_request_received"
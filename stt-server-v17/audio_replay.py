@@ -0,0 +1,96 @@
+# audio_replay.py
+# Offline audio input for timmy_hears: feeds WAV/FLAC files into the capture ring
+# instead of a live PyAudio device, so STT latency and accuracy can be measured
+# reproducibly (and on a headless box).
+
+import time
+import wave
+
+import numpy as np
+
+
+def load_audio_file(path, sample_rate=16000):
+    """
+    Load a WAV (stdlib) or FLAC/other (soundfile, optional) file as mono int16 at sample_rate.
+    """
+    path = str(path)
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            channels = wf.getnchannels()
+            width = wf.getsampwidth()
+            file_rate = wf.getframerate()
+            raw = wf.readframes(wf.getnframes())
+        if width == 2:
+            audio = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+        elif width == 4:
+            audio = np.frombuffer(raw, dtype=np.int32).astype(np.float32) / 2147483648.0
+        elif width == 1:
+            audio = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        else:
+            raise ValueError(f"Unsupported WAV sample width {width} bytes: {path}")
+        if channels > 1:
+            audio = audio.reshape(-1, channels).mean(axis=1)
+    else:
+        try:
+            import soundfile
+        except ImportError as exc:
+            raise RuntimeError(
+                f"soundfile is required to read {path}. Install in your venv: pip install soundfile"
+            ) from exc
+        audio, file_rate = soundfile.read(path, dtype="float32", always_2d=True)
+        audio = audio.mean(axis=1)
+
+    if file_rate != sample_rate and len(audio):
+        # Linear resampling is plenty for benchmark input
+        n_out = int(round(len(audio) * sample_rate / file_rate))
+        audio = np.interp(
+            np.linspace(0, len(audio) - 1, n_out),
+            np.arange(len(audio)),
+            audio,
+        ).astype(np.float32)
+
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16)
+
+
+def replay_files(paths, write_fn, sample_rate=16000, chunk_samples=4096, speed=1.0,
+                 gap_seconds=1.5, wait_fn=None, on_file_start=None, on_file_end=None,
+                 should_stop=None):
+    """
+    Feed each file into write_fn(int16_samples) chunk by chunk, followed by gap_seconds of silence.
+
+    speed=1.0 paces writes in real time, speed>1 plays faster, and speed<=0 writes as fast
+    as wait_fn() allows. wait_fn() is called before every chunk and should block while the
+    consumer is paused or too far behind. on_file_start/on_file_end(index, path, wall_time)
+    mark file boundaries; on_file_end fires right after the file's last sample is written.
+    """
+    gap = np.zeros(int(gap_seconds * sample_rate), dtype=np.int16)
+    chunk_duration = chunk_samples / sample_rate
+    next_write = time.perf_counter()
+
+    def _feed(samples):
+        nonlocal next_write
+        for i in range(0, len(samples), chunk_samples):
+            if should_stop and should_stop():
+                return False
+            if wait_fn:
+                wait_fn()
+            if speed > 0:
+                next_write += chunk_duration / speed
+                delay = next_write - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_write = time.perf_counter()
+            write_fn(samples[i:i + chunk_samples])
+        return True
+
+    for index, path in enumerate(paths):
+        audio = load_audio_file(path, sample_rate)
+        if on_file_start:
+            on_file_start(index, path, time.time())
+        if not _feed(audio):
+            return
+        if on_file_end:
+            on_file_end(index, path, time.time())
+        if not _feed(gap):
+            return
@@ -0,0 +1,106 @@
+# audio_ring_buffer.py
+# Preallocated int16 ring buffer for the STT capture path.
+# One writer (the PyAudio callback) and one reader (the transcription thread).
+# Positions are absolute sample counts that only ever grow, so the writer never
+# needs a lock: it fills the samples first and publishes write_pos last.
+
+import time
+
+import numpy as np
+
+
+class AudioRingBuffer:
+    """
+    Fixed-size int16 ring buffer with zero-copy reads and O(1) RMS/clear.
+
+    The sample storage is mirrored (each sample is written at i and i + capacity),
+    so any window of up to `capacity` samples is a contiguous view. A parallel ring
+    of cumulative sums of squares lets RMS over any readable window be computed
+    from two lookups instead of re-scanning the audio.
+    """
+
+    def __init__(self, capacity_samples, sample_rate=16000):
+        self.capacity = int(capacity_samples)
+        self.sample_rate = sample_rate
+        self._data = np.zeros(2 * self.capacity, dtype=np.int16)
+        self._cum_sq = np.zeros(self.capacity, dtype=np.int64)
+        self._sq_total = 0
+        self.write_pos = 0  # total samples ever written (writer-owned)
+        self.start_pos = 0  # first sample of the current segment (reader-owned)
+        self.consumed_pos = 0  # how far the reader has processed (paces offline replay)
+        self.last_write_time = time.time()
+
+    # --- Writer side ---
+
+    def write(self, samples):
+        """Append int16 samples. Called from the capture callback."""
+        n = len(samples)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` samples can be kept anyway
+            self._sq_total += int(np.sum(samples[:n - self.capacity].astype(np.int64) ** 2))
+            self.write_pos += n - self.capacity
+            samples = samples[n - self.capacity:]
+            n = self.capacity
+
+        cum = np.cumsum(samples.astype(np.int64) ** 2)
+        cum += self._sq_total
+
+        pos = self.write_pos % self.capacity
+        first = min(n, self.capacity - pos)
+        self._data[pos:pos + first] = samples[:first]
+        self._data[pos + self.capacity:pos + self.capacity + first] = samples[:first]
+        self._cum_sq[pos:pos + first] = cum[:first]
+        rest = n - first
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[self.capacity:self.capacity + rest] = samples[first:]
+            self._cum_sq[:rest] = cum[first:]
+
+        self._sq_total = int(cum[-1])
+        self.last_write_time = time.time()
+        # Publish last so readers never see samples that aren't written yet
+        self.write_pos += n
+
+    # --- Reader side ---
+
+    @property
+    def available_start(self):
+        """Oldest sample of the current segment that has not been overwritten."""
+        # Keep one extra sample of history so the cumulative sum before it is still valid
+        return max(self.start_pos, self.write_pos - self.capacity + 1, 0)
+
+    def __len__(self):
+        return self.write_pos - self.available_start
+
+    def clear(self):
+        """Drop everything buffered so far. O(1): just moves the segment start."""
+        self.start_pos = self.write_pos
+
+    def discard_before(self, pos):
+        """Move the segment start forward to pos (e.g. to drop leading silence)."""
+        self.start_pos = max(self.start_pos, min(pos, self.write_pos))
+
+    def view(self, start=None, end=None):
+        """Zero-copy int16 view of samples [start, end) (absolute positions)."""
+        end = self.write_pos if end is None else min(end, self.write_pos)
+        start = self.available_start if start is None else max(start, self.available_start)
+        if end <= start:
+            return self._data[:0]
+        offset = start % self.capacity
+        return self._data[offset:offset + (end - start)]
+
+    def read_float(self, start=None, end=None):
+        """float32 copy of [start, end) scaled to [-1, 1) - the one conversion per decode window."""
+        return self.view(start, end).astype(np.float32) / 32768.0
+
+    def rms(self, start=None, end=None):
+        """RMS (in float scale) of [start, end) from the cumulative sum of squares."""
+        end = self.write_pos if end is None else min(end, self.write_pos)
+        start = self.available_start if start is None else max(start, self.available_start)
+        if end <= start:
+            return 0.0
+        total = int(self._cum_sq[(end - 1) % self.capacity])
+        before = int(self._cum_sq[(start - 1) % self.capacity]) if start > 0 else 0
+        return float(np.sqrt((total - before) / (end - start))) / 32768.0
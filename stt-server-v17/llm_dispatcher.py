@@ -0,0 +1,153 @@
+# llm_dispatcher.py
+# Background dispatch of finalized utterances for timmy_hears.
+# The transcription loop enqueues and returns immediately; a single worker thread
+# makes the (slow) HTTP round trip, retries connection failures, and drops
+# utterances that went stale because a newer one is already waiting.
+
+import queue
+import threading
+import time
+from collections import deque
+
+
+class LlmDispatcher:
+    """
+    Bounded single-worker dispatch queue.
+
+    send_fn(text, request_id) performs the request. Exceptions listed in retry_on are
+    retried up to max_retries times (only while no newer utterance is waiting);
+    exceptions listed in timeout_errors are counted as timeouts and not retried,
+    since the server may still be acting on the request.
+    """
+
+    def __init__(self, send_fn, maxsize=4, max_retries=2, retry_delay=0.5,
+                 retry_on=(), timeout_errors=(), on_dequeue=None):
+        self.send_fn = send_fn
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.retry_on = tuple(retry_on)
+        self.timeout_errors = tuple(timeout_errors)
+        self.on_dequeue = on_dequeue  # optional callback(request_id, queue_wait_s)
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stats_lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=200)  # enqueue -> response, successful dispatches only
+        self._queue_waits_ms = deque(maxlen=200)
+        self.counters = {
+            "enqueued": 0,
+            "dispatched": 0,
+            "failed": 0,
+            "timeouts": 0,
+            "retries": 0,
+            "dropped_stale": 0,
+            "dropped_full": 0,
+        }
+        self._thread = None
+        self._stopping = False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="llm-dispatcher", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the worker once it finishes the send in flight. Queued utterances are dropped."""
+        self._stopping = True
+        try:
+            self._queue.put_nowait(None)  # wake the worker if it is idle
+        except queue.Full:
+            pass
+
+    def submit(self, text, request_id=None):
+        """Enqueue a finalized utterance. Never blocks; drops the oldest entry when full."""
+        item = (text, request_id, time.time())
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                break
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self._count("dropped_full")
+                except queue.Empty:
+                    pass
+        self._count("enqueued")
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.counters[name] += amount
+
+    def _newer_waiting(self):
+        return not self._queue.empty()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if self._stopping:
+                return
+            text, request_id, enqueued_at = item
+            if self._newer_waiting():
+                # A newer utterance supersedes this one
+                print(f"[DISPATCH] Dropping stale utterance [request_id={request_id}]: {text[:50]}")
+                self._count("dropped_stale")
+                continue
+
+            queue_wait = time.time() - enqueued_at
+            with self._stats_lock:
+                self._queue_waits_ms.append(queue_wait * 1000)
+            if self.on_dequeue:
+                try:
+                    self.on_dequeue(request_id, queue_wait)
+                except Exception:
+                    pass
+
+            attempt = 0
+            while True:
+                try:
+                    self.send_fn(text, request_id)
+                    self._count("dispatched")
+                    with self._stats_lock:
+                        self._latencies_ms.append((time.time() - enqueued_at) * 1000)
+                    break
+                except self.timeout_errors as e:
+                    print(f"[DISPATCH] Timeout [request_id={request_id}]: {e}")
+                    self._count("timeouts")
+                    self._count("failed")
+                    break
+                except self.retry_on as e:
+                    if attempt >= self.max_retries or self._newer_waiting():
+                        print(f"[DISPATCH] Giving up [request_id={request_id}] after {attempt + 1} attempts: {e}")
+                        self._count("failed")
+                        break
+                    attempt += 1
+                    self._count("retries")
+                    time.sleep(self.retry_delay * attempt)
+                except Exception as e:
+                    print(f"[DISPATCH] Dispatch error [request_id={request_id}]: {e}")
+                    self._count("failed")
+                    break
+
+    def stats(self):
+        """Queue depth, counters and dispatch latency summary for backpressure monitoring."""
+        def _summary(values):
+            values = sorted(values)
+            if not values:
+                return {"count": 0}
+            return {
+                "count": len(values),
+                "avg_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(values[len(values) // 2], 2),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+                "max_ms": round(values[-1], 2),
+            }
+        with self._stats_lock:
+            counters = dict(self.counters)
+            latencies = list(self._latencies_ms)
+            waits = list(self._queue_waits_ms)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "counters": counters,
+            "dispatch_latency": _summary(latencies),
+            "queue_wait": _summary(waits),
+        }
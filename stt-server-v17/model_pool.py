@@ -0,0 +1,238 @@
+# model_pool.py
+# Loaded faster-whisper models for timmy_hears, addressed by role.
+# Models load in background threads and are swapped into a role ("live",
+# "final", "standby") with a single dict assignment, so the transcription loop
+# never waits on a model load. A warm int8 CPU standby per role ("standby" for
+# live, "standby_final" for final) lets a CUDA failure fail over instantly to a
+# CPU copy of the same model instead of reloading it mid-utterance.
+
+import os
+import threading
+import time
+from collections import deque
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # memory footprint reporting is optional
+
+try:
+    import pynvml
+except ImportError:
+    pynvml = None
+
+
+def _memory_snapshot(device, device_index):
+    """(process RSS bytes, GPU used bytes) - either may be None if it cannot be measured."""
+    rss = psutil.Process(os.getpid()).memory_info().rss if psutil is not None else None
+    gpu = None
+    if device == "cuda" and pynvml is not None:
+        try:
+            pynvml.nvmlInit()
+            handle = pynvml.nvmlDeviceGetHandleByIndex(device_index)
+            gpu = pynvml.nvmlDeviceGetMemoryInfo(handle).used
+        except Exception:
+            gpu = None
+    return rss, gpu
+
+
+def _delta_mb(before, after):
+    if before is None or after is None:
+        return None
+    return round((after - before) / (1024 * 1024), 1)
+
+
+class LoadedModel:
+    """A loaded WhisperModel plus its load cost and rolling decode latency."""
+
+    def __init__(self, name, path, device, compute_type, device_index, whisper_model,
+                 load_seconds, cpu_memory_mb=None, gpu_memory_mb=None):
+        self.name = name
+        self.path = path
+        self.device = device
+        self.compute_type = compute_type
+        self.device_index = device_index
+        self.whisper_model = whisper_model
+        self.load_seconds = load_seconds
+        self.cpu_memory_mb = cpu_memory_mb
+        self.gpu_memory_mb = gpu_memory_mb
+        self.loaded_at = time.time()
+        self.decode_ms = deque(maxlen=200)
+        self.errors = 0
+
+    def transcribe(self, audio_data, **options):
+        """WhisperModel.transcribe with segments materialized and the decode time recorded."""
+        start = time.perf_counter()
+        try:
+            segments, info = self.whisper_model.transcribe(audio_data, **options)
+            segments = list(segments)
+        except Exception:
+            self.errors += 1
+            raise
+        self.decode_ms.append((time.perf_counter() - start) * 1000)
+        return segments, info
+
+    def stats(self):
+        values = sorted(self.decode_ms)
+        decode = {"count": len(values)}
+        if values:
+            decode.update({
+                "avg_ms": round(sum(values) / len(values), 2),
+                "p50_ms": round(values[len(values) // 2], 2),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+            })
+        return {
+            "name": self.name,
+            "path": self.path,
+            "device": self.device,
+            "compute_type": self.compute_type,
+            "device_index": self.device_index,
+            "load_seconds": round(self.load_seconds, 2),
+            "cpu_memory_mb": self.cpu_memory_mb,
+            "gpu_memory_mb": self.gpu_memory_mb,
+            "loaded_at": self.loaded_at,
+            "errors": self.errors,
+            "decode": decode,
+        }
+
+
+class ModelPool:
+    """
+    Named models plus a role -> model mapping.
+
+    create_fn(path, device, compute_type, device_index) returns a WhisperModel.
+    Loads are serialized (so memory deltas are attributable) but always run off
+    the caller's thread when started with load_async().
+    """
+
+    def __init__(self, create_fn):
+        self.create_fn = create_fn
+        self._models = {}
+        self._roles = {}
+        self._loading = {}  # name -> {"started": t, "error": str | None}
+        self._degraded = {}  # role -> why it isn't serving its assigned model, until reassigned
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @staticmethod
+    def model_name(path, device, compute_type):
+        return f"{os.path.basename(os.path.normpath(path))}@{device}/{compute_type}"
+
+    @staticmethod
+    def standby_role(role):
+        """Role holding the warm CPU copy for role: "standby" for live, "standby_<role>" otherwise."""
+        return "standby" if role == "live" else f"standby_{role}"
+
+    def get(self, role):
+        """The model currently serving role, or None. A plain dict read - never blocks on loads."""
+        return self._roles.get(role)
+
+    def load(self, path, device, compute_type, device_index=0, role=None, name=None):
+        """Load a model on the calling thread (reusing it if already loaded) and optionally assign a role."""
+        name = name or self.model_name(path, device, compute_type)
+        with self._lock:
+            existing = self._models.get(name)
+        if existing is None:
+            with self._lock:
+                self._loading[name] = {"started": time.time(), "error": None}
+            try:
+                with self._load_lock:
+                    before = _memory_snapshot(device, device_index)
+                    start = time.perf_counter()
+                    whisper_model = self.create_fn(path, device, compute_type, device_index)
+                    load_seconds = time.perf_counter() - start
+                    after = _memory_snapshot(device, device_index)
+            except Exception as e:
+                with self._lock:
+                    self._loading[name]["error"] = str(e)
+                print(f"[ERROR] Failed to load model {name}: {e}")
+                raise
+            existing = LoadedModel(name, path, device, compute_type, device_index, whisper_model, load_seconds,
+                                   cpu_memory_mb=_delta_mb(before[0], after[0]),
+                                   gpu_memory_mb=_delta_mb(before[1], after[1]))
+            with self._lock:
+                self._models[name] = existing
+                self._loading.pop(name, None)
+            print(f"[OK] Model {name} loaded in {load_seconds:.1f}s")
+        if role:
+            self.assign(role, name)
+        return existing
+
+    def load_async(self, path, device, compute_type, device_index=0, role=None, name=None):
+        """Start loading in a background thread. Returns the model name."""
+        name = name or self.model_name(path, device, compute_type)
+        with self._lock:
+            if name in self._loading and self._loading[name]["error"] is None:
+                return name  # already loading
+        thread = threading.Thread(
+            target=self._load_quietly,
+            args=(path, device, compute_type, device_index, role, name),
+            name=f"model-load-{name}",
+            daemon=True,
+        )
+        thread.start()
+        return name
+
+    def _load_quietly(self, *args):
+        try:
+            self.load(*args)
+        except Exception:
+            pass  # recorded in self._loading for /admin/models
+
+    def assign(self, role, name):
+        """Atomically point role at an already-loaded model."""
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None:
+                raise KeyError(f"model {name} is not loaded")
+            previous = self._roles.get(role)
+            self._roles[role] = loaded
+            self._degraded.pop(role, None)
+        print(f"[OK] Model role '{role}' -> {name}" + (f" (was {previous.name})" if previous else ""))
+        return loaded
+
+    def failover(self, role, standby_role=None):
+        """
+        Swap role to its own warm standby. Returns it, or None if no standby is ready or
+        the standby holds a different model (e.g. the tiny live model for the final role).
+        """
+        standby_role = standby_role or self.standby_role(role)
+        with self._lock:
+            standby = self._roles.get(standby_role)
+            current = self._roles.get(role)
+            if standby is None or standby is current:
+                return None
+            if current is not None and os.path.normpath(standby.path) != os.path.normpath(current.path):
+                return None
+            self._roles[role] = standby
+            self._degraded[role] = f"failed over from {current.name if current else None} to {standby.name}"
+        print(f"[FAILOVER] Model role '{role}' -> standby {standby.name}")
+        return standby
+
+    def mark_degraded(self, role, reason):
+        """Record that role is not being served as configured (cleared when a model is assigned to it)."""
+        with self._lock:
+            self._degraded[role] = reason
+        print(f"[WARNING] Model role '{role}' degraded: {reason}")
+
+    def unload(self, name):
+        """Drop a model that no role is using. Returns True if it was removed."""
+        with self._lock:
+            loaded = self._models.get(name)
+            if loaded is None or any(m is loaded for m in self._roles.values()):
+                return False
+            del self._models[name]
+        return True
+
+    def stats(self):
+        with self._lock:
+            models = list(self._models.values())
+            roles = {role: m.name for role, m in self._roles.items()}
+            loading = {name: dict(state) for name, state in self._loading.items()}
+            degraded = dict(self._degraded)
+        return {
+            "roles": roles,
+            "degraded": degraded,
+            "models": [m.stats() for m in models],
+            "loading": loading,
+        }
@@ -0,0 +1,63 @@
+# partial_prefetcher.py
+# Debounced partial-transcript sender for timmy_hears.
+# While the user is still speaking, the newest partial is posted to the v34
+# prefetch endpoint so classification and retrieval can start before the turn is
+# finalized. The transcription loop only stores the latest text; a background
+# thread sends at most one request per interval and never queues stale partials.
+
+import threading
+import time
+
+
+class PartialPrefetcher:
+    """
+    Throttled single-slot sender: update(text) never blocks, and at most one
+    send_fn(text) call is made every interval seconds with the newest text.
+    """
+
+    def __init__(self, send_fn, interval=0.5, min_words=3):
+        self.send_fn = send_fn
+        self.interval = interval
+        self.min_words = min_words
+        self._pending = None
+        self._last_sent = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self.sent = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="partial-prefetcher", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def update(self, text):
+        """Offer the current partial transcript (called from the transcription loop)."""
+        text = (text or "").strip()
+        if len(text.split()) < self.min_words:
+            return
+        with self._cond:
+            if text != self._last_sent:
+                self._pending = text
+                self._cond.notify()
+
+    def cancel(self):
+        """Drop any unsent partial (the utterance was just finalized)."""
+        with self._cond:
+            self._pending = None
+            self._last_sent = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                text, self._pending = self._pending, None
+                self._last_sent = text
+            try:
+                self.send_fn(text)
+                self.sent += 1
+            except Exception as e:
+                print(f"[PREFETCH] Failed to send partial: {e}")
+            # Throttle: newer partials accumulate in the single slot meanwhile
+            time.sleep(self.interval)
@@ -0,0 +1,136 @@
+# remote_streams.py
+# Per-client transcription state for remote audio sources (browser pages, ESP32
+# bridges) that stream binary PCM16 over Socket.IO instead of using the local mic.
+# Each stream owns its ring buffer, streaming decoder, VAD and transcript history
+# and runs its own transcription loop; the Whisper model(s) are shared.
+
+import threading
+import time
+
+import numpy as np
+
+from audio_ring_buffer import AudioRingBuffer
+from streaming_decoder import StreamingDecoder
+from transcript_manager import TranscriptManager
+from vad_endpointer import VadEndpointer
+
+
+class RemoteStream:
+    """
+    One remote audio stream: binary PCM16 frames in, live/final transcript events out.
+
+    transcribe_fn(audio, **kwargs) behaves like WhisperModel.transcribe. If
+    final_transcribe_fn is given it re-decodes each finished utterance (two-pass).
+    emit_fn(event, payload) delivers transcript events to the stream's clients and
+    on_final(text, stream) hands finalized utterances off (e.g. to a dispatcher).
+    """
+
+    def __init__(self, stream_id, transcribe_fn, emit_fn, on_final=None, final_transcribe_fn=None,
+                 sample_rate=16000, buffer_seconds=10, window_seconds=6.0,
+                 end_silence_ms=400, preroll_seconds=0.3, poll_interval=0.05):
+        self.stream_id = stream_id
+        self.transcribe_fn = transcribe_fn
+        self.final_transcribe_fn = final_transcribe_fn
+        self.emit_fn = emit_fn
+        self.on_final = on_final
+        self.sample_rate = sample_rate
+        self.preroll_samples = int(preroll_seconds * sample_rate)
+        self.poll_interval = poll_interval
+
+        self.ring = AudioRingBuffer(int(buffer_seconds * sample_rate), sample_rate)
+        self.decoder = StreamingDecoder(sample_rate=sample_rate, max_window_seconds=window_seconds)
+        self.vad = VadEndpointer(sample_rate=sample_rate, end_silence_ms=end_silence_ms)
+        self.transcripts = TranscriptManager(max_history=50)
+
+        self.created_at = time.time()
+        self.bytes_received = 0
+        self.frames_received = 0
+        self.utterances = 0
+        self._pending_byte = b""  # odd trailing byte when a frame splits a sample
+        self._running = False
+        self._thread = None
+
+    def write(self, data):
+        """Write one binary PCM16 (little-endian, mono) frame straight into the ring buffer."""
+        if self._pending_byte:
+            data = self._pending_byte + bytes(data)
+            self._pending_byte = b""
+        if len(data) % 2:
+            self._pending_byte = bytes(data[-1:])
+            data = data[:-1]
+        self.ring.write(np.frombuffer(data, dtype="<i2"))
+        self.bytes_received += len(data)
+        self.frames_received += 1
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name=f"remote-stt-{self.stream_id}", daemon=True)
+            self._thread.start()
+        return self._thread
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        return {
+            "stream_id": self.stream_id,
+            "age_seconds": round(time.time() - self.created_at, 1),
+            "bytes_received": self.bytes_received,
+            "frames_received": self.frames_received,
+            "buffered_seconds": round(len(self.ring) / self.sample_rate, 2),
+            "decode_passes": self.decoder.decode_count,
+            "utterances": self.utterances,
+            "in_speech": self.vad.in_speech,
+        }
+
+    def _reset_utterance(self):
+        self.ring.clear()
+        self.decoder.reset()
+        self.vad.reset()
+
+    def _run(self):
+        while self._running:
+            try:
+                self._step()
+            except Exception as e:
+                print(f"[REMOTE {self.stream_id}] Transcription error: {e}")
+            time.sleep(self.poll_interval)
+
+    def _step(self):
+        if len(self.ring) == 0:
+            return
+        speech_ended = self.vad.process(self.ring)
+        if not self.vad.speech_detected:
+            # Silence so far: keep a short pre-roll and don't run Whisper on it
+            self.ring.discard_before(self.ring.write_pos - self.preroll_samples)
+            return
+        if not self.decoder.has_new_audio(self.ring) or (not self.vad.in_speech and not speech_ended):
+            return
+
+        text = self.decoder.process(self.ring, self.transcribe_fn)
+        stripped = text.strip()
+        if (stripped.startswith('(') and stripped.endswith(')')) or \
+           (stripped.startswith('[') and stripped.endswith(']')):
+            # Sound effect / background noise
+            if speech_ended:
+                self._reset_utterance()
+            return
+
+        if self.transcripts.update_current_text(text):
+            self.emit_fn('live_transcript', {'stream_id': self.stream_id, 'data': self.transcripts.get_current_text()})
+
+        if not speech_ended:
+            return
+        if self.final_transcribe_fn is not None:
+            segments, _info = self.final_transcribe_fn(self.ring.read_float())
+            final_text = " ".join(seg.text for seg in segments).strip()
+            if final_text:
+                self.transcripts.update_current_text(final_text)
+        if self.transcripts.finalize_text():
+            latest_entry = self.transcripts.get_final_transcripts()[-1]
+            self.utterances += 1
+            self.emit_fn('final_transcript', {'stream_id': self.stream_id, 'data': latest_entry})
+            if self.on_final:
+                self.on_final(latest_entry, self)
+        self._reset_utterance()
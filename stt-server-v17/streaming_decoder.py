@@ -0,0 +1,122 @@
+# streaming_decoder.py
+# LocalAgreement-style incremental decoding for timmy_hears.
+# Instead of re-decoding the whole 10 s buffer every pass, only a sliding tail
+# window after the last committed word is decoded, and words are committed once
+# two consecutive passes agree on them.
+
+import re
+
+_WORD_NORMALIZE_REGEX = re.compile(r"[^\w']+")
+
+
+def _normalize_word(word):
+    """Lowercase and strip punctuation so 'Hello,' and 'hello' agree."""
+    return _WORD_NORMALIZE_REGEX.sub("", word.lower())
+
+
+class StreamingDecoder:
+    """
+    Keeps a committed transcript prefix plus an uncommitted hypothesis tail.
+
+    Audio is read from an AudioRingBuffer. Each call to process() decodes only the
+    audio after the last committed word (capped at max_window_seconds), so decode
+    cost per pass stays constant instead of growing with utterance length.
+    All times are absolute: sample position in the ring divided by sample_rate.
+    """
+
+    def __init__(self, sample_rate=16000, max_window_seconds=6.0, prompt_chars=200):
+        self.sample_rate = sample_rate
+        self.max_window_samples = int(max_window_seconds * sample_rate)
+        self.prompt_chars = prompt_chars
+        self.decode_count = 0
+        self.reset()
+
+    def reset(self):
+        """Drop transcript state (called after finalization or when the ring is cleared)."""
+        self.window_start = 0  # absolute sample where the next decode window begins
+        self.decoded_until = 0  # ring write position covered by the last pass
+        self.committed_words = []  # [(start, end, text)]
+        self.hypothesis = []  # words from the last pass that are not yet committed
+
+    def has_new_audio(self, ring):
+        return ring.write_pos != self.decoded_until
+
+    @property
+    def committed_end_time(self):
+        if self.committed_words:
+            return self.committed_words[-1][1]
+        return self.window_start / self.sample_rate
+
+    def get_committed_text(self):
+        return "".join(w[2] for w in self.committed_words).strip()
+
+    def get_text(self):
+        """Committed prefix followed by the current uncommitted hypothesis."""
+        return "".join(w[2] for w in self.committed_words + self.hypothesis).strip()
+
+    def process(self, ring, transcribe_fn, **transcribe_kwargs):
+        """
+        Decode the tail window if new audio has arrived and return the full text.
+
+        transcribe_fn(audio, **kwargs) must behave like WhisperModel.transcribe and
+        return (segments, info) with word timestamps.
+        """
+        end = ring.write_pos
+        if end == self.decoded_until:
+            return self.get_text()
+        self.decoded_until = end
+
+        start = max(self.window_start, ring.available_start)
+        # Cap the window so decode cost stays bounded even when nothing agrees
+        if end - start > self.max_window_samples:
+            start = end - self.max_window_samples
+            self._force_commit_before(start / self.sample_rate)
+        self.window_start = start
+
+        audio = ring.read_float(start, end)
+        if len(audio) == 0:
+            return self.get_text()
+
+        prompt = self.get_committed_text()[-self.prompt_chars:] or None
+        segments, _info = transcribe_fn(
+            audio,
+            word_timestamps=True,
+            initial_prompt=prompt,
+            **transcribe_kwargs,
+        )
+        self.decode_count += 1
+
+        offset = start / self.sample_rate
+        committed_end = self.committed_end_time
+        words = []
+        for seg in segments:
+            for w in (seg.words or []):
+                word_start, word_end = offset + w.start, offset + w.end
+                # Words that overlap already-committed audio were emitted before
+                if word_end <= committed_end + 0.01:
+                    continue
+                words.append((word_start, word_end, w.word))
+
+        # LocalAgreement-2: commit the longest prefix both passes agree on
+        agreed = 0
+        for prev, cur in zip(self.hypothesis, words):
+            if _normalize_word(prev[2]) != _normalize_word(cur[2]):
+                break
+            agreed += 1
+        if agreed:
+            self.committed_words.extend(words[:agreed])
+            # Next window starts right after the last committed word
+            self.window_start = max(self.window_start, int(self.committed_end_time * self.sample_rate))
+        self.hypothesis = words[agreed:]
+
+        return self.get_text()
+
+    def _force_commit_before(self, cut_time):
+        """Commit hypothesis words that start before audio that is about to leave the window."""
+        keep = []
+        for word in self.hypothesis:
+            if word[0] < cut_time:
+                self.committed_words.append(word)
+            else:
+                keep.append(word)
+        self.hypothesis = keep
@@ -0,0 +1,296 @@
+# stt_benchmark.py
+# Offline STT benchmark: replays a corpus of WAV/FLAC files through the same
+# transcription loop timmy_hears runs live (ring buffer, streaming decoder,
+# VAD endpointing, optional two-pass) and reports real-time factor,
+# end-of-speech -> finalized latency, partial update rate and WER.
+#
+# Usage:
+#   python stt_benchmark.py corpus/*.wav --refs refs.jsonl --out results.json
+#   python stt_benchmark.py clip.flac --two-pass --replay-speed 0   (RTF/throughput only)
+#
+# References come from --refs (JSONL lines of {"file": "...", "text": "..."})
+# or from a sidecar .txt file next to each audio file.
+#
+# Latency is measured from the replay wall time of each file's last non-silent sample,
+# so trailing silence in a clip is not counted; it is only meaningful when audio
+# is fed in real time (--replay-speed 1, the default). At --replay-speed 0 the replay
+# runs ahead of the decoder; that pass reports RTF, wall time and WER, not latency.
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+import timmy_hears
+from audio_replay import load_audio_file
+
+_WER_NORMALIZE_REGEX = re.compile(r"[^\w'\s]+")
+SPEECH_FRAME_MS = 20
+SPEECH_MARGIN_DB = 9.0  # a frame is speech if this far above the clip's noise floor
+SPEECH_MIN_DB = -50.0  # ...and above this absolute level
+
+
+def normalize_words(text):
+    return _WER_NORMALIZE_REGEX.sub(" ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """Word-level Levenshtein distance between two transcripts."""
+    ref, hyp = normalize_words(reference), normalize_words(hypothesis)
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1], len(ref)
+
+
+def speech_end_sample(audio, sample_rate):
+    """Sample index just past the last frame louder than the clip's noise floor (0 if none)."""
+    frame = int(sample_rate * SPEECH_FRAME_MS / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return len(audio)
+    x = audio[:n_frames * frame].astype(np.float32).reshape(n_frames, frame) / 32768.0
+    energy_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+    threshold = max(float(np.percentile(energy_db, 10)) + SPEECH_MARGIN_DB, SPEECH_MIN_DB)
+    voiced = np.nonzero(energy_db > threshold)[0]
+    return int((voiced[-1] + 1) * frame) if len(voiced) else 0
+
+
+def final_utterances(events):
+    """
+    (first_final_time, text) per finalized utterance. A final with replaces_last rewrites the
+    previous utterance (two-pass/re-finalize) instead of adding its words a second time.
+    """
+    utterances = []
+    for wall_time, event, text, replaces_last in events:
+        if event != "final":
+            continue
+        if replaces_last and utterances:
+            utterances[-1] = (utterances[-1][0], text)
+        else:
+            utterances.append((wall_time, text))
+    return utterances
+
+
+def load_references(paths, refs_file=None):
+    refs = {}
+    if refs_file:
+        with open(refs_file, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    refs[os.path.basename(entry["file"])] = entry["text"]
+    for path in paths:
+        name = os.path.basename(path)
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        if name not in refs and os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                refs[name] = f.read().strip()
+    return refs
+
+
+class BenchmarkSocket:
+    """
+    Stands in for the SocketIO server: records transcript emits with timestamps and
+    resumes listening after each final transcript, as the TTS server would.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.events = []  # (wall_time, event, text, replaces_last)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def start_background_task(self, target, *args, **kwargs):
+        # Side tasks (eye LCD notifications) are skipped during benchmarks
+        return None
+
+    def emit(self, event, data=None, **kwargs):
+        if event != "transcript_delta" or data["type"] not in ("partial", "final"):
+            return
+        with self.lock:
+            self.events.append((time.time(), data["type"], data["text"], bool(data.get("replaces_last"))))
+        if data["type"] == "final":
+            with timmy_hears.synthesis_lock:
+                timmy_hears.is_speech_synthesis_active = False
+
+    def events_between(self, start, end):
+        with self.lock:
+            return [e for e in self.events if start <= e[0] < end]
+
+
+def run_benchmark(paths, refs, replay_speed=1.0, gap_seconds=2.0, settle_seconds=5.0):
+    socket = BenchmarkSocket()
+    boundaries = {}  # index -> {"start": t, "end": t}
+
+    def _file_start(index, path, wall_time):
+        boundaries[index] = {"start": wall_time}
+        print(f"[BENCH] Replaying {path}")
+
+    def _file_end(index, path, wall_time):
+        boundaries[index]["end"] = wall_time
+
+    # Finalized utterances go nowhere; the benchmark only measures STT
+    timmy_hears.llm_dispatcher.send_fn = lambda text, request_id=None: None
+    timmy_hears.transcription_thread_running = True
+    for timings in timmy_hears.pass_timings.values():
+        timings.clear()
+
+    transcription_thread = threading.Thread(
+        target=timmy_hears.transcribe_audio, args=(socket,), daemon=True
+    )
+    transcription_thread.start()
+    run_start = time.time()
+    timmy_hears.replay_audio(
+        paths,
+        speed=replay_speed,
+        gap_seconds=gap_seconds,
+        on_file_start=_file_start,
+        on_file_end=_file_end,
+    )
+    # Give the last utterance time to finalize
+    deadline = time.time() + settle_seconds
+    last_end = boundaries[len(paths) - 1]["end"] if boundaries else run_start
+    while time.time() < deadline and not any(
+        e[1] == "final" for e in socket.events_between(last_end, float("inf"))
+    ):
+        time.sleep(0.05)
+    timmy_hears.transcription_thread_running = False
+    transcription_thread.join(timeout=2.0)
+    run_end = time.time()
+
+    measure_latency = replay_speed > 0
+    results = []
+    total_errors = total_ref_words = 0
+    total_audio = 0.0
+    latencies = []
+    for index, path in enumerate(paths):
+        name = os.path.basename(path)
+        window_start = boundaries.get(index, {}).get("start", run_end)
+        window_end = boundaries.get(index + 1, {}).get("start", run_end)
+        events = socket.events_between(window_start, window_end)
+        finals = final_utterances(events)
+        partials = [e for e in events if e[1] == "partial"]
+        audio = load_audio_file(path, timmy_hears.SAMPLE_RATE)
+        duration = len(audio) / timmy_hears.SAMPLE_RATE
+        total_audio += duration
+
+        hypothesis = " ".join(text for _time, text in finals)
+        latency_ms = None
+        if measure_latency:
+            # When the last word was fed in, not when the clip (and its trailing silence) ended
+            speech_end = window_start + speech_end_sample(audio, timmy_hears.SAMPLE_RATE) / timmy_hears.SAMPLE_RATE / replay_speed
+            after_end = [t for t, _text in finals if t >= speech_end]
+            latency_ms = round((after_end[0] - speech_end) * 1000, 1) if after_end else None
+        if latency_ms is not None:
+            latencies.append(latency_ms)
+
+        result = {
+            "file": path,
+            "audio_seconds": round(duration, 3),
+            "hypothesis": hypothesis,
+            "finalized_utterances": len(finals),
+            "end_of_speech_to_final_ms": latency_ms,
+            "partial_updates": len(partials),
+            "partial_updates_per_second": round(len(partials) / duration, 2) if duration else None,
+        }
+        if name in refs:
+            errors, ref_words = word_errors(refs[name], hypothesis)
+            result.update({"reference": refs[name], "word_errors": errors, "reference_words": ref_words,
+                           "wer": round(errors / ref_words, 4) if ref_words else None})
+            total_errors += errors
+            total_ref_words += ref_words
+        results.append(result)
+        print(f"[BENCH] {name}: latency={latency_ms}ms partials={len(partials)} '{hypothesis}'")
+
+    live_ms = sum(timmy_hears.pass_timings["live"])
+    final_ms = sum(timmy_hears.pass_timings["final"])
+    latencies.sort()
+    summary = {
+        "mode": "latency" if measure_latency else "throughput",
+        "files": len(paths),
+        "audio_seconds": round(total_audio, 3),
+        "wall_seconds": round(run_end - run_start, 3),
+        "rtf_live": round(live_ms / 1000 / total_audio, 4) if total_audio else None,
+        "rtf_final": round(final_ms / 1000 / total_audio, 4) if total_audio else None,
+        "rtf_total": round((live_ms + final_ms) / 1000 / total_audio, 4) if total_audio else None,
+        "decode_passes": {"live": len(timmy_hears.pass_timings["live"]),
+                          "final": len(timmy_hears.pass_timings["final"])},
+        "wer": round(total_errors / total_ref_words, 4) if total_ref_words else None,
+        "end_of_speech_to_final_ms": {
+            "count": len(latencies),
+            "avg": round(sum(latencies) / len(latencies), 1) if latencies else None,
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "p95": latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] if latencies else None,
+        },
+    }
+    return results, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay an audio corpus through timmy_hears and measure STT performance")
+    parser.add_argument("files", nargs="+", help="WAV/FLAC files to replay")
+    parser.add_argument("--refs", type=str, default=None, help="JSONL of {\"file\", \"text\"} reference transcripts")
+    parser.add_argument("--out", type=str, default="stt_benchmark_results.json", help="Where to write JSON results")
+    parser.add_argument("--model", type=str, default=timmy_hears.SMALL_DAN_MODEL, help="Model path or name")
+    parser.add_argument("--gpu-device", type=int, default=0, help="GPU device index (-1 for CPU)")
+    parser.add_argument("--compute-type", type=str, default=None, help="CTranslate2 compute type override for GPU models")
+    parser.add_argument("--cpu-compute-type", type=str, default=None, help="CTranslate2 compute type override for CPU models")
+    parser.add_argument("--two-pass", action="store_true", help="Benchmark two-pass mode")
+    parser.add_argument("--live-model", type=str, default=timmy_hears.LIVE_STT_MODEL)
+    parser.add_argument("--final-model", type=str, default=timmy_hears.FINAL_STT_MODEL)
+    parser.add_argument("--streaming", action=argparse.BooleanOptionalAction, default=timmy_hears.STREAMING_MODE)
+    parser.add_argument("--endpointing", choices=["vad", "text"], default=timmy_hears.ENDPOINTING_MODE)
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="1.0 = real time (latency pass), 0 = as fast as transcription keeps up (RTF/throughput pass, no latency)")
+    parser.add_argument("--gap", type=float, default=2.0, help="Seconds of silence between files")
+    args = parser.parse_args()
+
+    timmy_hears.STREAMING_MODE = args.streaming
+    timmy_hears.ENDPOINTING_MODE = args.endpointing
+    timmy_hears.TWO_PASS_MODE = args.two_pass
+    if args.compute_type:
+        timmy_hears.GPU_COMPUTE_TYPE = args.compute_type
+    if args.cpu_compute_type:
+        timmy_hears.CPU_COMPUTE_TYPE = args.cpu_compute_type
+
+    if args.two_pass:
+        timmy_hears.initialize_model(args.live_model, args.gpu_device)
+        timmy_hears.initialize_model(args.final_model, args.gpu_device, final_pass=True)
+    else:
+        timmy_hears.initialize_model(args.model, args.gpu_device)
+
+    results, summary = run_benchmark(
+        args.files,
+        load_references(args.files, args.refs),
+        replay_speed=args.replay_speed,
+        gap_seconds=args.gap,
+    )
+
+    live = timmy_hears.model_pool.get("live")
+    config = {
+        "model": live.path,
+        "final_model": timmy_hears.model_path("final") if args.two_pass else None,
+        "device": live.device,
+        "model_load_seconds": {role: m.load_seconds for role, m in
+                               (("live", live), ("final", timmy_hears.model_pool.get("final"))) if m},
+        "gpu_device": args.gpu_device,
+        "compute_type": {"gpu": timmy_hears.GPU_COMPUTE_TYPE, "cpu": timmy_hears.CPU_COMPUTE_TYPE},
+        "streaming": args.streaming,
+        "endpointing": args.endpointing,
+        "two_pass": args.two_pass,
+        "replay_speed": args.replay_speed,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump({"config": config, "summary": summary, "files": results}, f, indent=2)
+
+    print(json.dumps(summary, indent=2))
+    print(f"[OK] Results written to {args.out}")
@@ -0,0 +1,48 @@
+import numpy as np
+
+from audio_ring_buffer import AudioRingBuffer
+
+
+def test_view_is_contiguous_across_wrap():
+    ring = AudioRingBuffer(10)
+    ring.write(np.arange(7, dtype=np.int16))
+    ring.write(np.arange(7, 13, dtype=np.int16))
+
+    assert ring.write_pos == 13
+    assert ring.view(5, 13).tolist() == list(range(5, 13))
+    # Only capacity - 1 samples of history stay readable
+    assert ring.available_start == 4
+    assert ring.view().tolist() == list(range(4, 13))
+
+
+def test_oversized_write_keeps_newest_samples():
+    ring = AudioRingBuffer(4)
+    ring.write(np.arange(10, dtype=np.int16))
+
+    assert ring.write_pos == 10
+    assert ring.view().tolist() == [7, 8, 9]
+
+
+def test_rms_matches_direct_computation_across_wraps():
+    rng = np.random.default_rng(0)
+    audio = rng.integers(-20000, 20000, size=2000).astype(np.int16)
+    ring = AudioRingBuffer(300)
+    for i in range(0, len(audio), 70):
+        ring.write(audio[i:i + 70])
+
+    for start, end in [(1750, 2000), (1900, 1950), (1701, 1702)]:
+        expected = np.sqrt(np.mean((audio[start:end].astype(np.float64) / 32768.0) ** 2))
+        assert abs(ring.rms(start, end) - expected) < 1e-9
+
+
+def test_clear_and_discard_move_segment_start():
+    ring = AudioRingBuffer(100)
+    ring.write(np.ones(40, dtype=np.int16))
+    ring.discard_before(10)
+    assert len(ring) == 30
+
+    ring.clear()
+    assert len(ring) == 0
+    assert ring.rms() == 0.0
+    ring.write(np.ones(5, dtype=np.int16))
+    assert ring.view().tolist() == [1] * 5
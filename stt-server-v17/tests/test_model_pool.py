@@ -0,0 +1,67 @@
+import pytest
+
+from model_pool import ModelPool
+
+
+def make_pool():
+    pool = ModelPool(lambda path, device, compute_type, device_index: object())
+    pool.load("models/small.en", "cuda", "float16", role="final")
+    pool.load("models/tiny.en", "cuda", "float16", role="live")
+    return pool
+
+
+def test_load_reuses_model_and_assigns_role():
+    pool = make_pool()
+    again = pool.load("models/small.en", "cuda", "float16", role="other")
+
+    assert pool.get("final") is again
+    assert pool.stats()["roles"]["other"] == "small.en@cuda/float16"
+    assert len(pool.stats()["models"]) == 2
+
+
+def test_assign_unknown_model_raises():
+    with pytest.raises(KeyError):
+        make_pool().assign("live", "missing@cpu/int8")
+
+
+def test_failover_swaps_to_same_model_standby():
+    pool = make_pool()
+    pool.load("models/tiny.en", "cpu", "int8", role="standby")
+    pool.load("models/small.en/", "cpu", "int8", role="standby_final")
+
+    standby = pool.failover("final")
+    assert standby is pool.get("standby_final")
+    assert pool.get("final") is standby
+    assert "small.en@cuda/float16" in pool.stats()["degraded"]["final"]
+    assert pool.failover("final") is None  # already on the standby
+
+
+def test_failover_refuses_standby_with_other_model():
+    pool = make_pool()
+    pool.load("models/tiny.en", "cpu", "int8", role="standby")
+
+    # The live standby is the tiny model; it must never serve the final role
+    assert pool.failover("final", standby_role="standby") is None
+    assert pool.failover("final") is None
+    assert pool.get("final").name == "small.en@cuda/float16"
+    assert pool.stats()["degraded"] == {}
+
+    assert pool.failover("live").name == "tiny.en@cpu/int8"
+
+
+def test_assign_clears_degraded():
+    pool = make_pool()
+    pool.mark_degraded("final", "no standby")
+    assert pool.stats()["degraded"] == {"final": "no standby"}
+
+    pool.assign("final", "small.en@cuda/float16")
+    assert pool.stats()["degraded"] == {}
+
+
+def test_unload_keeps_models_in_use():
+    pool = make_pool()
+    pool.load("models/base.en", "cpu", "int8")
+
+    assert not pool.unload("tiny.en@cuda/float16")
+    assert pool.unload("base.en@cpu/int8")
+    assert not pool.unload("base.en@cpu/int8")
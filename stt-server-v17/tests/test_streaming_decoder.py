@@ -0,0 +1,94 @@
+from types import SimpleNamespace
+
+import numpy as np
+
+from audio_ring_buffer import AudioRingBuffer
+from streaming_decoder import StreamingDecoder
+
+SAMPLE_RATE = 16000
+
+
+class FakeWhisper:
+    """Returns the scripted words heard inside the decoded window, timed relative to it."""
+
+    def __init__(self, decoder, words):
+        self.decoder = decoder
+        self.words = words  # [(text, start_seconds, end_seconds)] in absolute time
+        self.prompts = []
+
+    def transcribe(self, audio, word_timestamps=True, initial_prompt=None):
+        self.prompts.append(initial_prompt)
+        offset = self.decoder.window_start / SAMPLE_RATE
+        end = offset + len(audio) / SAMPLE_RATE
+        words = [
+            SimpleNamespace(word=text, start=start - offset, end=stop - offset)
+            for text, start, stop in self.words
+            if start >= offset - 0.05 and stop <= end
+        ]
+        return [SimpleNamespace(words=words)], None
+
+
+def write_seconds(ring, seconds):
+    ring.write(np.zeros(int(seconds * SAMPLE_RATE), dtype=np.int16))
+
+
+def test_words_commit_once_two_passes_agree():
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    decoder = StreamingDecoder(sample_rate=SAMPLE_RATE)
+    whisper = FakeWhisper(decoder, [("Hello", 0.0, 0.4), (" world,", 0.5, 0.9), (" again", 1.0, 1.4)])
+
+    write_seconds(ring, 1.0)
+    assert decoder.process(ring, whisper.transcribe) == "Hello world,"
+    assert decoder.get_committed_text() == ""
+
+    write_seconds(ring, 0.5)
+    assert decoder.process(ring, whisper.transcribe) == "Hello world, again"
+    assert decoder.get_committed_text() == "Hello world,"
+    # The next window starts after the last committed word, prompted with the committed text
+    assert decoder.window_start == int(0.9 * SAMPLE_RATE)
+
+    write_seconds(ring, 0.1)
+    assert decoder.process(ring, whisper.transcribe) == "Hello world, again"
+    assert decoder.get_committed_text() == "Hello world, again"
+    assert whisper.prompts == [None, None, "Hello world,"]
+
+
+def test_no_new_audio_skips_decode():
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    decoder = StreamingDecoder(sample_rate=SAMPLE_RATE)
+    whisper = FakeWhisper(decoder, [("Hi", 0.0, 0.3)])
+
+    write_seconds(ring, 0.5)
+    decoder.process(ring, whisper.transcribe)
+    assert not decoder.has_new_audio(ring)
+    decoder.process(ring, whisper.transcribe)
+    assert decoder.decode_count == 1
+
+
+def test_disagreement_keeps_words_uncommitted():
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    decoder = StreamingDecoder(sample_rate=SAMPLE_RATE)
+    whisper = FakeWhisper(decoder, [("Wreck", 0.0, 0.4), (" a nice", 0.5, 0.9)])
+
+    write_seconds(ring, 1.0)
+    decoder.process(ring, whisper.transcribe)
+    whisper.words = [("Recognize", 0.0, 0.4), (" speech", 0.5, 0.9)]
+    write_seconds(ring, 0.2)
+
+    assert decoder.process(ring, whisper.transcribe) == "Recognize speech"
+    assert decoder.get_committed_text() == ""
+
+
+def test_window_cap_force_commits_words_leaving_the_window():
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    decoder = StreamingDecoder(sample_rate=SAMPLE_RATE, max_window_seconds=2.0)
+    whisper = FakeWhisper(decoder, [("one", 0.0, 0.4), (" two", 1.5, 1.9)])
+
+    write_seconds(ring, 2.0)
+    decoder.process(ring, whisper.transcribe)
+    whisper.words = [(" three", 1.5, 1.9)]  # never agrees with the previous pass
+    write_seconds(ring, 1.0)
+    decoder.process(ring, whisper.transcribe)
+
+    assert decoder.window_start == SAMPLE_RATE
+    assert decoder.get_committed_text() == "one"
@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+# stt_benchmark drives the real server module; skip where its dependencies aren't installed
+pytest.importorskip("faster_whisper")
+pytest.importorskip("flask_socketio")
+
+from stt_benchmark import final_utterances, speech_end_sample, word_errors  # noqa: E402
+
+SAMPLE_RATE = 16000
+
+
+def test_word_errors_ignores_case_and_punctuation():
+    assert word_errors("Hello, world!", "hello world") == (0, 2)
+    assert word_errors("turn the lights on", "turn lights off") == (2, 4)
+    assert word_errors("", "extra words") == (2, 0)
+
+
+def test_speech_end_sample_finds_end_of_speech_not_end_of_file():
+    rng = np.random.default_rng(0)
+    t = np.arange(SAMPLE_RATE) / SAMPLE_RATE
+    speech = (8000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16)
+    tail = rng.normal(0, 20, SAMPLE_RATE).astype(np.int16)
+    audio = np.concatenate([tail[:SAMPLE_RATE // 4], speech, tail])
+
+    end = speech_end_sample(audio, SAMPLE_RATE)
+    assert abs(end - (SAMPLE_RATE // 4 + SAMPLE_RATE)) <= SAMPLE_RATE * 0.02
+    assert speech_end_sample(np.zeros(SAMPLE_RATE, dtype=np.int16), SAMPLE_RATE) == 0
+
+
+def test_final_utterances_counts_refinalized_utterance_once():
+    events = [
+        (1.0, "partial", "turn the", False),
+        (1.5, "final", "turn the light on", False),
+        (2.5, "final", "turn the lights on", True),
+        (4.0, "final", "thanks", False),
+    ]
+    assert final_utterances(events) == [(1.5, "turn the lights on"), (4.0, "thanks")]
@@ -0,0 +1,49 @@
+import threading
+import time
+
+from transcript_bus import TranscriptBus
+
+
+def test_events_since_returns_newer_events_in_order():
+    bus = TranscriptBus()
+    bus.publish("partial", text="hel")
+    bus.publish("partial", text="hello")
+    bus.publish("final", text="hello there")
+
+    events, gap = bus.events_since(1)
+    assert not gap
+    assert [(e["seq"], e["type"]) for e in events] == [(2, "partial"), (3, "final")]
+    assert bus.events_since(3) == ([], False)
+
+
+def test_resume_older_than_replay_log_reports_gap():
+    bus = TranscriptBus(history=3)
+    for i in range(5):
+        bus.publish("partial", text=str(i))
+
+    events, gap = bus.events_since(1)
+    assert gap
+    assert [e["seq"] for e in events] == [3, 4, 5]
+    assert not bus.events_since(2)[1]  # seq 3 onward is all still in the log
+
+
+def test_client_ahead_of_restarted_bus_reports_gap():
+    bus = TranscriptBus()
+    bus.publish("clear")
+    assert bus.events_since(40) == ([], True)
+    assert bus.wait_for_events(40, timeout=5.0) == ([], True)
+
+
+def test_wait_for_events_wakes_on_publish():
+    bus = TranscriptBus()
+    threading.Timer(0.05, bus.publish, args=("final",), kwargs={"text": "hi"}).start()
+
+    start = time.perf_counter()
+    events, gap = bus.wait_for_events(0, timeout=5.0)
+    assert time.perf_counter() - start < 1.0
+    assert not gap
+    assert events[0]["text"] == "hi"
+
+
+def test_wait_for_events_times_out_empty():
+    assert TranscriptBus().wait_for_events(0, timeout=0.05) == ([], False)
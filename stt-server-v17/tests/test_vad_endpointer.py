@@ -0,0 +1,63 @@
+import numpy as np
+
+from audio_ring_buffer import AudioRingBuffer
+from vad_endpointer import VadEndpointer
+
+SAMPLE_RATE = 16000
+
+
+def noise(seconds, rng, level=30):
+    return rng.normal(0, level, int(seconds * SAMPLE_RATE)).astype(np.int16)
+
+
+def tone(seconds, freq=220.0, level=8000):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (level * np.sin(2 * np.pi * freq * t)).astype(np.int16)
+
+
+def feed(vad, ring, audio, chunk=1024):
+    """Write audio in capture-sized chunks, calling process() after each like the STT loop does."""
+    ends = []
+    for i in range(0, len(audio), chunk):
+        ring.write(audio[i:i + chunk])
+        if vad.process(ring):
+            ends.append(ring.write_pos)
+    return ends
+
+
+def test_tone_between_noise_is_one_utterance():
+    rng = np.random.default_rng(1)
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    vad = VadEndpointer(sample_rate=SAMPLE_RATE)
+    audio = np.concatenate([noise(0.5, rng), tone(1.0), noise(1.0, rng)])
+
+    ends = feed(vad, ring, audio)
+
+    assert len(ends) == 1
+    assert vad.speech_detected and not vad.in_speech
+    # Boundaries land within a couple of frames of the tone's edges
+    assert abs(vad.speech_start_pos - 0.5 * SAMPLE_RATE) <= 2 * vad.frame_samples
+    assert abs(vad.speech_end_pos - 1.5 * SAMPLE_RATE) <= 2 * vad.frame_samples
+    # Declared once end_silence_ms of trailing silence has been seen
+    assert ends[0] - vad.speech_end_pos >= 0.4 * SAMPLE_RATE
+
+
+def test_noise_alone_is_not_speech():
+    rng = np.random.default_rng(2)
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    vad = VadEndpointer(sample_rate=SAMPLE_RATE)
+    # Loud broadband noise: well above the floor, but flat and hissy
+    audio = np.concatenate([noise(0.5, rng), noise(1.0, rng, level=6000), noise(0.5, rng)])
+
+    assert feed(vad, ring, audio) == []
+    assert not vad.speech_detected
+
+
+def test_short_pause_does_not_end_utterance():
+    rng = np.random.default_rng(3)
+    ring = AudioRingBuffer(SAMPLE_RATE * 10)
+    vad = VadEndpointer(sample_rate=SAMPLE_RATE, end_silence_ms=400)
+    audio = np.concatenate([noise(0.5, rng), tone(0.5), noise(0.2, rng), tone(0.5), noise(0.6, rng)])
+
+    assert len(feed(vad, ring, audio)) == 1
+    assert abs(vad.speech_start_pos - 0.5 * SAMPLE_RATE) <= 2 * vad.frame_samples
@@ -10,7 +10,6 @@ import argparse
 from collections import deque
 from flask import Flask, jsonify, Response, request
 import logging
-import queue
 import requests
 import json
 import urllib3
@@ -34,10 +33,22 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
 import numpy as np
-import pyaudio
+try:
+    import pyaudio
+except ImportError:
+    pyaudio = None  # Only needed for live microphone capture; --replay works without it
 from faster_whisper import WhisperModel
 from transcript_manager import TranscriptManager
-from flask_socketio import SocketIO
+from streaming_decoder import StreamingDecoder
+from audio_ring_buffer import AudioRingBuffer
+from vad_endpointer import VadEndpointer
+from llm_dispatcher import LlmDispatcher
+from audio_replay import replay_files
+from remote_streams import RemoteStream
+from partial_prefetcher import PartialPrefetcher
+from transcript_bus import TranscriptBus
+from model_pool import ModelPool
+from flask_socketio import SocketIO, emit, join_room, leave_room
 
 # Define a filter to exclude logs for the /transcript endpoint
 class TranscriptFilter(logging.Filter):
@@ -64,6 +75,9 @@ http_session.mount('https://', requests.adapters.HTTPAdapter(
 
 # Global variables to store transcription data
 transcript_manager = TranscriptManager(max_history=50)
+# Sequence-numbered transcript deltas pushed to Socket.IO ('transcript_delta') and /stream subscribers
+transcript_bus = TranscriptBus(history=500)
+STREAM_KEEPALIVE_SECONDS = 15  # idle SSE connections only wake up this often
 PAUSE_THRESHOLD = 0.5  # seconds of silence to consider speech finished (reduced from 1.0s for faster response)
 
 # Flask app configuration
@@ -74,9 +88,21 @@ socketio = SocketIO(app, cors_allowed_origins="*")
 FORCE_FINALIZE_LENGTH = 80 # characters. Set to a high value to disable.
 AUDIO_ACTIVITY_THRESHOLD = 0.3  # seconds of silence before considering speech paused
 SAMPLE_RATE = 16000
-CHUNK_SIZE = 1024
 BUFFER_DURATION_SECONDS = 10
-MAX_BUFFER_SIZE = int(BUFFER_DURATION_SECONDS * SAMPLE_RATE / CHUNK_SIZE)
+RING_BUFFER_SAMPLES = int(BUFFER_DURATION_SECONDS * SAMPLE_RATE)
+
+# Streaming decode: only decode a sliding tail window after the committed prefix
+# and commit words once two consecutive passes agree (LocalAgreement-2).
+# Set to False (or pass --no-streaming) to re-decode the whole buffer every pass.
+STREAMING_MODE = True
+STREAMING_WINDOW_SECONDS = 6.0  # max audio decoded per pass in streaming mode
+
+# Endpointing: "vad" finalizes a turn when the frame-level VAD hears trailing silence
+# (Whisper is not run on silence). "text" is the old heuristic: finalize once the
+# transcript has not changed for PAUSE_THRESHOLD seconds.
+ENDPOINTING_MODE = "vad"
+VAD_END_SILENCE_MS = 400  # trailing acoustic silence that ends an utterance
+VAD_PREROLL_SECONDS = 0.3  # audio kept before detected speech onset
 
 # Custom STT Model Configuration
 # Available custom models - easy switching between them
@@ -93,6 +119,15 @@ DEFAULT_STT_MODEL = SMALL_DAN_MODEL  # Currently using: small_dan_ct2 for better
 
 # LLM Preprocessor endpoint
 LLM_ENDPOINT = "http://localhost:5000/api/webhook"
+LLM_TIMEOUT = 30  # seconds (classification + retrieval + generation)
+# Finalized utterances are handed to a background dispatcher so transcription never waits on the LLM
+LLM_DISPATCH_QUEUE_SIZE = 4
+LLM_DISPATCH_MAX_RETRIES = 2  # connection failures only; timeouts are never retried
+# Speculative prefetch: debounced partials let v34 classify/retrieve before the turn is finalized
+PREFETCH_ENABLED = True
+PREFETCH_ENDPOINT = "http://localhost:5000/api/prefetch"
+PREFETCH_INTERVAL_SECONDS = 0.5  # at most one partial sent per interval
+PREFETCH_MIN_WORDS = 3
 # TTS Server endpoint
 TTS_SERVER_URL = "http://192.168.1.154:5051"
 EYE_LCD_URL = "https://192.168.1.110:8080"
@@ -101,60 +136,158 @@ EYE_LCD_URL = "https://192.168.1.110:8080"
 RATE = 16000
 CHANNELS = 1
 CHUNK = 4096
-FORMAT = pyaudio.paInt16
+FORMAT = pyaudio.paInt16 if pyaudio is not None else None
 
-# Transcription model and state
-model = None
-current_model_path = None
+# Offline replay (--replay): feed WAV/FLAC files into the capture ring instead of the microphone
+REPLAY_GAP_SECONDS = 1.5  # silence appended after each file so the endpointer can fire
+REPLAY_MAX_LEAD_SECONDS = 1.0  # faster-than-real-time replay waits when the decoder is this far behind
+
+# Remote audio ingest: clients stream binary PCM16 frames (16 kHz mono, little-endian)
+# as Socket.IO 'audio' events on this namespace. Each connection gets its own ring
+# buffer, decoder, VAD and transcript history; the loaded model(s) are shared.
+REMOTE_AUDIO_NAMESPACE = "/audio"
+MAX_REMOTE_STREAMS = 4
+
+# Compute types used when loading models (override with --compute-type)
+GPU_COMPUTE_TYPE = "float16"
+CPU_COMPUTE_TYPE = "int8"
+
+# Transcription models live in model_pool under roles: "live" drives partials (the only model
+# in single-pass mode), "final" runs once per finalized utterance in two-pass mode, and
+# "standby" / "standby_final" are warm int8 CPU copies of the live / final model that CUDA
+# failures fail over to without loading anything.
+STANDBY_CPU_MODEL = True  # pass --no-standby to skip loading the CPU standby
 transcription_thread_running = True
 language = "en"
 ai_mode = False  # Flag to determine TTS vs LLM endpoint
 
+# Two-pass STT: cheap live model for partials, accurate final model once per utterance
+TWO_PASS_MODE = False
+LIVE_STT_MODEL = TINY_DAN_MODEL
+FINAL_STT_MODEL = SMALL_DAN_MODEL
+
+# Rolling per-pass decode timings (ms), reported by /stt-timings and in latency events
+pass_timings = {"live": deque(maxlen=200), "final": deque(maxlen=200)}
+
 # --- Global State ---
-audio_queue = queue.Queue()
+# Capture buffer: written by the PyAudio callback, read by transcribe_audio
+audio_ring = AudioRingBuffer(RING_BUFFER_SAMPLES, sample_rate=SAMPLE_RATE)
+
+# Remote streams by Socket.IO session id: sid -> (RemoteStream, LlmDispatcher)
+remote_streams = {}
+remote_streams_lock = threading.Lock()
 
 # Global flag and lock to pause audio processing during TTS playback
 is_speech_synthesis_active = False
 synthesis_lock = threading.Lock()
 
-def initialize_model(model_size=DEFAULT_STT_MODEL, gpu_device=0):
-    """Initialize the faster-whisper model with GPU fallback to CPU."""
-    global model, current_model_path
-    current_model_path = model_size
-    
-    # If gpu_device is -1, force CPU mode
+def _create_whisper_model(model_size, device, compute_type, device_index=0):
+    """ModelPool factory: construct a faster-whisper model on an explicit device."""
+    if device == "cpu":
+        return WhisperModel(model_size, device="cpu", compute_type=compute_type)
+    return WhisperModel(model_size, device=device, compute_type=compute_type, device_index=device_index)
+
+model_pool = ModelPool(_create_whisper_model)
+
+def initialize_model(model_size=DEFAULT_STT_MODEL, gpu_device=0, final_pass=False):
+    """
+    Load the live (or, with final_pass=True, the final-pass) model into the pool and assign its role.
+    Tries the GPU first and falls back to CPU; gpu_device=-1 forces CPU.
+    """
+    role = "final" if final_pass else "live"
     if gpu_device == -1:
         print("[CPU] Initializing model on CPU...")
-        model = WhisperModel(
-            model_size, 
-            device="cpu", 
-            compute_type="int8"
-        )
-        print(f"[OK] faster-whisper model loaded on CPU: {model_size}")
-        return
-    
+        return model_pool.load(model_size, "cpu", CPU_COMPUTE_TYPE, role=role)
     try:
-        # Try GPU first
-        model = WhisperModel(
-            model_size, 
-            device="cuda", 
-            compute_type="float16", 
-            device_index=gpu_device
-        )
+        loaded = model_pool.load(model_size, "cuda", GPU_COMPUTE_TYPE, device_index=gpu_device, role=role)
         print(f"[OK] faster-whisper model loaded on GPU: {model_size}")
+        return loaded
     except Exception as e:
         print(f"[WARNING] GPU failed: {e}")
         print("[CPU] Falling back to CPU...")
-        try:
-            model = WhisperModel(
-                model_size, 
-                device="cpu", 
-                compute_type="int8"
-            )
-            print(f"[OK] faster-whisper model loaded on CPU: {model_size}")
-        except Exception as e2:
-            print(f"[ERROR] Failed to load model on CPU: {e2}")
+        loaded = model_pool.load(model_size, "cpu", CPU_COMPUTE_TYPE, role=role)
+        print(f"[OK] faster-whisper model loaded on CPU: {model_size}")
+        return loaded
+
+def start_standby_model():
+    """Load warm int8 CPU copies of the GPU live (and final) models in the background for instant CUDA failover."""
+    names = []
+    for role in ("live", "final"):
+        loaded = model_pool.get(role)
+        if loaded is not None and loaded.device != "cpu":
+            names.append(model_pool.load_async(loaded.path, "cpu", CPU_COMPUTE_TYPE,
+                                               role=model_pool.standby_role(role)))
+    return names
+
+def model_path(role):
+    loaded = model_pool.get(role)
+    return loaded.path if loaded else None
+
+def run_model_transcribe(audio_data, final_pass=False, **overrides):
+    """
+    Run transcribe on the live model (or the final-pass model) with the server's decode options.
+    On CUDA errors the role fails over to the warm CPU standby of the same model; nothing is
+    loaded inline.
+    Returns (segments, info) with segments materialized as a list.
+    """
+    options = dict(
+        beam_size=1,
+        without_timestamps=True,
+        vad_filter=True,
+        condition_on_previous_text=False,
+        temperature=0.0,
+    )
+    options.update(overrides)
+    role = "final" if final_pass else "live"
+    start = time.perf_counter()
+    try:
+        segments, info = model_pool.get(role).transcribe(audio_data, **options)
+    except Exception as e:
+        if "cudnn" in str(e).lower() or "cuda" in str(e).lower():
+            print(f"[CPU] GPU transcription failed: {e}")
+            standby = model_pool.failover(role)
+            if standby is None:
+                # No warm standby of this model - load one in the background and skip this pass
+                failed = model_pool.get(role)
+                model_pool.load_async(failed.path, "cpu", CPU_COMPUTE_TYPE, role=role)
+                if final_pass:
+                    model_pool.mark_degraded(role, f"no CPU standby of {failed.name}; final pass skipped "
+                                                   "(live text kept) until the CPU copy loads")
+                raise
+            segments, info = standby.transcribe(audio_data, **options)
+        else:
             raise
+    pass_timings[role].append((time.perf_counter() - start) * 1000)
+    return segments, info
+
+def run_final_pass(request_id=None):
+    """
+    Two-pass mode: transcribe the finalized utterance audio once with the final model.
+    Returns the text, or None if the final pass produced nothing usable.
+    """
+    audio_data = audio_ring.read_float()
+    if len(audio_data) == 0:
+        return None
+    live_passes = list(pass_timings["live"])
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "stt", Events.STT_FINAL_PASS_START,
+                   {"audio_seconds": round(len(audio_data) / SAMPLE_RATE, 2)})
+    try:
+        segments, info = run_model_transcribe(audio_data, final_pass=True)
+    except Exception as e:
+        print(f"[WARNING] Final pass failed ({e}); keeping the live transcript")
+        return None
+    text = " ".join(seg.text for seg in segments).strip()
+    duration_ms = pass_timings["final"][-1]
+    print(f"[DEBUG] Final pass ({model_path('final')}) took {duration_ms:.0f}ms: '{text}'")
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "stt", Events.STT_FINAL_PASS_COMPLETE,
+                   {"duration_ms": round(duration_ms, 2),
+                    "audio_seconds": round(len(audio_data) / SAMPLE_RATE, 2),
+                    "model": model_path("final"),
+                    "live_model": model_path("live"),
+                    "live_pass_avg_ms": round(sum(live_passes) / len(live_passes), 2) if live_passes else None})
+    return text or None
 
 def transcribe_audio(socketio_app):
     """
@@ -163,106 +296,125 @@ def transcribe_audio(socketio_app):
     """
     global is_speech_synthesis_active  # Need global declaration since we modify it in finalization
     
-    audio_buffer = deque(maxlen=MAX_BUFFER_SIZE)
+    decoder = StreamingDecoder(sample_rate=SAMPLE_RATE, max_window_seconds=STREAMING_WINDOW_SECONDS)
+    vad = VadEndpointer(sample_rate=SAMPLE_RATE, end_silence_ms=VAD_END_SILENCE_MS)
+    vad_mode = ENDPOINTING_MODE == "vad"
+    preroll_samples = int(VAD_PREROLL_SECONDS * SAMPLE_RATE)
+    last_decoded_pos = audio_ring.write_pos  # ring position covered by the last decode pass
     last_transcription_time = time.time()
-    last_audio_received_time = time.time()  # Track when audio was last received
     was_paused = False  # Track previous pause state to detect state changes
 
     while True:
-        # Check for pause state changes and clear audio_buffer if we just got paused
+        # Check for pause state changes and clear the capture buffer if we just got paused
         with synthesis_lock:
             is_currently_paused = is_speech_synthesis_active
         
         # If we just transitioned from not paused to paused, clear the audio buffer
         if is_currently_paused and not was_paused:
-            buffer_cleared_count = len(audio_buffer)
-            audio_buffer.clear()
+            buffer_cleared_count = len(audio_ring)
+            audio_ring.clear()
+            decoder.reset()
+            vad.reset()
             if buffer_cleared_count > 0:
-                print(f">>> Cleared {buffer_cleared_count} audio chunks from transcription buffer to prevent echo")
+                print(f">>> Cleared {buffer_cleared_count} audio samples from transcription buffer to prevent echo")
         
         # Update the pause state tracker
         was_paused = is_currently_paused
         
         # Skip processing entirely if we're paused
         if is_currently_paused:
+            audio_ring.consumed_pos = audio_ring.write_pos
             socketio_app.sleep(0.1)
             continue
         
         try:
-            # Get all available audio chunks from the queue
-            chunk_count = 0
-            while not audio_queue.empty():
-                chunk = audio_queue.get()
-                audio_buffer.append(chunk)
-                chunk_count += 1
-                last_audio_received_time = time.time()  # Update timestamp when audio is received
-            
-            if chunk_count > 0:
-                print(f"[DEBUG] Received {chunk_count} audio chunks, buffer size: {len(audio_buffer)}")
+            # Check how much new audio the capture callback has written since the last pass
+            write_pos = audio_ring.write_pos
+            new_samples = write_pos - last_decoded_pos
+            if new_samples > 0:
+                print(f"[DEBUG] Received {new_samples} audio samples, buffer size: {len(audio_ring)}")
 
             # If there's audio in the buffer, transcribe it
-            if not audio_buffer:
+            if len(audio_ring) == 0:
                 socketio_app.sleep(0.1)
                 continue
 
-            # Convert buffer to a single numpy array for the model
-            audio_data = np.concatenate(list(audio_buffer))
-            rms = np.sqrt(np.mean(audio_data**2))
-            print(f"[DEBUG] Transcribing {len(audio_buffer)} chunks, RMS level: {rms:.4f}")
-            
-            # Perform transcription with VAD filter enabled to ignore background noise
-            try:
-                segments, info = model.transcribe(
-                    audio_data,
-                    beam_size=1,
-                    without_timestamps=True,
-                    vad_filter=True,
-                    condition_on_previous_text=False,
-                    temperature=0.0,  
-                )
-            except Exception as e:
-                if "cudnn" in str(e).lower() or "cuda" in str(e).lower():
-                    print(f"[CPU] GPU transcription failed, reinitializing with CPU: {e}")
-                    # Reinitialize model with CPU using the same model path
-                    initialize_model(model_size=current_model_path or DEFAULT_STT_MODEL, gpu_device=-1)  # -1 forces CPU
-                    # Retry transcription with CPU
-                    segments, info = model.transcribe(
-                        audio_data,
-                        beam_size=1,
-                        without_timestamps=True,
-                        vad_filter=True,
-                        condition_on_previous_text=False,
-                        temperature=0.0,  
-                    )
-                else:
-                    raise
-            # Join segments with a space to prevent run-on sentences.
-            full_text = " ".join(seg.text for seg in segments).strip()
-            print(f"[DEBUG] Transcribed text: '{full_text}'")
+            # Frame-level VAD on the newly captured audio
+            speech_ended = False
+            if vad_mode:
+                speech_ended = vad.process(audio_ring)
+                if not vad.speech_detected:
+                    # Only silence so far: keep a short pre-roll and don't run Whisper on it
+                    audio_ring.discard_before(audio_ring.write_pos - preroll_samples)
+                    last_decoded_pos = write_pos
+                    audio_ring.consumed_pos = write_pos
+                    socketio_app.sleep(0.1)
+                    continue
+
+            if new_samples <= 0 or (vad_mode and not vad.in_speech and not speech_ended):
+                # Nothing new (or a mid-utterance silence) - skip decoding but still check for pauses
+                full_text = transcript_manager.get_current_text()
+            elif STREAMING_MODE:
+                # Decode only the tail window after the committed prefix
+                full_text = decoder.process(audio_ring, run_model_transcribe)
+                print(f"[DEBUG] Streaming pass {decoder.decode_count}: committed='{decoder.get_committed_text()}' text='{full_text}'")
+            else:
+                # Zero-copy view of the segment, converted to float once for the model
+                audio_data = audio_ring.read_float(end=write_pos)
+                rms = audio_ring.rms(end=write_pos)
+                print(f"[DEBUG] Transcribing {len(audio_data)} samples, RMS level: {rms:.4f}")
+
+                # Perform transcription with VAD filter enabled to ignore background noise
+                segments, info = run_model_transcribe(audio_data)
+                # Join segments with a space to prevent run-on sentences.
+                full_text = " ".join(seg.text for seg in segments).strip()
+                print(f"[DEBUG] Transcribed text: '{full_text}'")
+            last_decoded_pos = write_pos
+            audio_ring.consumed_pos = write_pos
 
             # Filter out sound effects and background noise - skip processing entirely
             full_text_stripped = full_text.strip()
             if (full_text_stripped.startswith('(') and full_text_stripped.endswith(')')) or \
                (full_text_stripped.startswith('[') and full_text_stripped.endswith(']')):
                 print(f"[DEBUG] Filtered out sound effect: '{full_text_stripped}'")
+                if speech_ended:
+                    # The "utterance" was just noise - start the next one fresh
+                    audio_ring.clear()
+                    decoder.reset()
+                    vad.reset()
                 continue  # Skip processing sound effects entirely
 
             # Update the current text
             if transcript_manager.update_current_text(full_text):
                 # If the text changed, we update the live transcript and reset the pause timer
-                socketio_app.emit('new_live_transcript', {'data': transcript_manager.get_current_text()})
+                publish_transcript_event(socketio_app, 'partial', text=transcript_manager.get_current_text())
                 last_transcription_time = time.time()
+                if ai_mode and PREFETCH_ENABLED:
+                    partial_prefetcher.update(transcript_manager.accumulated_text + " " + full_text)
 
             # Check for pauses to finalize a transcript segment
-            if time.time() - last_transcription_time > PAUSE_THRESHOLD:
+            if vad_mode:
+                pause_detected = speech_ended
+            else:
+                pause_detected = time.time() - last_transcription_time > PAUSE_THRESHOLD
+            if pause_detected:
                 # Generate request ID early to track entire finalization process
                 request_id = generate_request_id() if LATENCY_TRACKING_ENABLED else None
                 
                 # Log when pause threshold is reached
                 if LATENCY_TRACKING_ENABLED and request_id:
                     log_timing(request_id, "stt", "stt_pause_detected", 
-                             {"pause_threshold": PAUSE_THRESHOLD})
+                             {"endpointing": ENDPOINTING_MODE,
+                              "pause_threshold": PAUSE_THRESHOLD,
+                              "vad_end_silence_ms": VAD_END_SILENCE_MS if vad_mode else None})
                 
+                # Two-pass: replace the live partial with one accurate decode of the utterance audio
+                if TWO_PASS_MODE and model_pool.get("final") is not None:
+                    final_text = run_final_pass(request_id)
+                    if final_text:
+                        transcript_manager.update_current_text(final_text)
+
+                partial_prefetcher.cancel()
                 if transcript_manager.finalize_text():
                     # Get the latest finalized transcript entry
                     final_transcripts = transcript_manager.get_final_transcripts()
@@ -273,13 +425,8 @@ def transcribe_audio(socketio_app):
                         # This prevents capturing new speech while we're processing/responding
                         with synthesis_lock:
                             is_speech_synthesis_active = True
-                            # Clear any audio that accumulated during finalization
-                            queue_cleared_count = 0
-                            while not audio_queue.empty():
-                                audio_queue.get()
-                                queue_cleared_count += 1
-                            if queue_cleared_count > 0:
-                                print(f">>> [AUTO-PAUSE] Cleared {queue_cleared_count} audio chunks after finalization")
+                        # Clear any audio that accumulated during finalization (O(1))
+                        audio_ring.clear()
                         print(">>> [AUTO-PAUSE] Listening paused after finalization (will resume after TTS)")
                         
                         # Log after finalization complete
@@ -293,28 +440,32 @@ def transcribe_audio(socketio_app):
                         except Exception:
                             pass
 
-                        # Send to either LLM or TTS based on --ai flag
-                        if ai_mode:
-                            print(f"[AI] Sending to LLM: {latest_entry} [request_id={request_id}]")
-                            send_to_llm_preprocessor(latest_entry, request_id)
-                        else:
-                            print(f"[TTS] Sending to TTS: {latest_entry}")
-                            send_to_tts_server(latest_entry)
+                        # Hand off to the dispatcher (LLM or TTS based on --ai flag) and keep transcribing
+                        llm_dispatcher.submit(latest_entry, request_id)
 
                     
-                    socketio_app.emit('new_final_transcript', {'data': final_transcripts})
-                    audio_buffer.clear()
+                    publish_transcript_event(socketio_app, 'final', text=final_transcripts[-1],
+                                             replaces_last=transcript_manager.last_finalize_replaced)
+                    audio_ring.clear()
+                    decoder.reset()
+                elif vad_mode:
+                    # Nothing worth keeping was said - drop the audio and start fresh
+                    audio_ring.clear()
+                    decoder.reset()
+                vad.reset()
                 # Reset timer after finalizing to avoid immediate re-triggering
                 last_transcription_time = time.time()
 
             # Smart force finalize - only if text is long AND we're in a natural speech pause
             if transcript_manager.get_current_text() and len(transcript_manager.get_current_text()) > FORCE_FINALIZE_LENGTH:
                 # Only force-finalize if we're in a natural speech pause (not mid-sentence)
-                time_since_last_audio = time.time() - last_audio_received_time
+                last_audio_time = vad.last_speech_time if vad_mode else audio_ring.last_write_time
+                time_since_last_audio = time.time() - last_audio_time
                 if time_since_last_audio > AUDIO_ACTIVITY_THRESHOLD:
                     if transcript_manager.force_finalize_text():
                         # Don't emit new_final_transcript here - only accumulate text
-                        audio_buffer.clear()
+                        audio_ring.clear()
+                        decoder.reset()
                 # If still actively speaking, let it continue (no buffer clear)
 
             socketio_app.sleep(0.1) # Small delay to prevent busy-waiting
@@ -327,14 +478,58 @@ def transcribe_audio(socketio_app):
 
 
 
+def capture_samples(samples):
+    """Write int16 capture samples into the ring buffer unless TTS is active."""
+    # Plain bool read - no lock on the capture path. If TTS is active, drop the audio to prevent echo
+    if not is_speech_synthesis_active:
+        audio_ring.write(samples)
+
+def _audio_callback(in_data, frame_count, time_info, status):
+    """PyAudio callback: write captured int16 samples straight into the ring buffer."""
+    capture_samples(np.frombuffer(in_data, dtype=np.int16))
+    return (None, pyaudio.paContinue)
+
+def replay_audio(paths, speed=1.0, gap_seconds=REPLAY_GAP_SECONDS, on_file_start=None, on_file_end=None):
+    """
+    Feed audio files into the capture ring instead of the microphone (--replay).
+    speed=1.0 is real time; speed<=0 runs as fast as the transcriber keeps up.
+    Replay holds while listening is paused, as if the speaker waited for Timmy to answer.
+    """
+    max_lead = int(REPLAY_MAX_LEAD_SECONDS * SAMPLE_RATE)
+
+    def _wait_for_transcriber():
+        while transcription_thread_running:
+            if is_speech_synthesis_active:
+                time.sleep(0.01)
+            elif (speed <= 0 or speed > 1.0) and audio_ring.write_pos - audio_ring.consumed_pos > max_lead:
+                time.sleep(0.005)
+            else:
+                return
+
+    print(f"Replaying {len(paths)} file(s) at {'max' if speed <= 0 else f'{speed:g}x'} speed...")
+    replay_files(
+        paths,
+        capture_samples,
+        sample_rate=SAMPLE_RATE,
+        chunk_samples=CHUNK,
+        speed=speed,
+        gap_seconds=gap_seconds,
+        wait_fn=_wait_for_transcriber,
+        on_file_start=on_file_start,
+        on_file_end=on_file_end,
+        should_stop=lambda: not transcription_thread_running,
+    )
+    print("Replay finished.")
+
 def record_audio():
-    """Record audio from microphone and add to queue."""
+    """Record audio from microphone into the capture ring buffer (callback mode)."""
     print("[DEBUG] record_audio() function called")
     import sys
     sys.stdout.flush()
     p = pyaudio.PyAudio()
     print("[DEBUG] PyAudio initialized")
     sys.stdout.flush()
+    stream = None
     try:
         print(f"[DEBUG] Opening stream: FORMAT={FORMAT}, CHANNELS={CHANNELS}, RATE={RATE}, CHUNK={CHUNK}")
         sys.stdout.flush()
@@ -344,27 +539,20 @@ def record_audio():
             rate=RATE,
             input=True,
             frames_per_buffer=CHUNK,
+            stream_callback=_audio_callback,
         )
+        stream.start_stream()
         
         print("Recording started...")
         sys.stdout.flush()
         
-        while transcription_thread_running:
-            try:
-                data = stream.read(CHUNK, exception_on_overflow=False)
-
-                # If TTS is active, drop the audio chunk to prevent echo
-                with synthesis_lock:
-                    if is_speech_synthesis_active:
-                        continue
-                
-                # Convert raw bytes to numpy array and put in queue
-                audio_np = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
-                audio_queue.put(audio_np)
-            except Exception as e:
-                print(f"Audio recording error: {e}")
-                break
+        while transcription_thread_running and stream.is_active():
+            time.sleep(0.1)
+        if transcription_thread_running:
+            print("Audio recording error: input stream stopped unexpectedly")
                 
+    except Exception as e:
+        print(f"Audio recording error: {e}")
     finally:
         try:
             stream.stop_stream()
@@ -378,27 +566,243 @@ def index():
     """Serve the main page."""
     return app.send_static_file('index.html')
 
-@app.route('/transcript')
-def get_transcript():
-    """Return the current transcription state as JSON."""
-    return jsonify({
+def publish_transcript_event(socketio_app, event_type, **fields):
+    """Publish one transcript delta on the bus and push it to Socket.IO clients."""
+    event = transcript_bus.publish(event_type, **fields)
+    socketio_app.emit('transcript_delta', event)
+    return event
+
+def _transcript_snapshot():
+    # Read seq first: deltas after it are replayed on top of this snapshot. One of them may
+    # already be reflected in the text, so clients skip a 'final' append equal to the last entry.
+    seq = transcript_bus.seq
+    return {
+        'seq': seq,
         'current': transcript_manager.get_current_text(),
         'final': transcript_manager.get_final_transcripts()
-    })
+    }
+
+@app.route('/transcript')
+def get_transcript():
+    """Return the current transcription state as JSON (with the bus sequence number to resume from)."""
+    return jsonify(_transcript_snapshot())
 
 @app.route('/stream')
 def stream():
-    """Server-sent events endpoint for real-time updates."""
-    def event_stream():
-        last_sent = None
+    """
+    Server-sent transcript deltas. Resumes after the Last-Event-ID header (sent automatically
+    by EventSource on reconnect) or ?since=<seq>; otherwise starts with a snapshot event.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        since = None
+
+    def event_stream(last_seq):
+        if last_seq is None:
+            snapshot = _transcript_snapshot()
+            last_seq = snapshot['seq']
+            yield f"id: {last_seq}\nevent: snapshot\ndata: {json.dumps(snapshot)}\n\n"
         while True:
-            current = transcript_manager.get_current_text()
-            if current != last_sent:
-                last_sent = current
-                yield f"data: {current}\n\n"
-            time.sleep(0.1)
-    
-    return Response(event_stream(), mimetype="text/event-stream")
+            events, gap = transcript_bus.wait_for_events(last_seq, timeout=STREAM_KEEPALIVE_SECONDS)
+            if gap:
+                # Fell out of the replay log - re-sync from a snapshot
+                snapshot = _transcript_snapshot()
+                last_seq = snapshot['seq']
+                yield f"id: {last_seq}\nevent: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+                continue
+            if not events:
+                yield ": keepalive\n\n"
+                continue
+            for event in events:
+                last_seq = event['seq']
+                yield f"id: {last_seq}\nevent: delta\ndata: {json.dumps(event)}\n\n"
+
+    return Response(event_stream(since), mimetype="text/event-stream")
+
+@socketio.on('transcript_resume')
+def handle_transcript_resume(data=None):
+    """Replay deltas missed since {"since": seq}, or send a snapshot if they are no longer buffered."""
+    since = (data or {}).get('since')
+    if not isinstance(since, int):
+        emit('transcript_snapshot', _transcript_snapshot())
+        return
+    events, gap = transcript_bus.events_since(since)
+    if gap:
+        emit('transcript_snapshot', _transcript_snapshot())
+        return
+    for event in events:
+        emit('transcript_delta', event)
+
+@app.route('/stt-timings')
+def stt_timings():
+    """Return rolling live/final decode pass timings (ms)."""
+    def _summary(values):
+        values = sorted(values)
+        if not values:
+            return {"count": 0}
+        return {
+            "count": len(values),
+            "avg_ms": round(sum(values) / len(values), 2),
+            "p50_ms": round(values[len(values) // 2], 2),
+            "max_ms": round(values[-1], 2),
+        }
+    return jsonify({
+        "two_pass": TWO_PASS_MODE,
+        "live_model": model_path("live"),
+        "final_model": model_path("final"),
+        "degraded": model_pool.stats()["degraded"],
+        "live": _summary(list(pass_timings["live"])),
+        "final": _summary(list(pass_timings["final"])),
+    })
+
+@app.route('/admin/models')
+def admin_models():
+    """Loaded models with load time, memory footprint and rolling decode latency, plus role assignments."""
+    return jsonify(model_pool.stats())
+
+@app.route('/admin/models/load', methods=['POST'])
+def admin_load_model():
+    """
+    Load a model in the background: {"path": ..., "device": "cuda"|"cpu", "compute_type": ..., "device_index": 0, "role": "live"}.
+    With a role, it is swapped in as soon as it finishes loading.
+    """
+    data = request.get_json(silent=True) or {}
+    path = data.get('path')
+    if not path:
+        return jsonify({"error": "'path' is required"}), 400
+    device = data.get('device', 'cuda')
+    if device not in ('cuda', 'cpu'):
+        return jsonify({"error": "device must be 'cuda' or 'cpu'"}), 400
+    compute_type = data.get('compute_type') or (GPU_COMPUTE_TYPE if device == 'cuda' else CPU_COMPUTE_TYPE)
+    role = data.get('role')
+    if role not in (None, 'live', 'final', 'standby', 'standby_final'):
+        return jsonify({"error": "role must be 'live', 'final', 'standby' or 'standby_final'"}), 400
+    try:
+        device_index = int(data.get('device_index', 0))
+    except (TypeError, ValueError):
+        return jsonify({"error": "device_index must be an integer"}), 400
+    name = model_pool.load_async(path, device, compute_type, device_index=device_index, role=role)
+    return jsonify({"status": "loading", "name": name, "role": role}), 202
+
+@app.route('/admin/models/swap', methods=['POST'])
+def admin_swap_model():
+    """Point a role at an already-loaded model: {"role": "live", "name": "small_dan_ct2@cuda/float16"}."""
+    data = request.get_json(silent=True) or {}
+    role, name = data.get('role'), data.get('name')
+    if role not in ('live', 'final', 'standby', 'standby_final') or not name:
+        return jsonify({"error": "'role' (live|final|standby|standby_final) and 'name' are required"}), 400
+    try:
+        model_pool.assign(role, name)
+    except KeyError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify({"status": "swapped", "role": role, "name": name})
+
+@app.route('/admin/models/unload', methods=['POST'])
+def admin_unload_model():
+    """Unload a model that no role is using: {"name": ...}."""
+    name = (request.get_json(silent=True) or {}).get('name')
+    if not model_pool.unload(name):
+        return jsonify({"error": f"{name} is not loaded or is still assigned to a role"}), 409
+    return jsonify({"status": "unloaded", "name": name})
+
+@app.route('/dispatch-stats')
+def dispatch_stats():
+    """Return dispatcher queue depth, counters and dispatch latency (backpressure)."""
+    return jsonify(llm_dispatcher.stats())
+
+@app.route('/remote-streams')
+def remote_streams_status():
+    """List active remote audio streams and their ingest/decode counters."""
+    with remote_streams_lock:
+        streams = [stream.stats() for stream, _dispatcher in remote_streams.values()]
+    return jsonify({"max_streams": MAX_REMOTE_STREAMS, "streams": streams})
+
+def _remote_final_transcribe(audio_data):
+    return run_model_transcribe(audio_data, final_pass=True)
+
+def _remote_room(sid, stream_id):
+    """Socket.IO room for one client's stream; keyed by sid so equal stream_ids never share transcripts."""
+    return f"{sid}:{stream_id}"
+
+def _stop_remote_stream(sid):
+    with remote_streams_lock:
+        entry = remote_streams.pop(sid, None)
+    if entry:
+        stream, dispatcher = entry
+        stream.stop()
+        dispatcher.stop()
+        leave_room(_remote_room(sid, stream.stream_id), sid=sid, namespace=REMOTE_AUDIO_NAMESPACE)
+        print(f"[REMOTE] Stream '{stream.stream_id}' closed ({stream.bytes_received} bytes received)")
+
+@socketio.on('start_stream', namespace=REMOTE_AUDIO_NAMESPACE)
+def handle_start_stream(data=None):
+    """Open a remote stream: {"stream_id": "kitchen", "sample_rate": 16000}. Audio follows as binary 'audio' events."""
+    data = data or {}
+    sid = request.sid
+    try:
+        sample_rate = int(data.get('sample_rate', SAMPLE_RATE))
+    except (TypeError, ValueError):
+        sample_rate = None
+    if sample_rate != SAMPLE_RATE:
+        emit('stream_error', {'error': f'sample_rate must be {SAMPLE_RATE} (PCM16 mono)'})
+        return
+    stream_id = str(data.get('stream_id') or sid)
+    room = _remote_room(sid, stream_id)
+
+    _stop_remote_stream(sid)
+    with remote_streams_lock:
+        # stream_id tags utterances sent to the LLM, so two live streams must not share one
+        if any(other.stream_id == stream_id for other, _dispatcher in remote_streams.values()):
+            emit('stream_error', {'error': f"stream_id '{stream_id}' is already streaming"})
+            return
+        if len(remote_streams) >= MAX_REMOTE_STREAMS:
+            emit('stream_error', {'error': f'server is at its limit of {MAX_REMOTE_STREAMS} remote streams'})
+            return
+        # Each room gets its own dispatcher so stale-drop never discards another room's utterance
+        dispatcher = LlmDispatcher(
+            lambda text, request_id: dispatch_utterance(text, request_id, stream_id=stream_id),
+            maxsize=LLM_DISPATCH_QUEUE_SIZE,
+            max_retries=LLM_DISPATCH_MAX_RETRIES,
+            retry_on=(requests.exceptions.ConnectionError,),
+            timeout_errors=(requests.exceptions.Timeout,),
+            on_dequeue=_log_dispatch_dequeued,
+        )
+        stream = RemoteStream(
+            stream_id,
+            run_model_transcribe,
+            emit_fn=lambda event, payload: socketio.emit(event, payload, to=room, namespace=REMOTE_AUDIO_NAMESPACE),
+            on_final=lambda text, _stream: dispatcher.submit(
+                text, generate_request_id() if LATENCY_TRACKING_ENABLED else None),
+            final_transcribe_fn=_remote_final_transcribe if TWO_PASS_MODE and model_pool.get("final") is not None else None,
+            sample_rate=SAMPLE_RATE,
+            buffer_seconds=BUFFER_DURATION_SECONDS,
+            window_seconds=STREAMING_WINDOW_SECONDS,
+            end_silence_ms=VAD_END_SILENCE_MS,
+            preroll_seconds=VAD_PREROLL_SECONDS,
+        )
+        remote_streams[sid] = (stream, dispatcher)
+    join_room(room)
+    dispatcher.start()
+    stream.start()
+    print(f"[REMOTE] Stream '{stream_id}' started")
+    emit('stream_started', {'stream_id': stream_id, 'sample_rate': SAMPLE_RATE})
+
+@socketio.on('audio', namespace=REMOTE_AUDIO_NAMESPACE)
+def handle_remote_audio(data):
+    """Binary PCM16 frame from a remote client - written straight into that stream's ring buffer."""
+    entry = remote_streams.get(request.sid)
+    if entry is not None and isinstance(data, (bytes, bytearray, memoryview)):
+        entry[0].write(data)
+
+@socketio.on('stop_stream', namespace=REMOTE_AUDIO_NAMESPACE)
+def handle_stop_stream(data=None):
+    _stop_remote_stream(request.sid)
+
+@socketio.on('disconnect', namespace=REMOTE_AUDIO_NAMESPACE)
+def handle_remote_disconnect():
+    _stop_remote_stream(request.sid)
 
 @app.route('/pause-listening', methods=['POST'])
 def pause_listening():
@@ -412,13 +816,11 @@ def pause_listening():
     with synthesis_lock:
         already_paused = is_speech_synthesis_active
         is_speech_synthesis_active = True
-        # Clear audio_queue to prevent processing old audio chunks that could cause echo
-        queue_cleared_count = 0
-        while not audio_queue.empty():
-            audio_queue.get()
-            queue_cleared_count += 1
-        if queue_cleared_count > 0:
-            print(f">>> [PAUSE] Cleared {queue_cleared_count} audio chunks from queue to prevent echo")
+    # Drop buffered audio to prevent processing old samples that could cause echo (O(1))
+    cleared_samples = len(audio_ring)
+    audio_ring.clear()
+    if cleared_samples > 0:
+        print(f">>> [PAUSE] Cleared {cleared_samples} buffered audio samples to prevent echo")
     
     if already_paused:
         print(">>> [PAUSE] Already paused (auto-paused after finalization)")
@@ -442,20 +844,32 @@ def resume_listening():
     sys.stdout.flush()
     return jsonify({"status": "listening resumed"})
 
-def start_transcription_service(model_size, gpu_device=0):
-    """Start all the transcription service threads."""
+def start_transcription_service(model_size, gpu_device=0, final_model_size=None, replay_paths=None, replay_speed=1.0):
+    """Start all the transcription service threads (microphone capture, or file replay when replay_paths is set)."""
     import sys
     # Initialize the model
     initialize_model(model_size, gpu_device)
+    if final_model_size:
+        initialize_model(final_model_size, gpu_device, final_pass=True)
+    if STANDBY_CPU_MODEL:
+        start_standby_model()
     
     # Start audio recording in a background thread
     print("[DEBUG] Starting audio recording thread...")
     sys.stdout.flush()
-    audio_thread = threading.Thread(target=record_audio, daemon=True)
+    if replay_paths:
+        audio_thread = threading.Thread(target=replay_audio, args=(replay_paths, replay_speed), daemon=True)
+    else:
+        audio_thread = threading.Thread(target=record_audio, daemon=True)
     audio_thread.start()
     print(f"[DEBUG] Audio thread started: {audio_thread.is_alive()}")
     sys.stdout.flush()
     
+    # Start the utterance dispatcher so transcription never blocks on the LLM round trip
+    llm_dispatcher.start()
+    if ai_mode and PREFETCH_ENABLED:
+        partial_prefetcher.start()
+
     # Start transcription in a background thread
     print("[DEBUG] Starting transcription thread...")
     sys.stdout.flush()
@@ -469,8 +883,48 @@ def start_transcription_service(model_size, gpu_device=0):
 def clear_transcripts():
     transcript_manager.clear_all()
     # Emit empty data to clear the display on the client-side
-    socketio.emit('new_live_transcript', {'data': ''})
-    socketio.emit('new_final_transcript', {'data': []})
+    publish_transcript_event(socketio, 'clear')
+
+def dispatch_utterance(text, request_id=None, stream_id=None):
+    """Dispatcher worker target: send a finalized utterance to the LLM or TTS server."""
+    if ai_mode:
+        print(f"[AI] Sending to LLM: {text} [request_id={request_id}]")
+        send_to_llm_preprocessor(text, request_id, raise_errors=True, stream_id=stream_id)
+    else:
+        print(f"[TTS] Sending to TTS: {text}")
+        send_to_tts_server(text)
+
+def _log_dispatch_dequeued(request_id, queue_wait):
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "stt", Events.STT_DISPATCH_DEQUEUED,
+                   {"queue_wait_ms": round(queue_wait * 1000, 2)})
+
+llm_dispatcher = LlmDispatcher(
+    dispatch_utterance,
+    maxsize=LLM_DISPATCH_QUEUE_SIZE,
+    max_retries=LLM_DISPATCH_MAX_RETRIES,
+    retry_on=(requests.exceptions.ConnectionError,),
+    timeout_errors=(requests.exceptions.Timeout,),
+    on_dequeue=_log_dispatch_dequeued,
+)
+
+def send_prefetch_partial(text):
+    """Post a partial transcript to the v34 prefetch endpoint (best effort, short timeout)."""
+    try:
+        http_session.post(
+            PREFETCH_ENDPOINT,
+            headers={"Content-Type": "application/json"},
+            data=json.dumps({"text": text}),
+            timeout=1.0,
+        )
+    except requests.exceptions.RequestException as e:
+        print(f"[PREFETCH] Could not reach prefetch endpoint: {e}")
+
+partial_prefetcher = PartialPrefetcher(
+    send_prefetch_partial,
+    interval=PREFETCH_INTERVAL_SECONDS,
+    min_words=PREFETCH_MIN_WORDS,
+)
 
 def send_to_tts_server(text):
     """Sends finalized transcript text to the TTS server to be spoken."""
@@ -483,14 +937,18 @@ def send_to_tts_server(text):
     except requests.exceptions.RequestException as e:
         print(f"Error sending to TTS server: {e}")
 
-def send_to_llm_preprocessor(text, request_id=None):
+def send_to_llm_preprocessor(text, request_id=None, raise_errors=False, stream_id=None):
     """
     Send finalized transcript text to the LLM preprocessor endpoint.
+    With raise_errors=True, timeouts and connection errors are re-raised so the
+    dispatcher can count and retry them. stream_id identifies remote audio streams.
     """
     try:
         payload = {"text": text}
         if request_id:
             payload["request_id"] = request_id
+        if stream_id:
+            payload["stream_id"] = stream_id
             
         if LATENCY_TRACKING_ENABLED and request_id:
             log_timing(request_id, "stt", Events.STT_SENDING_TO_V34, 
@@ -506,7 +964,7 @@ def send_to_llm_preprocessor(text, request_id=None):
             LLM_ENDPOINT,
             headers={"Content-Type": "application/json"},
             data=json.dumps(payload),
-            timeout=30  # Increased timeout for LLM preprocessing (classification + retrieval + generation)
+            timeout=LLM_TIMEOUT  # Increased timeout for LLM preprocessing (classification + retrieval + generation)
         )
         response.raise_for_status()
         
@@ -520,10 +978,14 @@ def send_to_llm_preprocessor(text, request_id=None):
         return result
     except requests.exceptions.Timeout:
         print("[TIMEOUT] LLM preprocessor timeout (taking too long)")
+        if raise_errors:
+            raise
         return None
     except requests.exceptions.ConnectionError as e:
         print(f"[CONNECTION ERROR] Cannot connect to preprocessor: {e}")
         print(f"   Make sure preprocessor is running: Check localhost:5000")
+        if raise_errors:
+            raise
         return None
     except requests.exceptions.RequestException as e:
         print(f"[ERROR] Error sending to LLM preprocessor: {e}")
@@ -561,14 +1023,48 @@ if __name__ == "__main__":
                         help="GPU device index to use (0 for first GPU, RTX 3060)")
     parser.add_argument("--ai", action="store_true", 
                         help="Send transcripts to LLM endpoint instead of TTS server")
+    parser.add_argument("--streaming", action=argparse.BooleanOptionalAction, default=STREAMING_MODE,
+                        help="Incremental tail-window decoding with LocalAgreement commits (--no-streaming re-decodes the full buffer)")
+    parser.add_argument("--two-pass", action="store_true",
+                        help="Use --live-model for partials and run --final-model once per finalized utterance")
+    parser.add_argument("--live-model", type=str, default=LIVE_STT_MODEL,
+                        help=f"Two-pass mode: model for live partials (default: {LIVE_STT_MODEL})")
+    parser.add_argument("--final-model", type=str, default=FINAL_STT_MODEL,
+                        help=f"Two-pass mode: model for the final pass (default: {FINAL_STT_MODEL})")
+    parser.add_argument("--endpointing", choices=["vad", "text"], default=ENDPOINTING_MODE,
+                        help="End-of-turn detection: acoustic frame VAD or the transcript-unchanged pause heuristic")
+    parser.add_argument("--standby", action=argparse.BooleanOptionalAction, default=STANDBY_CPU_MODEL,
+                        help="Keep warm int8 CPU copies of the live and final models for instant CUDA failover")
+    parser.add_argument("--prefetch", action=argparse.BooleanOptionalAction, default=PREFETCH_ENABLED,
+                        help="In --ai mode, send debounced partial transcripts to the v34 prefetch endpoint")
+    parser.add_argument("--replay", nargs="+", metavar="FILE",
+                        help="Feed WAV/FLAC files into the pipeline instead of the microphone")
+    parser.add_argument("--replay-speed", type=float, default=1.0,
+                        help="Replay speed: 1.0 = real time, 0 = as fast as transcription keeps up")
+    parser.add_argument("--compute-type", type=str, default=None,
+                        help=f"CTranslate2 compute type for GPU models (default: {GPU_COMPUTE_TYPE})")
+    parser.add_argument("--cpu-compute-type", type=str, default=None,
+                        help=f"CTranslate2 compute type for CPU models, fallback and standby (default: {CPU_COMPUTE_TYPE}; CPU has no float16)")
     
     args = parser.parse_args()
     
     # Set global language and AI mode
     language = args.lang
     ai_mode = args.ai
+    STREAMING_MODE = args.streaming
+    ENDPOINTING_MODE = args.endpointing
+    TWO_PASS_MODE = args.two_pass
+    PREFETCH_ENABLED = args.prefetch
+    STANDBY_CPU_MODEL = args.standby
+    if args.compute_type:
+        GPU_COMPUTE_TYPE = args.compute_type
+    if args.cpu_compute_type:
+        CPU_COMPUTE_TYPE = args.cpu_compute_type
     
-    print(f"Starting faster-whisper transcription service with model: {args.model}")
+    if TWO_PASS_MODE:
+        print(f"Starting faster-whisper transcription service in two-pass mode: live={args.live_model}, final={args.final_model}")
+    else:
+        print(f"Starting faster-whisper transcription service with model: {args.model}")
     print("This may take a moment to initialize on GPU...")
     
     if ai_mode:
@@ -577,7 +1073,12 @@ if __name__ == "__main__":
         print(f"[TTS Mode] Transcripts will be sent to TTS server: {TTS_SERVER_URL}")
     
     # Start transcription in background
-    threads = start_transcription_service(args.model, args.gpu_device)
+    if TWO_PASS_MODE:
+        threads = start_transcription_service(args.live_model, args.gpu_device, final_model_size=args.final_model,
+                                              replay_paths=args.replay, replay_speed=args.replay_speed)
+    else:
+        threads = start_transcription_service(args.model, args.gpu_device,
+                                              replay_paths=args.replay, replay_speed=args.replay_speed)
     
     # Add a filter to the logger to hide the noisy /transcript polling
     log = logging.getLogger('werkzeug')
@@ -0,0 +1,57 @@
+# transcript_bus.py
+# Publish/subscribe bus for transcript changes in timmy_hears.
+# Every change is published once as a small sequence-numbered delta
+# ("partial" updated, "final" segment appended/replaced, "clear"). Subscribers
+# block on a condition variable instead of polling, and a bounded replay log
+# lets a reconnecting client resume from the last sequence number it saw.
+
+import threading
+import time
+from collections import deque
+
+
+class TranscriptBus:
+    """
+    Sequence-numbered transcript deltas with a bounded replay log.
+
+    Sequence numbers start at 1 and increase by one per event. A subscriber that
+    asks for events after a sequence number older than the replay log, or newer
+    than the bus (after a server restart), gets gap=True and should re-sync from a
+    snapshot (GET /transcript).
+    """
+
+    def __init__(self, history=500):
+        self._cond = threading.Condition()
+        self._log = deque(maxlen=history)
+        self.seq = 0
+
+    def publish(self, event_type, **fields):
+        """Append one delta and wake all waiting subscribers. Returns the event dict."""
+        with self._cond:
+            self.seq += 1
+            event = {"seq": self.seq, "type": event_type, "time": time.time(), **fields}
+            self._log.append(event)
+            self._cond.notify_all()
+        return event
+
+    def events_since(self, seq):
+        """Return (events after seq, gap). gap means some of them were already dropped from the log."""
+        with self._cond:
+            return self._events_since_locked(seq)
+
+    def _events_since_locked(self, seq):
+        if seq == self.seq:
+            return [], False
+        if seq > self.seq:
+            # Client is ahead of us (this server restarted and reset seq): re-sync from a snapshot
+            return [], True
+        oldest = self._log[0]["seq"] if self._log else self.seq + 1
+        gap = seq + 1 < oldest
+        return [e for e in self._log if e["seq"] > seq], gap
+
+    def wait_for_events(self, seq, timeout=None):
+        """Block until an event newer than seq is published (or timeout). Returns (events, gap)."""
+        with self._cond:
+            # seq ahead of the bus returns at once with gap=True rather than waiting for it to catch up
+            self._cond.wait_for(lambda: self.seq != seq, timeout=timeout)
+            return self._events_since_locked(seq)
@@ -18,6 +18,7 @@ class TranscriptManager:
         self.current_text = ""
         self.final_transcripts = deque(maxlen=max_history)
         self.accumulated_text = ""  # Buffer for text accumulated across force-finalize events
+        self.last_finalize_replaced = False  # True if the last finalize_text() rewrote the previous entry
     
     def update_current_text(self, text):
         """
@@ -78,6 +79,7 @@ class TranscriptManager:
         new_text = " ".join(new_text.split())  # Clean up extra whitespace
         new_text_lower = new_text.lower()
 
+        self.last_finalize_replaced = False
         if not self.final_transcripts:
             self.final_transcripts.append(new_text)
             self.current_text = ""
@@ -102,6 +104,7 @@ class TranscriptManager:
             # Replace the last text if the new one is more complete
             if len(new_text) >= len(last_text):
                 self.final_transcripts[-1] = new_text
+            self.last_finalize_replaced = True
             # If the new one is shorter but highly similar, we keep the old one.
             self.current_text = ""
             self.accumulated_text = ""
@@ -110,6 +113,7 @@ class TranscriptManager:
         # If the last text is fully contained in the new one, it's a clear extension
         if last_text_lower in new_text_lower:
             self.final_transcripts[-1] = new_text
+            self.last_finalize_replaced = True
             self.current_text = ""
             self.accumulated_text = ""
             return True
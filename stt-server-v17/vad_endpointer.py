@@ -0,0 +1,112 @@
+# vad_endpointer.py
+# Lightweight frame-level VAD in front of Whisper.
+# Classifies 20 ms frames from energy (against an adaptive noise floor), spectral
+# flatness and zero-crossing rate, and declares end of speech from acoustic
+# silence so a turn can be finalized without waiting for several Whisper passes.
+
+import time
+
+import numpy as np
+
+
+class VadEndpointer:
+    """
+    Incremental speech/silence detector that reads new frames from an AudioRingBuffer.
+
+    process() returns True exactly once per utterance, on the pass where trailing
+    silence after speech first reaches end_silence_ms.
+    """
+
+    def __init__(
+        self,
+        sample_rate=16000,
+        frame_ms=20,
+        start_frames=3,  # consecutive voiced frames needed to declare speech
+        end_silence_ms=400,  # trailing silence that ends an utterance
+        energy_margin_db=9.0,  # frame must be this far above the noise floor
+        min_energy_db=-50.0,  # absolute floor for very quiet rooms
+        max_flatness=0.45,  # speech is tonal; broadband noise is flat (~1.0)
+        max_zcr=0.35,  # fraction of sign changes per sample; hiss is high
+        noise_adapt=0.05,  # EMA rate for the noise floor on non-speech frames
+    ):
+        self.sample_rate = sample_rate
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.start_frames = start_frames
+        self.end_silence_frames = max(1, int(end_silence_ms / frame_ms))
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.max_flatness = max_flatness
+        self.max_zcr = max_zcr
+        self.noise_adapt = noise_adapt
+        self._window = np.hanning(self.frame_samples).astype(np.float32)
+
+        self.position = 0  # absolute ring position of the next unprocessed frame
+        self.noise_floor_db = None
+        self.reset()
+
+    def reset(self):
+        """Forget the current utterance. The noise floor estimate is kept."""
+        self.in_speech = False
+        self.speech_detected = False  # any speech since the last reset
+        self.voiced_run = 0
+        self.silence_run = 0
+        self.speech_start_pos = None
+        self.speech_end_pos = None
+        self.last_speech_time = 0.0
+
+    @property
+    def trailing_silence_ms(self):
+        return self.silence_run * self.frame_ms
+
+    def _frame_features(self, frames):
+        """Vectorized per-frame energy (dB), spectral flatness and zero-crossing rate."""
+        x = frames.astype(np.float32) / 32768.0
+        energy_db = 10.0 * np.log10(np.mean(x * x, axis=1) + 1e-10)
+        signs = np.signbit(x)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+        power = np.abs(np.fft.rfft(x * self._window, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        return energy_db, flatness, zcr
+
+    def process(self, ring):
+        """Classify all complete frames written since the last call. Returns True on end of speech."""
+        start = max(self.position, ring.available_start)
+        n_frames = (ring.write_pos - start) // self.frame_samples
+        if n_frames <= 0:
+            return False
+        end = start + n_frames * self.frame_samples
+        frames = ring.view(start, end).reshape(n_frames, self.frame_samples)
+        self.position = end
+
+        energy_db, flatness, zcr = self._frame_features(frames)
+        if self.noise_floor_db is None:
+            self.noise_floor_db = float(np.min(energy_db))
+
+        ended = False
+        for i in range(n_frames):
+            threshold = max(self.noise_floor_db + self.energy_margin_db, self.min_energy_db)
+            voiced = (
+                energy_db[i] > threshold
+                and flatness[i] < self.max_flatness
+                and zcr[i] < self.max_zcr
+            )
+            if voiced:
+                self.voiced_run += 1
+                self.silence_run = 0
+                if not self.in_speech and self.voiced_run >= self.start_frames:
+                    self.in_speech = True
+                    self.speech_detected = True
+                    self.speech_start_pos = start + (i + 1 - self.voiced_run) * self.frame_samples
+                if self.in_speech:
+                    self.last_speech_time = time.time()
+            else:
+                self.voiced_run = 0
+                self.silence_run += 1
+                # Only adapt the floor on frames that are not speech
+                self.noise_floor_db += self.noise_adapt * (energy_db[i] - self.noise_floor_db)
+                if self.in_speech and self.silence_run >= self.end_silence_frames:
+                    self.in_speech = False
+                    self.speech_end_pos = start + (i + 1 - self.silence_run) * self.frame_samples
+                    ended = True
+        return ended
@@ -0,0 +1,218 @@
+# audio_cache.py
+# Content-addressed cache of synthesized audio for the Piper TTS server.
+# Timmy repeats a lot of short lines (stock quips, indicator phrases, error
+# responses), so rendered sentences are kept as raw int16 PCM keyed by the
+# normalized text plus everything that changes the waveform (model and synthesis
+# parameters). Two tiers: an in-memory LRU of arrays, and an on-disk LRU of raw
+# .pcm files that are memory-mapped on a hit and promoted back into memory.
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+_WHITESPACE_REGEX = re.compile(r"\s+")
+
+# Synthesis parameters that change the rendered waveform
+KEY_SYNTH_ARGS = ("length_scale", "noise_scale", "noise_w", "speaker_id")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace for cache keys.
+
+    Case and punctuation are kept: both can change Piper's phonemization and prosody,
+    so "Hello." and "hello?" are different audio.
+    """
+    return _WHITESPACE_REGEX.sub(" ", text).strip()
+
+
+def model_fingerprint(model_path: Path) -> str:
+    """Identify a voice model by name, size and mtime (cheap, and changes when the file is replaced)."""
+    stat = model_path.stat()
+    return f"{model_path.name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def cache_key(text: str, model_id: str, synth_args: Dict[str, Any]) -> str:
+    params = {name: synth_args.get(name) for name in KEY_SYNTH_ARGS}
+    payload = json.dumps([normalize_text(text), model_id, params], sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    Two-tier LRU of synthesized int16 mono PCM.
+
+    get() checks memory, then disk; a disk hit is read through a read-only memmap and
+    promoted into memory. put() stores in both tiers. Each tier evicts least recently
+    used entries once its byte limit is exceeded. Set disk_dir=None for memory only.
+    """
+
+    def __init__(
+        self,
+        memory_max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str | Path] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024,
+        max_text_chars: int = 200,
+    ):
+        self.memory_max_bytes = memory_max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self.max_text_chars = max_text_chars
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._memory_bytes = 0
+        self._disk: "OrderedDict[str, int]" = OrderedDict()  # key -> file size
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "disk_errors": 0,
+        }
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._load_disk_index()
+
+    def _load_disk_index(self) -> None:
+        # Oldest first, so LRU order survives restarts (hits touch the file's mtime)
+        files = sorted(self.disk_dir.glob("*.pcm"), key=lambda p: p.stat().st_mtime)
+        for path in files:
+            size = path.stat().st_size
+            self._disk[path.stem] = size
+            self._disk_bytes += size
+        self._evict_disk_locked()
+
+    def _path(self, key: str) -> Path:
+        return self.disk_dir / f"{key}.pcm"
+
+    def cacheable(self, text: str) -> bool:
+        """Only short lines are worth caching; long LLM responses are rarely repeated verbatim."""
+        return 0 < len(text) <= self.max_text_chars
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            samples = self._memory.get(key)
+            if samples is not None:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return samples
+            on_disk = key in self._disk
+            if on_disk:
+                self._disk.move_to_end(key)
+
+        if on_disk:
+            samples = self._read_disk(key)
+            if samples is not None:
+                with self._lock:
+                    self.counters["disk_hits"] += 1
+                    self._store_memory_locked(key, samples)
+                return samples
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def _read_disk(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key)
+        try:
+            if path.stat().st_size == 0:
+                return np.zeros(0, dtype=np.int16)
+            mapped = np.memmap(path, dtype=np.int16, mode="r")
+            # Copy out of the mapping so the file can be evicted (Windows won't delete mapped files)
+            samples = np.array(mapped)
+            del mapped
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.counters["disk_errors"] += 1
+                size = self._disk.pop(key, None)
+                if size is not None:
+                    self._disk_bytes -= size
+            return None
+        samples.flags.writeable = False
+        return samples
+
+    def put(self, key: str, samples: np.ndarray) -> None:
+        samples = np.ascontiguousarray(samples, dtype=np.int16).reshape(-1)
+        samples.flags.writeable = False
+        with self._lock:
+            self.counters["stores"] += 1
+            self._store_memory_locked(key, samples)
+            if self.disk_dir is None or key in self._disk:
+                return
+        self._write_disk(key, samples)
+
+    def _store_memory_locked(self, key: str, samples: np.ndarray) -> None:
+        if samples.nbytes > self.memory_max_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= previous.nbytes
+        self._memory[key] = samples
+        self._memory_bytes += samples.nbytes
+        while self._memory_bytes > self.memory_max_bytes and self._memory:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= evicted.nbytes
+            self.counters["memory_evictions"] += 1
+
+    def _write_disk(self, key: str, samples: np.ndarray) -> None:
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(memoryview(samples).cast("B"))
+            os.replace(tmp_path, path)
+        except OSError:
+            with self._lock:
+                self.counters["disk_errors"] += 1
+            return
+        with self._lock:
+            self._disk[key] = samples.nbytes
+            self._disk_bytes += samples.nbytes
+            self._evict_disk_locked()
+
+    def _evict_disk_locked(self) -> None:
+        while self._disk_bytes > self.disk_max_bytes and self._disk:
+            key, size = self._disk.popitem(last=False)
+            self._disk_bytes -= size
+            self.counters["disk_evictions"] += 1
+            try:
+                self._path(key).unlink()
+            except OSError:
+                self.counters["disk_errors"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["memory_hits"] + self.counters["disk_hits"] + self.counters["misses"]
+            hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+            return {
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "memory_max_bytes": self.memory_max_bytes,
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes,
+                "disk_max_bytes": self.disk_max_bytes if self.disk_dir is not None else None,
+                "hit_rate": round(hits / lookups, 4) if lookups else None,
+                **self.counters,
+            }
+
+
+def load_warmup_phrases(path: str | Path) -> list[str]:
+    """One phrase per line; blank lines and # comments are skipped. Missing file -> []."""
+    path = Path(path)
+    if not path.exists():
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith("#")]
@@ -0,0 +1,381 @@
+# audio_output.py
+# Output sinks for the Piper TTS server.
+# The sounddevice sink keeps one long-lived callback-mode OutputStream open for the
+# life of the server and feeds it from a preallocated int16 ring buffer, so speak()
+# never opens/closes a device. WAV and null sinks make playback measurable on a
+# headless machine.
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+import wave
+from pathlib import Path
+from typing import Any, Optional
+
+import numpy as np
+
+try:
+    import sounddevice as sd
+except Exception:
+    sd = None  # only the sounddevice sink needs it
+
+LOGGER = logging.getLogger("timmy_hears_cuda")
+
+
+def chunk_to_int16(chunk: Any) -> Optional[np.ndarray]:
+    """
+    Normalize one Piper synthesis chunk to a 1-D int16 array without intermediate bytes copies.
+
+    piper.voice.AudioChunk exposes audio_int16_array directly; plain ndarrays and raw
+    int16 buffers (bytes/memoryview) are viewed in place. Float audio is converted once.
+    """
+    arr = getattr(chunk, "audio_int16_array", None)
+    if arr is None:
+        if isinstance(chunk, np.ndarray):
+            arr = chunk
+        elif isinstance(chunk, (bytes, bytearray, memoryview)):
+            arr = np.frombuffer(chunk, dtype=np.int16)
+        else:
+            return None
+    if arr.dtype != np.int16:
+        arr = (np.clip(arr, -1.0, 1.0) * 32767.0).astype(np.int16)
+    arr = arr.reshape(-1)
+    return arr if arr.size else None
+
+
+class Int16RingBuffer:
+    """
+    Preallocated single-producer/single-consumer int16 ring buffer.
+
+    write() blocks while the buffer is full; read_into() never blocks and zero-fills
+    whatever it cannot supply, so it is safe to call from an audio callback.
+    Positions are absolute sample counts: the writer owns write_pos, the reader read_pos.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity, dtype=np.int16)
+        self.write_pos = 0
+        self.read_pos = 0
+        self.underrun_samples = 0
+        self._space = threading.Event()
+
+    def available(self) -> int:
+        return self.write_pos - self.read_pos
+
+    def write(self, samples: np.ndarray, timeout: Optional[float] = None) -> bool:
+        """Copy samples in, blocking while full. Returns False if timeout expired first (rest dropped)."""
+        offset = 0
+        total = len(samples)
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        while offset < total:
+            space = self.capacity - (self.write_pos - self.read_pos)
+            if space <= 0:
+                if deadline is not None and time.perf_counter() > deadline:
+                    return False
+                self._space.clear()
+                if self.capacity - (self.write_pos - self.read_pos) <= 0:
+                    self._space.wait(0.05)
+                continue
+            n = min(space, total - offset)
+            pos = self.write_pos % self.capacity
+            first = min(n, self.capacity - pos)
+            self._data[pos:pos + first] = samples[offset:offset + first]
+            if n > first:
+                self._data[:n - first] = samples[offset + first:offset + n]
+            offset += n
+            # Publish after the samples are in place
+            self.write_pos += n
+        return True
+
+    def read_into(self, out: np.ndarray, count_underrun: bool = False) -> int:
+        """Fill out (1-D int16) from the buffer; zero-fill the rest. Returns samples supplied."""
+        frames = len(out)
+        n = min(self.available(), frames)
+        if n:
+            pos = self.read_pos % self.capacity
+            first = min(n, self.capacity - pos)
+            out[:first] = self._data[pos:pos + first]
+            if n > first:
+                out[first:n] = self._data[:n - first]
+            self.read_pos += n
+            self._space.set()
+        if n < frames:
+            out[n:] = 0
+            if count_underrun:
+                self.underrun_samples += frames - n
+        return n
+
+    def clear(self) -> None:
+        """Drop unplayed audio (reader side)."""
+        self.read_pos = self.write_pos
+        self._space.set()
+
+
+class AudioSink:
+    """Where synthesized int16 audio goes. write() may block to apply backpressure."""
+
+    name = "base"
+
+    def start(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+
+    def write(self, samples: np.ndarray) -> None:
+        raise NotImplementedError
+
+    # Time from the ring emptying to the last sample leaving the device, for the last drain
+    last_drain_tail_seconds = 0.0
+    # Times the device ran dry mid-utterance and played silence (running total)
+    underruns = 0
+
+    def wait_until_drained(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything written has actually been played (or written out)."""
+        return True
+
+    def pending_seconds(self) -> float:
+        """How long until a sample written now is heard (queued audio + device latency)."""
+        return 0.0
+
+    def stats(self) -> dict:
+        return {"sink": self.name}
+
+    def close(self) -> None:
+        pass
+
+
+class SoundDeviceSink(AudioSink):
+    """Persistent callback-mode sounddevice output fed from an Int16RingBuffer."""
+
+    name = "sounddevice"
+    # Extra time allowed past the expected playout before the device is declared stalled
+    stall_margin_seconds = 1.0
+
+    def __init__(self, device: Any = None, blocksize: Optional[int] = None, buffer_seconds: float = 2.0):
+        if sd is None:
+            raise RuntimeError("sounddevice is required for the sounddevice sink. Install in your venv: pip install sounddevice")
+        self.device = device
+        self.blocksize = blocksize
+        self.buffer_seconds = buffer_seconds
+        self.ring: Optional[Int16RingBuffer] = None
+        self.stream = None
+        self.sample_rate = None
+        self._active = False  # an utterance is playing; gaps count as underruns
+        self.underruns = 0
+        self.callback_status_errors = 0
+        # Completion signalling, written by the audio callback
+        self.played_pos = 0  # ring position the device has consumed up to
+        self._last_sample_out = 0.0  # perf_counter time the last consumed sample leaves the DAC
+        self._progress = threading.Event()
+        self.nominal_latency_seconds = 0.0
+        self.output_latency_seconds = None  # measured from callback timestamps
+        self.latency_fallbacks = 0  # callbacks whose host API gave no usable timestamps
+        self.stalls = 0  # writes/drains abandoned because the callback stopped consuming
+
+    def start(self, sample_rate: int) -> None:
+        if self.stream is not None and sample_rate == self.sample_rate:
+            return
+        self.close()
+        self.sample_rate = sample_rate
+        self.ring = Int16RingBuffer(int(self.buffer_seconds * sample_rate))
+        self.stream = sd.OutputStream(
+            samplerate=sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.blocksize or max(128, sample_rate // 20),
+            device=self.device,
+            callback=self._callback,
+        )
+        self.stream.start()
+        self.nominal_latency_seconds = float(self.stream.latency or 0.0)
+        self.played_pos = 0
+
+    def _callback(self, outdata, frames, time_info, status) -> None:
+        if status:
+            self.callback_status_errors += 1
+        active = self._active
+        n = self.ring.read_into(outdata[:, 0], count_underrun=active)
+        if active and n < frames:
+            self.underruns += 1
+        if n:
+            # When this block starts playing, per the host API's own clock. Some host
+            # APIs (e.g. MME) report zeros, so fall back to the nominal stream latency.
+            latency = time_info.outputBufferDacTime - time_info.currentTime
+            if time_info.currentTime > 0 and 0 <= latency < 1.0:
+                self.output_latency_seconds = latency
+            else:
+                latency = self.nominal_latency_seconds
+                self.latency_fallbacks += 1
+            self._last_sample_out = time.perf_counter() + latency + n / self.sample_rate
+            self.played_pos = self.ring.read_pos
+            self._progress.set()
+
+    def _stream_active(self) -> bool:
+        return self.stream is not None and bool(getattr(self.stream, "active", True))
+
+    def _stalled(self, where: str) -> None:
+        """The callback stopped consuming (device error, unplugged, stream closed): drop the audio."""
+        self.stalls += 1
+        LOGGER.warning(f"Audio output stalled during {where}; dropping {self.ring.available()} buffered samples")
+        self.ring.clear()
+        self.played_pos = self.ring.read_pos
+        self._active = False
+
+    def write(self, samples: np.ndarray) -> None:
+        if not self._stream_active():
+            self._stalled("write")
+            return
+        # A full ring drains in buffer_seconds at most while the callback is running
+        if not self.ring.write(samples, timeout=self.buffer_seconds + self.stall_margin_seconds):
+            self._stalled("write")
+            return
+        # Set after the samples are queued so the callback never sees an empty ring as a gap
+        self._active = True
+
+    def wait_until_drained(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the callback to consume everything written so far, then until the last
+        sample has left the device (block playout + measured output latency).
+
+        By default waits at most the expected playout time plus stall_margin_seconds. If
+        the stream stops or the deadline passes, the buffered audio is dropped and False
+        is returned, so a dead device can't hold the caller (and STT's pause) forever.
+        """
+        # Nothing more is coming; the ring running out from here on is the end, not an underrun
+        self._active = False
+        if self.ring is None:
+            return True
+        target = self.ring.write_pos
+        if timeout is None:
+            timeout = self.pending_seconds() + self.stall_margin_seconds
+        deadline = time.perf_counter() + timeout
+        while self.played_pos < target:
+            if not self._stream_active() or time.perf_counter() > deadline:
+                self._stalled("drain")
+                return False
+            self._progress.wait(0.05)
+            self._progress.clear()
+        tail = self._last_sample_out - time.perf_counter()
+        if tail > 0:
+            time.sleep(tail)
+        self.last_drain_tail_seconds = max(tail, 0.0)
+        return True
+
+    def pending_seconds(self) -> float:
+        if self.ring is None:
+            return 0.0
+        latency = self.output_latency_seconds if self.output_latency_seconds is not None else self.nominal_latency_seconds
+        return self.ring.available() / self.sample_rate + latency
+
+    def stats(self) -> dict:
+        return {
+            "sink": self.name,
+            "sample_rate": self.sample_rate,
+            "buffered_samples": self.ring.available() if self.ring else 0,
+            "underruns": self.underruns,
+            "underrun_samples": self.ring.underrun_samples if self.ring else 0,
+            "callback_status_errors": self.callback_status_errors,
+            "nominal_latency_seconds": self.nominal_latency_seconds,
+            "output_latency_seconds": self.output_latency_seconds,
+            "latency_fallbacks": self.latency_fallbacks,
+            "stalls": self.stalls,
+            "last_drain_tail_seconds": round(self.last_drain_tail_seconds, 4),
+        }
+
+    def close(self) -> None:
+        if self.stream is not None:
+            try:
+                self.stream.stop()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+
+
+class WavFileSink(AudioSink):
+    """Append all synthesized audio to one WAV file (headless runs, listening tests)."""
+
+    name = "wav"
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._wav = None
+        self._lock = threading.Lock()
+        self.samples_written = 0
+
+    def start(self, sample_rate: int) -> None:
+        self.close()
+        self.sample_rate = sample_rate
+        self._wav = wave.open(str(self.path), "wb")
+        self._wav.setnchannels(1)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sample_rate)
+
+    def write(self, samples: np.ndarray) -> None:
+        with self._lock:
+            self._wav.writeframes(memoryview(np.ascontiguousarray(samples)).cast("B"))
+            self.samples_written += len(samples)
+
+    def stats(self) -> dict:
+        return {"sink": self.name, "path": str(self.path), "samples_written": self.samples_written}
+
+    def close(self) -> None:
+        with self._lock:
+            if self._wav is not None:
+                self._wav.close()
+                self._wav = None
+
+
+class NullSink(AudioSink):
+    """Discard audio. With realtime=True, write() sleeps for the audio duration like a real device."""
+
+    name = "null"
+
+    def __init__(self, realtime: bool = False):
+        self.realtime = realtime
+        self.samples_written = 0
+        self.underruns = 0
+        self._play_until = 0.0
+        self._active = False
+
+    def write(self, samples: np.ndarray) -> None:
+        self.samples_written += len(samples)
+        if self.realtime:
+            now = time.perf_counter()
+            if self._active and now > self._play_until:
+                # The simulated device finished everything queued before this arrived
+                self.underruns += 1
+            self._active = True
+            self._play_until = max(self._play_until, now) + len(samples) / self.sample_rate
+            # Keep at most ~100 ms queued, like a device buffer
+            ahead = self._play_until - now - 0.1
+            if ahead > 0:
+                time.sleep(ahead)
+
+    def wait_until_drained(self, timeout: Optional[float] = None) -> bool:
+        self._active = False
+        if self.realtime:
+            remaining = self._play_until - time.perf_counter()
+            if remaining > 0:
+                time.sleep(remaining if timeout is None else min(remaining, timeout))
+            self.last_drain_tail_seconds = max(remaining, 0.0)
+        return True
+
+    def pending_seconds(self) -> float:
+        return max(0.0, self._play_until - time.perf_counter()) if self.realtime else 0.0
+
+    def stats(self) -> dict:
+        return {"sink": self.name, "realtime": self.realtime, "samples_written": self.samples_written,
+                "underruns": self.underruns}
+
+
+def make_sink(kind: str, wav_path: Optional[str] = None, realtime: bool = False, device: Any = None) -> AudioSink:
+    """Build a sink from a CLI name: 'sounddevice', 'wav' or 'null'."""
+    if kind == "sounddevice":
+        return SoundDeviceSink(device=device)
+    if kind == "wav":
+        return WavFileSink(wav_path or "tts_output.wav")
+    if kind == "null":
+        return NullSink(realtime=realtime)
+    raise ValueError(f"Unknown sink: {kind}")
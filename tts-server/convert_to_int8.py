@@ -0,0 +1,33 @@
+
+import sys
+from pathlib import Path
+
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+
+def main() -> int:
+    if len(sys.argv) != 3:
+        print("Usage: python convert_to_int8.py <src.onnx> <dst.onnx>")
+        return 2
+
+    src_path = Path(sys.argv[1])
+    dst_path = Path(sys.argv[2])
+
+    if not src_path.exists():
+        print(f"Source not found: {src_path}")
+        return 1
+
+    # Dynamic quantization: int8 weights, activations quantized at run time.
+    # Needs no calibration data and mainly speeds up MatMul-heavy parts on CPU.
+    quantize_dynamic(
+        str(src_path),
+        str(dst_path),
+        weight_type=QuantType.QInt8,
+        op_types_to_quantize=["MatMul", "Gemm"],
+    )
+    print(f"Wrote {dst_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,208 @@
+# jaw_envelope.py
+# Host-side jaw-openness envelope for Timmy's servo jaw.
+# NumPy port of esp32_phoneme_to_jaw_openness/audio_analyzer_and_servo_test_v3_WORKS:
+# 16 ms frames -> Hamming window -> FFT -> strongest peak in the F1 band
+# (300-900 Hz) -> vowel table lookup -> 0-100 openness -> exponential smoothing.
+# It runs on the synthesized PCM before it is played, and JawStreamer sends each
+# frame to the motor controller at the moment that frame leaves the speaker, so
+# the jaw no longer depends on the MCU's ADC timing or its own analysis.
+
+from __future__ import annotations
+
+import heapq
+import json
+import logging
+import socket
+import threading
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+LOGGER = logging.getLogger("timmy_hears_cuda")
+
+FRAME_SECONDS = 0.016  # measureDuration in the sketch (one 128-sample FFT at 8 kHz)
+F1_BAND_HZ = (300.0, 900.0)
+MIN_RMS = 0.02  # Full-scale units; the sketch gated at 0.05 V of a 3.3 V ADC swing
+SMOOTHING = 0.60  # smoothed = 0.60 * smoothed + 0.40 * openness
+
+# (min Hz, max Hz, openness %) - the active table from mapOpenness(). Measured on
+# Timmy's voice: see/moon/say/fear ~30, set/saw 50, cat/cup 60, car/hot 80, father 90.
+OPENNESS_TABLE = np.array([
+    (300, 380, 30), (400, 550, 30), (304, 398, 30),
+    (562, 648, 30), (625, 765, 50), (734, 804, 60),
+    (859, 898, 90), (804, 875, 80), (781, 898, 80),
+    (726, 804, 60), (757, 859, 50), (351, 585, 40),
+    (523, 671, 50), (312, 512, 20),
+], dtype=np.float64)
+
+
+def f1_peaks(frames: np.ndarray, sample_rate: int, interpolate: bool = True) -> np.ndarray:
+    """
+    Strongest F1-band frequency per frame (rows of float samples); 0 where the frame is
+    below MIN_RMS. With interpolate=True the peak is refined between FFT bins (parabolic
+    fit on log magnitude) instead of snapping to the ~62 Hz bin grid the MCU used.
+    """
+    frame_len = frames.shape[1]
+    frames = frames - frames.mean(axis=1, keepdims=True)  # DC removal (the sketch's running average)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    spectrum = np.abs(np.fft.rfft(frames * np.hamming(frame_len), axis=1))
+
+    bin_width = sample_rate / frame_len
+    lower = int(np.ceil(F1_BAND_HZ[0] / bin_width))
+    upper = int(np.floor(F1_BAND_HZ[1] / bin_width))
+    band = spectrum[:, lower:upper + 1]
+    peak = np.argmax(band, axis=1)
+    bins = (peak + lower).astype(np.float64)
+
+    if interpolate:
+        rows = np.arange(len(frames))
+        inner = (peak > 0) & (peak < band.shape[1] - 1)
+        left = np.log(band[rows, np.clip(peak - 1, 0, None)] + 1e-12)
+        center = np.log(band[rows, peak] + 1e-12)
+        right = np.log(band[rows, np.clip(peak + 1, None, band.shape[1] - 1)] + 1e-12)
+        denom = left - 2 * center + right
+        safe = np.where(denom == 0, 1.0, denom)
+        offset = np.where(inner & (denom != 0), 0.5 * (left - right) / safe, 0.0)
+        bins += np.clip(offset, -0.5, 0.5)
+
+    return np.where(rms < MIN_RMS, 0.0, bins * bin_width)
+
+
+def map_openness(f1: np.ndarray) -> np.ndarray:
+    """mapOpenness() for a vector of F1 frequencies: nearest-centre matching table range, else 0."""
+    f = f1[:, None]
+    lows, highs, values = OPENNESS_TABLE[:, 0], OPENNESS_TABLE[:, 1], OPENNESS_TABLE[:, 2]
+    in_range = (f >= lows) & (f <= highs)
+    distance = np.where(in_range, np.abs(f - 0.5 * (lows + highs)), np.inf)
+    best = np.argmin(distance, axis=1)  # first minimum, like the sketch's strict '<'
+    return np.where(np.isfinite(distance.min(axis=1)), values[best], 0.0)
+
+
+class JawAnalyzer:
+    """
+    Streaming envelope generator. feed() accepts int16 chunks of any size, carries the
+    partial frame and smoothing state across chunks, and returns one openness value per
+    completed frame along with that frame's sample offset from the start of the utterance.
+    """
+
+    def __init__(self, sample_rate: int, interpolate: bool = True) -> None:
+        self.sample_rate = sample_rate
+        self.interpolate = interpolate
+        self.frame_len = max(16, int(round(sample_rate * FRAME_SECONDS)))
+        self.reset()
+
+    def reset(self) -> None:
+        self._carry = np.zeros(0, dtype=np.float32)
+        self._position = 0  # utterance sample offset of _carry[0]
+        self._smoothed = 0.0
+        self.samples_fed = 0
+
+    def feed(self, samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        self.samples_fed += len(samples)
+        audio = np.concatenate([self._carry, samples.astype(np.float32) / 32768.0])
+        n_frames = len(audio) // self.frame_len
+        offsets = self._position + np.arange(n_frames) * self.frame_len
+        if n_frames == 0:
+            self._carry = audio
+            return offsets, np.zeros(0)
+
+        used = n_frames * self.frame_len
+        frames = audio[:used].reshape(n_frames, self.frame_len)
+        raw = map_openness(f1_peaks(frames, self.sample_rate, self.interpolate))
+        # The recurrence is inherently sequential, but it is one step per 16 ms frame
+        smoothed = np.empty(n_frames)
+        state = self._smoothed
+        for i, value in enumerate(raw):
+            state = SMOOTHING * state + (1.0 - SMOOTHING) * value
+            smoothed[i] = state
+        self._smoothed = state
+
+        self._carry = audio[used:]
+        self._position += used
+        return offsets, smoothed
+
+
+class JawStreamer:
+    """
+    Sends the envelope to the motor controller as UDP datagrams, each at the moment its
+    frame plays (minus lead_seconds to cover network and servo travel time).
+
+    Datagram: JSON {"jaw": <0-100 int>, "seq": <int>}. The controller maps openness to
+    its servo range (the sketch used 0-100% -> 0-90 degrees).
+    """
+
+    def __init__(self, host: str, port: int, sample_rate: int, lead_seconds: float = 0.05) -> None:
+        self.target = (host, port)
+        self.lead_seconds = lead_seconds
+        self.analyzer = JawAnalyzer(sample_rate)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._schedule: list = []  # heap of (send_at, seq, openness)
+        self._cond = threading.Condition()
+        self._seq = 0
+        self._last_sent: Optional[int] = None
+        self.counters = {"frames": 0, "sent": 0, "late": 0, "send_errors": 0}
+        self.total_late_seconds = 0.0
+        self._thread = threading.Thread(target=self._run, name="jaw-streamer", daemon=True)
+        self._thread.start()
+
+    def feed(self, samples: np.ndarray, play_time: float) -> None:
+        """Analyze a chunk that will start playing at play_time (perf_counter seconds)."""
+        chunk_start = self.analyzer.samples_fed
+        offsets, openness = self.analyzer.feed(samples)
+        if not len(openness):
+            return
+        # Each frame's centre, relative to the chunk's first sample (a frame that began in
+        # the previous chunk's leftover samples gets a slightly earlier time)
+        centres = offsets + self.analyzer.frame_len / 2 - chunk_start
+        self._enqueue(play_time + centres / self.analyzer.sample_rate, openness)
+
+    def _enqueue(self, times: np.ndarray, openness: np.ndarray) -> None:
+        with self._cond:
+            for t, value in zip(times, openness):
+                self._seq += 1
+                heapq.heappush(self._schedule, (float(t) - self.lead_seconds, self._seq, int(round(value))))
+            self.counters["frames"] += len(openness)
+            self._cond.notify()
+
+    def end_utterance(self, play_time: float) -> None:
+        """Close the jaw when the utterance's last sample plays, and reset analysis state."""
+        self.analyzer.reset()
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._schedule, (play_time - self.lead_seconds, self._seq, 0))
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._schedule:
+                    self._cond.wait()
+                send_at, seq, value = self._schedule[0]
+                delay = send_at - time.perf_counter()
+                if delay > 0:
+                    self._cond.wait(delay)
+                    continue  # re-check: an earlier frame may have been queued meanwhile
+                heapq.heappop(self._schedule)
+            late = -delay
+            if late > 0.008:
+                self.counters["late"] += 1
+                self.total_late_seconds += late
+            if value == self._last_sent:
+                continue
+            try:
+                self._sock.sendto(json.dumps({"jaw": value, "seq": seq}).encode("utf-8"), self.target)
+                self.counters["sent"] += 1
+                self._last_sent = value
+            except OSError as e:
+                self.counters["send_errors"] += 1
+                LOGGER.debug(f"Jaw datagram failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "target": f"{self.target[0]}:{self.target[1]}",
+            "lead_seconds": self.lead_seconds,
+            "pending": len(self._schedule),
+            **self.counters,
+            "avg_late_ms": round(self.total_late_seconds / self.counters["late"] * 1000, 2) if self.counters["late"] else 0.0,
+        }
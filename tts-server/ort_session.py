@@ -0,0 +1,124 @@
+# ort_session.py
+# ONNX Runtime session setup for the Piper TTS server.
+# The CUDA path uses PiperVoice.load(use_cuda=True) unchanged. The CPU path swaps
+# in an InferenceSession built with explicit threading, graph optimization and
+# memory-arena settings, optionally on an fp16/int8 variant of the voice model.
+# benchmark_rtf() measures the real-time factor of whatever was configured.
+
+from __future__ import annotations
+
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Optional
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+# Suffixes written by convert_to_fp16.py / convert_to_int8.py next to the fp32 model
+MODEL_VARIANTS = {"fp32": "", "fp16": "_fp16", "int8": "_int8"}
+
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": "ORT_DISABLE_ALL",
+    "basic": "ORT_ENABLE_BASIC",
+    "extended": "ORT_ENABLE_EXTENDED",
+    "all": "ORT_ENABLE_ALL",
+}
+
+# Short, typical Timmy lines for the self-benchmark
+BENCHMARK_SENTENCES = [
+    "Well, well. Look who finally decided to show up.",
+    "I appear to be having trouble speaking. How embarrassing.",
+    "That is, without question, the worst idea you have had all week.",
+]
+
+
+def model_variant_path(model_path: Path, variant: str) -> Path:
+    """models/voice.onnx + 'int8' -> models/voice_int8.onnx"""
+    if variant not in MODEL_VARIANTS:
+        raise ValueError(f"Unknown model variant: {variant}")
+    return model_path.with_name(f"{model_path.stem}{MODEL_VARIANTS[variant]}{model_path.suffix}")
+
+
+def cpu_session_options(
+    intra_op_threads: int = 0,
+    inter_op_threads: int = 0,
+    graph_optimization: str = "all",
+    cpu_mem_arena: bool = True,
+    mem_pattern: bool = True,
+    allow_spinning: bool = True,
+) -> "ort.SessionOptions":
+    """
+    SessionOptions for CPU inference. Thread counts of 0 let onnxruntime choose.
+    inter_op_threads > 1 switches to parallel execution mode (only helps graphs with
+    independent branches). Disabling spinning saves idle CPU at a small latency cost.
+    """
+    if ort is None:
+        raise RuntimeError("onnxruntime is required. Install in your venv: pip install onnxruntime")
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = intra_op_threads
+    opts.inter_op_num_threads = inter_op_threads
+    opts.execution_mode = (
+        ort.ExecutionMode.ORT_PARALLEL if inter_op_threads > 1 else ort.ExecutionMode.ORT_SEQUENTIAL
+    )
+    opts.graph_optimization_level = getattr(ort.GraphOptimizationLevel, GRAPH_OPTIMIZATION_LEVELS[graph_optimization])
+    opts.enable_cpu_mem_arena = cpu_mem_arena
+    opts.enable_mem_pattern = mem_pattern
+    opts.add_session_config_entry("session.intra_op.allow_spinning", "1" if allow_spinning else "0")
+    return opts
+
+
+def load_cpu_session(model_path: Path, options: "ort.SessionOptions") -> "ort.InferenceSession":
+    return ort.InferenceSession(str(model_path), sess_options=options, providers=["CPUExecutionProvider"])
+
+
+def describe_options(options: "ort.SessionOptions") -> Dict[str, Any]:
+    return {
+        "intra_op_threads": options.intra_op_num_threads,
+        "inter_op_threads": options.inter_op_num_threads,
+        "execution_mode": str(options.execution_mode).split(".")[-1],
+        "graph_optimization": str(options.graph_optimization_level).split(".")[-1],
+        "cpu_mem_arena": options.enable_cpu_mem_arena,
+        "mem_pattern": options.enable_mem_pattern,
+    }
+
+
+def benchmark_rtf(
+    synthesize_fn: Callable[[str], Any],
+    sample_rate: int,
+    sentences: Optional[Iterable[str]] = None,
+    runs: int = 3,
+) -> Dict[str, Any]:
+    """
+    Real-time factor = synthesis seconds / audio seconds (lower is better, < 1 keeps up).
+
+    synthesize_fn(text) returns int16 samples. One untimed pass warms up the session
+    (allocations, kernel selection) first, so the numbers reflect steady state.
+    """
+    sentences = list(sentences or BENCHMARK_SENTENCES)
+    for sentence in sentences:
+        synthesize_fn(sentence)
+
+    synth_seconds = 0.0
+    audio_samples = 0
+    first_sentence_ms = []
+    for _ in range(runs):
+        for index, sentence in enumerate(sentences):
+            start = time.perf_counter()
+            samples = synthesize_fn(sentence)
+            elapsed = time.perf_counter() - start
+            synth_seconds += elapsed
+            audio_samples += len(samples)
+            if index == 0:
+                first_sentence_ms.append(elapsed * 1000)
+
+    audio_seconds = audio_samples / sample_rate
+    return {
+        "sentences": len(sentences),
+        "runs": runs,
+        "audio_seconds": round(audio_seconds, 3),
+        "synthesis_seconds": round(synth_seconds, 3),
+        "rtf": round(synth_seconds / audio_seconds, 4) if audio_seconds else None,
+        "first_sentence_ms": round(sum(first_sentence_ms) / len(first_sentence_ms), 1) if first_sentence_ms else None,
+    }
@@ -0,0 +1,244 @@
+# render_batch.py
+# Offline batch rendering with the Piper voice - no HTTP server or speakers needed.
+# Renders a text list (one line per utterance) or JSONL ({"text": ..., "id": ...,
+# optional "length_scale"/"noise_scale"/"noise_w"/"speaker_id"}) across a process
+# pool, each worker holding its own PiperVoice.
+#
+# Usage:
+#   python render_batch.py lines.txt --out renders/
+#   python render_batch.py lines.jsonl --out renders/ --format pcm --workers 4 --device cpu
+#   python render_batch.py cache_warmup.txt --format cache --cache-dir audio_cache
+#
+# Output names are deterministic (<id or line number>_<hash of text + settings>), so
+# re-running skips files that already exist (--no-resume to re-render everything).
+# --format cache writes per-sentence entries straight into the server's audio cache.
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from audio_cache import AudioCache, cache_key, model_fingerprint
+from audio_output import chunk_to_int16
+from ort_session import cpu_session_options, load_cpu_session
+from timmy_speaks_cuda import (
+    DEFAULT_SPEECH_SPEED,
+    PiperVoice,
+    _append_nvidia_dll_dirs_once,
+    optimize_text_for_speed,
+    split_sentences,
+    synthesis_config,
+)
+
+SYNTH_ARG_KEYS = ("length_scale", "noise_scale", "noise_w", "speaker_id", "sentence_silence")
+_NAME_REGEX = re.compile(r"[^\w.-]+")
+
+# Per-process state, set up by _init_worker
+_voice = None
+_sample_rate = 22050
+_model_id = ""
+_cache: Optional[AudioCache] = None
+
+
+def load_jobs(path: Path, defaults: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Read a .jsonl of {"text", ...} objects or a plain text file with one utterance per line."""
+    jobs = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line) if path.suffix == ".jsonl" else {"text": line}
+            synth_args = {**defaults, **{k: entry[k] for k in SYNTH_ARG_KEYS if k in entry}}
+            digest = hashlib.sha1(json.dumps([entry["text"], synth_args], sort_keys=True).encode("utf-8")).hexdigest()[:10]
+            stem = _NAME_REGEX.sub("_", str(entry["id"])) if "id" in entry else f"{line_no:05d}"
+            jobs.append({"name": f"{stem}_{digest}", "text": entry["text"], "synth_args": synth_args})
+    return jobs
+
+
+def _init_worker(model_path: str, config_path: Optional[str], device: str, intra_op_threads: int,
+                 cache_dir: Optional[str]) -> None:
+    global _voice, _sample_rate, _model_id, _cache
+    _append_nvidia_dll_dirs_once()
+    _voice = PiperVoice.load(model_path, config_path=config_path, use_cuda=device == "cuda")
+    if device == "cpu":
+        _voice.session = load_cpu_session(Path(model_path), cpu_session_options(intra_op_threads=intra_op_threads))
+    _sample_rate = int(getattr(_voice.config, "sample_rate", 22050))
+    _model_id = model_fingerprint(Path(model_path))
+    if cache_dir:
+        # Disk tier only; the size limit is enforced by the server when it loads the index
+        _cache = AudioCache(memory_max_bytes=0, disk_dir=cache_dir, disk_max_bytes=sys.maxsize)
+
+
+def _synthesize(text: str, synth_args: Dict[str, Any]) -> np.ndarray:
+    arrays = [a for a in (chunk_to_int16(c) for c in _voice.synthesize(text, synthesis_config(synth_args))) if a is not None]
+    return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int16)
+
+
+def _render(job: Dict[str, Any], out_dir: str, fmt: str, resume: bool = True) -> Dict[str, Any]:
+    """Render one job in a worker. Sentences are synthesized like the server does, so the audio matches."""
+    synth_args = job["synth_args"]
+    sentences = split_sentences(optimize_text_for_speed(job["text"]))
+    silence_seconds = float(synth_args.get("sentence_silence") or 0.0)
+    silence = np.zeros(int(_sample_rate * silence_seconds), dtype=np.int16)
+
+    start = time.perf_counter()
+    pieces = []
+    for index, sentence in enumerate(sentences):
+        if fmt == "cache":
+            # Resume: sentences already in the cache are not re-rendered
+            key = cache_key(sentence, _model_id, synth_args)
+            samples = _cache.get(key) if resume else None
+            if samples is None:
+                samples = _synthesize(sentence, synth_args)
+                if samples.size:
+                    _cache.put(key, samples)
+        else:
+            samples = _synthesize(sentence, synth_args)
+        pieces.append(samples)
+        if silence.size and index < len(sentences) - 1:
+            pieces.append(silence)
+    synth_seconds = time.perf_counter() - start
+    audio = np.concatenate(pieces) if pieces else np.zeros(0, dtype=np.int16)
+
+    if fmt != "cache":
+        path = Path(out_dir) / f"{job['name']}.{fmt}"
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        if fmt == "wav":
+            with wave.open(str(tmp_path), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(_sample_rate)
+                wav.writeframes(audio.tobytes())
+        else:
+            audio.tofile(tmp_path)
+        # Only complete files get the final name, so an interrupted run resumes cleanly
+        os.replace(tmp_path, path)
+
+    return {
+        "name": job["name"],
+        "worker": os.getpid(),
+        "chars": len(job["text"]),
+        "audio_seconds": len(audio) / _sample_rate,
+        "synthesis_seconds": synth_seconds,
+    }
+
+
+def summarize(results: List[Dict[str, Any]], wall_seconds: float, skipped: int, failed: int) -> Dict[str, Any]:
+    workers: Dict[int, Dict[str, float]] = {}
+    for r in results:
+        w = workers.setdefault(r["worker"], {"jobs": 0, "chars": 0, "audio_seconds": 0.0, "synthesis_seconds": 0.0})
+        w["jobs"] += 1
+        w["chars"] += r["chars"]
+        w["audio_seconds"] += r["audio_seconds"]
+        w["synthesis_seconds"] += r["synthesis_seconds"]
+    per_worker = {
+        str(pid): {
+            "jobs": w["jobs"],
+            "chars_per_second": round(w["chars"] / w["synthesis_seconds"], 1) if w["synthesis_seconds"] else None,
+            "rtf": round(w["synthesis_seconds"] / w["audio_seconds"], 4) if w["audio_seconds"] else None,
+        }
+        for pid, w in workers.items()
+    }
+    chars = sum(r["chars"] for r in results)
+    audio_seconds = sum(r["audio_seconds"] for r in results)
+    return {
+        "rendered": len(results),
+        "skipped_existing": skipped,
+        "failed": failed,
+        "wall_seconds": round(wall_seconds, 3),
+        "chars": chars,
+        "audio_seconds": round(audio_seconds, 3),
+        "chars_per_second": round(chars / wall_seconds, 1) if wall_seconds else None,
+        # Wall-clock RTF across the pool: < 1 means faster than real time overall
+        "rtf": round(wall_seconds / audio_seconds, 4) if audio_seconds else None,
+        "workers": per_worker,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Render text lines to audio files with the Piper voice")
+    parser.add_argument("input", help="Text file (one utterance per line) or .jsonl of {\"text\", \"id\", ...}")
+    parser.add_argument("--out", default="renders", help="Output directory for wav/pcm files")
+    parser.add_argument("--format", choices=["wav", "pcm", "cache"], default="wav",
+                        help="wav, raw int16 pcm, or per-sentence entries in the server's audio cache")
+    parser.add_argument("--cache-dir", default="audio_cache", help="Audio cache directory for --format cache")
+    parser.add_argument("-m", "--model", default=str(Path("models") / "skeletor_v1.onnx"))
+    parser.add_argument("-c", "--config", default=str(Path("models") / "skeletor_v1.onnx.json"))
+    parser.add_argument("--device", choices=["cuda", "cpu"], default="cpu")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default: 1 for cuda, CPU cores / --threads-per-worker for cpu)")
+    parser.add_argument("--threads-per-worker", type=int, default=1, help="CPU: intra-op threads per worker")
+    parser.add_argument("--length-scale", type=float, default=DEFAULT_SPEECH_SPEED)
+    parser.add_argument("--noise-scale", type=float, default=0.667)
+    parser.add_argument("--noise-w", type=float, default=0.8)
+    parser.add_argument("--speaker", type=int)
+    parser.add_argument("--sentence-silence", type=float, default=0.0)
+    parser.add_argument("--resume", action=argparse.BooleanOptionalAction, default=True,
+                        help="Skip jobs whose output file already exists")
+    args = parser.parse_args()
+
+    defaults = {
+        "length_scale": args.length_scale,
+        "noise_scale": args.noise_scale,
+        "noise_w": args.noise_w,
+        "speaker_id": args.speaker,
+        "sentence_silence": args.sentence_silence,
+    }
+    jobs = load_jobs(Path(args.input), defaults)
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    skipped = 0
+    if args.resume and args.format != "cache":
+        pending = [j for j in jobs if not (out_dir / f"{j['name']}.{args.format}").exists()]
+        skipped = len(jobs) - len(pending)
+        jobs = pending
+
+    workers = args.workers or (1 if args.device == "cuda" else max(1, (os.cpu_count() or 1) // args.threads_per_worker))
+    print(f"[OK] Rendering {len(jobs)} job(s) ({skipped} already done) with {workers} worker(s) on {args.device}")
+
+    model_path = str(Path(args.model).resolve())
+    config_path = str(Path(args.config).resolve()) if args.config else None
+    cache_dir = args.cache_dir if args.format == "cache" else None
+
+    results, failed = [], 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(model_path, config_path, args.device, args.threads_per_worker, cache_dir),
+    ) as pool:
+        futures = {pool.submit(_render, job, str(out_dir), args.format, args.resume): job for job in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                result = future.result()
+                results.append(result)
+                print(f"[{done}/{len(jobs)}] {job['name']}: {result['audio_seconds']:.2f}s audio "
+                      f"in {result['synthesis_seconds']:.2f}s")
+            except Exception as e:
+                failed += 1
+                print(f"[ERROR] {job['name']}: {e}")
+    wall_seconds = time.perf_counter() - start
+
+    summary = summarize(results, wall_seconds, skipped, failed)
+    with open(out_dir / "render_summary.json", "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps(summary, indent=2))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,138 @@
+# stage_metrics.py
+# Rolling per-stage latency histograms for the TTS server's /metrics endpoint.
+# Each stage keeps fixed log-spaced buckets (~10% relative error) in a ring of
+# time slots, so memory is constant no matter how many utterances are observed:
+# window quantiles sum the slots that fall inside the window, and cumulative
+# all-time buckets back the Prometheus histogram export.
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Bucket upper bounds: 100 us .. 1000 s, each 20% above the previous one
+BUCKET_BOUNDS = np.array([1e-4 * 1.2 ** i for i in range(int(math.log(1e7) / math.log(1.2)) + 2)])
+SLOT_SECONDS = 10.0
+DEFAULT_WINDOWS = (60, 300, 900)
+QUANTILES = (0.5, 0.95, 0.99)
+# Export every 4th bound (~2x apart) as Prometheus buckets; still exact cumulative counts
+PROMETHEUS_BUCKET_STRIDE = 4
+
+
+class RollingHistogram:
+    """Fixed-bucket histogram over a ring of SLOT_SECONDS-wide time slots plus all-time totals."""
+
+    def __init__(self, max_window_seconds: float, slot_seconds: float = SLOT_SECONDS) -> None:
+        self.slot_seconds = slot_seconds
+        n_slots = int(math.ceil(max_window_seconds / slot_seconds)) + 1
+        n_buckets = len(BUCKET_BOUNDS) + 1  # last bucket is overflow (+Inf)
+        self._slots = np.zeros((n_slots, n_buckets), dtype=np.int64)
+        self._slot_sums = np.zeros(n_slots)
+        self._slot_epochs = np.full(n_slots, -1, dtype=np.int64)
+        self.total_counts = np.zeros(n_buckets, dtype=np.int64)
+        self.total_sum = 0.0
+        self.total_count = 0
+
+    def observe(self, value: float, now: float) -> None:
+        bucket = int(np.searchsorted(BUCKET_BOUNDS, value, side="left"))
+        epoch = int(now // self.slot_seconds)
+        row = epoch % len(self._slot_epochs)
+        if self._slot_epochs[row] != epoch:
+            # Slot last used a full ring ago: recycle it
+            self._slots[row] = 0
+            self._slot_sums[row] = 0.0
+            self._slot_epochs[row] = epoch
+        self._slots[row, bucket] += 1
+        self._slot_sums[row] += value
+        self.total_counts[bucket] += 1
+        self.total_sum += value
+        self.total_count += 1
+
+    def window(self, window_seconds: float, now: float) -> tuple[np.ndarray, float]:
+        """(bucket counts, sum) over the slots inside the last window_seconds."""
+        epoch = int(now // self.slot_seconds)
+        first = epoch - int(math.ceil(window_seconds / self.slot_seconds)) + 1
+        mask = (self._slot_epochs >= first) & (self._slot_epochs <= epoch)
+        return self._slots[mask].sum(axis=0), float(self._slot_sums[mask].sum())
+
+
+def bucket_quantile(counts: np.ndarray, q: float) -> Optional[float]:
+    """Quantile estimate from bucket counts (geometric middle of the bucket it falls in)."""
+    total = int(counts.sum())
+    if total == 0:
+        return None
+    index = int(np.searchsorted(np.cumsum(counts), q * total, side="left"))
+    if index >= len(BUCKET_BOUNDS):
+        return float(BUCKET_BOUNDS[-1])
+    upper = BUCKET_BOUNDS[index]
+    lower = BUCKET_BOUNDS[index - 1] if index > 0 else 0.0
+    return float(math.sqrt(lower * upper)) if lower > 0 else float(upper)
+
+
+class StageMetrics:
+    """Named RollingHistograms, one per pipeline stage."""
+
+    def __init__(self, stages: Dict[str, str], windows: Iterable[float] = DEFAULT_WINDOWS,
+                 prefix: str = "tts") -> None:
+        """stages maps stage name -> help text. Stage names carry their unit (e.g. '_seconds')."""
+        self.windows = sorted(float(w) for w in windows)
+        self.prefix = prefix
+        self.help = dict(stages)
+        self._histograms = {name: RollingHistogram(self.windows[-1]) for name in stages}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, value: Optional[float]) -> None:
+        if value is None or value < 0 or stage not in self._histograms:
+            return
+        now = time.time()
+        with self._lock:
+            self._histograms[stage].observe(value, now)
+
+    def snapshot(self) -> Dict[str, dict]:
+        """JSON form: all-time count/sum plus count/mean/p50/p95/p99 per window."""
+        now = time.time()
+        result = {}
+        with self._lock:
+            for name, hist in self._histograms.items():
+                windows = {}
+                for window in self.windows:
+                    counts, total = hist.window(window, now)
+                    count = int(counts.sum())
+                    entry = {"count": count, "mean": round(total / count, 6) if count else None}
+                    for q in QUANTILES:
+                        value = bucket_quantile(counts, q)
+                        entry[f"p{int(q * 100)}"] = round(value, 6) if value is not None else None
+                    windows[f"{int(window)}s"] = entry
+                result[name] = {"count": hist.total_count, "sum": round(hist.total_sum, 6), "windows": windows}
+        return result
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition: one histogram per stage plus windowed quantile gauges."""
+        now = time.time()
+        lines: List[str] = []
+        with self._lock:
+            for name, hist in self._histograms.items():
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {self.help[name]}")
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = np.cumsum(hist.total_counts)
+                for index in range(0, len(BUCKET_BOUNDS), PROMETHEUS_BUCKET_STRIDE):
+                    lines.append(f'{metric}_bucket{{le="{BUCKET_BOUNDS[index]:.6g}"}} {int(cumulative[index])}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {hist.total_count}')
+                lines.append(f"{metric}_sum {hist.total_sum:.6f}")
+                lines.append(f"{metric}_count {hist.total_count}")
+
+                gauge = f"{metric}_window_quantile"
+                lines.append(f"# HELP {gauge} {self.help[name]} (rolling-window quantile estimate)")
+                lines.append(f"# TYPE {gauge} gauge")
+                for window in self.windows:
+                    counts, _ = hist.window(window, now)
+                    for q in QUANTILES:
+                        value = bucket_quantile(counts, q)
+                        if value is not None:
+                            lines.append(f'{gauge}{{window="{int(window)}s",quantile="{q}"}} {value:.6g}')
+        return "\n".join(lines) + "\n"
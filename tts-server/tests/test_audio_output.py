@@ -0,0 +1,114 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+import audio_output
+from audio_output import Int16RingBuffer, SoundDeviceSink
+
+
+class FakeOutputStream:
+    """Stands in for sd.OutputStream; the callback only runs when a test calls pump()."""
+
+    latency = 0.0
+
+    def __init__(self, samplerate, channels, dtype, blocksize, device, callback):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.callback = callback
+        self.active = False
+
+    def start(self):
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def close(self):
+        pass
+
+    def pump(self, blocks=1):
+        for _ in range(blocks):
+            out = np.zeros((self.blocksize, 1), dtype=np.int16)
+            self.callback(out, self.blocksize, SimpleNamespace(currentTime=0.0, outputBufferDacTime=0.0), None)
+
+
+def make_sink(monkeypatch, sample_rate=1000, buffer_seconds=1.0):
+    monkeypatch.setattr(audio_output, "sd", SimpleNamespace(OutputStream=FakeOutputStream))
+    sink = SoundDeviceSink(blocksize=128, buffer_seconds=buffer_seconds)
+    sink.stall_margin_seconds = 0.2
+    sink.start(sample_rate)
+    return sink
+
+
+def test_ring_buffer_wraps_and_zero_fills_underrun():
+    ring = Int16RingBuffer(8)
+    out = np.empty(6, dtype=np.int16)
+    assert ring.write(np.arange(6, dtype=np.int16))
+    assert ring.read_into(out) == 6
+    assert ring.write(np.arange(10, 16, dtype=np.int16))  # wraps past the end of the buffer
+
+    assert ring.read_into(out, count_underrun=True) == 6
+    assert out.tolist() == [10, 11, 12, 13, 14, 15]
+    assert ring.read_into(out[:4], count_underrun=True) == 0
+    assert out[:4].tolist() == [0, 0, 0, 0]
+    assert ring.underrun_samples == 4
+
+
+def test_ring_buffer_write_blocks_until_reader_frees_space():
+    ring = Int16RingBuffer(4)
+    reader = threading.Timer(0.1, lambda: ring.read_into(np.empty(4, dtype=np.int16)))
+    reader.start()
+    assert ring.write(np.arange(8, dtype=np.int16), timeout=2.0)
+    reader.join()
+    assert ring.available() == 4
+
+
+def test_ring_buffer_write_times_out_when_full():
+    ring = Int16RingBuffer(4)
+    start = time.perf_counter()
+    assert not ring.write(np.arange(8, dtype=np.int16), timeout=0.1)
+    assert time.perf_counter() - start < 1.0
+    assert ring.available() == 4
+
+
+def test_drain_returns_once_callback_consumes_everything(monkeypatch):
+    sink = make_sink(monkeypatch)
+    sink.write(np.ones(300, dtype=np.int16))
+    threading.Timer(0.05, sink.stream.pump, args=(3,)).start()
+
+    assert sink.wait_until_drained(timeout=2.0)
+    assert sink.played_pos == 300
+    assert sink.stalls == 0
+
+
+def test_drain_gives_up_when_callback_stalls(monkeypatch):
+    sink = make_sink(monkeypatch)
+    sink.write(np.ones(300, dtype=np.int16))
+
+    start = time.perf_counter()
+    assert not sink.wait_until_drained()  # the callback never runs
+    assert time.perf_counter() - start < 2.0
+    assert sink.stalls == 1
+    assert sink.ring.available() == 0
+    assert sink.stats()["stalls"] == 1
+
+
+def test_drain_gives_up_when_stream_stops(monkeypatch):
+    sink = make_sink(monkeypatch)
+    sink.write(np.ones(300, dtype=np.int16))
+    sink.stream.active = False
+
+    assert not sink.wait_until_drained(timeout=5.0)
+    assert sink.stalls == 1
+
+
+def test_write_drops_audio_when_ring_never_drains(monkeypatch):
+    sink = make_sink(monkeypatch, buffer_seconds=0.2)
+    start = time.perf_counter()
+    sink.write(np.ones(500, dtype=np.int16))  # 0.5 s of audio into a 0.2 s ring
+
+    assert time.perf_counter() - start < 2.0
+    assert sink.stalls == 1
+    assert sink.ring.available() == 0
@@ -0,0 +1,171 @@
+import threading
+import time
+
+from tts_scheduler import TtsScheduler
+
+
+class FakeEngine:
+    """Records the STT pause/resume calls speak() would make; each utterance 'plays' for play_seconds."""
+
+    def __init__(self, play_seconds=0.02):
+        self.play_seconds = play_seconds
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def prepare(self, text, synth_args):
+        return None
+
+    def speak(self, text, synth_args, request_id=None, prepared=None, pause_listening=True, hold_listening=None):
+        with self.lock:
+            self.calls.append(("pause" if pause_listening else "play", text))
+        time.sleep(self.play_seconds)
+        held = hold_listening is not None and hold_listening()
+        if not held:
+            self.resume_listening(request_id)
+        return {"listening_held": held}
+
+    def resume_listening(self, request_id=None):
+        with self.lock:
+            self.calls.append(("resume", request_id))
+
+
+def wait_until(predicate, timeout=2.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def test_streamed_reply_pauses_and_resumes_once():
+    engine = FakeEngine()
+    scheduler = TtsScheduler(engine, hold_seconds=1.0)
+    scheduler.start()
+    for i in range(3):
+        scheduler.submit(f"sentence {i}", {}, request_id="A", more=True)
+    time.sleep(0.1)
+    scheduler.submit("last sentence", {}, request_id="A")
+
+    assert wait_until(lambda: ("resume", "A") in engine.calls)
+    assert engine.calls == [
+        ("pause", "sentence 0"),
+        ("play", "sentence 1"),
+        ("play", "sentence 2"),
+        ("play", "last sentence"),
+        ("resume", "A"),
+    ]
+
+
+def test_end_marker_resumes_listening():
+    engine = FakeEngine()
+    scheduler = TtsScheduler(engine, hold_seconds=5.0)
+    scheduler.start()
+    scheduler.submit("only sentence so far", {}, request_id="A", more=True)
+    assert wait_until(lambda: scheduler.stats()["listening_held_for"] == "A")
+
+    scheduler.end_request("A")
+    assert wait_until(lambda: ("resume", "A") in engine.calls)
+    assert scheduler.stats()["counters"]["hold_expired"] == 0
+
+
+def test_hold_expires_when_reply_never_ends():
+    engine = FakeEngine()
+    scheduler = TtsScheduler(engine, hold_seconds=0.1)
+    scheduler.start()
+    scheduler.submit("the end marker never comes", {}, request_id="A", more=True)
+
+    assert wait_until(lambda: ("resume", "A") in engine.calls)
+    assert scheduler.stats()["counters"]["hold_expired"] == 1
+
+
+def test_overflow_never_evicts_the_reply_being_spoken():
+    engine = FakeEngine(play_seconds=0.3)
+    scheduler = TtsScheduler(engine, max_queue=2, hold_seconds=1.0)
+    scheduler.start()
+    scheduler.submit("reply sentence 0", {}, request_id="A", more=True)
+    assert wait_until(lambda: scheduler.stats()["current"] is not None)
+
+    for i in range(1, 5):
+        assert scheduler.submit(f"reply sentence {i}", {}, request_id="A", more=True) is not None
+    for i in range(3):
+        scheduler.submit(f"other {i}", {}, request_id="B")
+
+    stats = scheduler.stats()
+    queued = [job["request_id"] for job in stats["queued"]]
+    assert queued.count("A") == 4
+    assert queued.count("B") == 2
+    assert stats["counters"]["dropped_overflow"] == 1
+
+
+def test_queue_orders_by_priority_then_arrival():
+    scheduler = TtsScheduler(FakeEngine())
+    scheduler.submit("low", {}, priority=0)
+    scheduler.submit("high", {}, priority=5)
+    scheduler.submit("low again", {}, priority=0)
+
+    assert [job["priority"] for job in scheduler.stats()["queued"]] == [5, 0, 0]
+    assert [job.text for job in scheduler._queue] == ["high", "low", "low again"]
+
+
+def test_supersede_drops_queued_jobs_on_same_channel_only():
+    scheduler = TtsScheduler(FakeEngine())
+    scheduler.submit("old status", {}, channel="status")
+    scheduler.submit("urgent status", {}, channel="status", priority=9)
+    scheduler.submit("chat", {}, channel="chat")
+    scheduler.submit("new status", {}, channel="status", supersede=True)
+
+    assert [job.text for job in scheduler._queue] == ["urgent status", "chat", "new status"]
+    assert scheduler.stats()["counters"]["superseded"] == 1
+
+
+def test_full_queue_rejects_lower_priority_and_evicts_lowest():
+    scheduler = TtsScheduler(FakeEngine(), max_queue=2)
+    scheduler.submit("a", {}, priority=5)
+    scheduler.submit("b", {}, priority=3)
+
+    assert scheduler.submit("c", {}, priority=1) is None
+    assert scheduler.submit("d", {}, priority=4) is not None
+    assert [job.text for job in scheduler._queue] == ["a", "d"]
+    counters = scheduler.stats()["counters"]
+    assert counters["rejected"] == 1
+    assert counters["dropped_overflow"] == 1
+
+
+def test_other_jobs_wait_for_held_reply():
+    engine = FakeEngine()
+    scheduler = TtsScheduler(engine, hold_seconds=1.0)
+    scheduler.start()
+    scheduler.submit("reply 0", {}, request_id="A", more=True)
+    assert wait_until(lambda: scheduler.stats()["listening_held_for"] == "A")
+
+    scheduler.submit("notification", {}, request_id="B", priority=10)
+    time.sleep(0.1)
+    assert ("pause", "notification") not in engine.calls
+
+    scheduler.submit("reply 1", {}, request_id="A")
+    assert wait_until(lambda: ("resume", "B") in engine.calls)
+    assert engine.calls == [
+        ("pause", "reply 0"),
+        ("play", "reply 1"),
+        ("resume", "A"),
+        ("pause", "notification"),
+        ("resume", "B"),
+    ]
+    assert scheduler.stats()["counters"]["hold_preempted"] == 0
+
+
+def test_interrupt_preempts_held_reply():
+    engine = FakeEngine()
+    scheduler = TtsScheduler(engine, hold_seconds=5.0)
+    scheduler.start()
+    scheduler.submit("reply 0", {}, request_id="A", more=True)
+    assert wait_until(lambda: scheduler.stats()["listening_held_for"] == "A")
+
+    scheduler.submit("alarm", {}, request_id="B", interrupt=True)
+    assert wait_until(lambda: ("resume", "B") in engine.calls)
+    # STT stays paused from the reply; the interrupting job resumes it
+    assert engine.calls == [("pause", "reply 0"), ("play", "alarm"), ("resume", "B")]
+    stats = scheduler.stats()
+    assert stats["counters"]["hold_preempted"] == 1
+    assert stats["open_requests"] == 0
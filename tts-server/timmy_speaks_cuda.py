@@ -5,16 +5,16 @@ from __future__ import annotations
 import argparse
 import logging
 import os
+import queue
 import re
 import threading
 import time
 import sys
 from pathlib import Path
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Callable, Dict, Iterable, Optional
 
 import numpy as np
-import sounddevice as sd
-from flask import Flask, jsonify, request
+from flask import Flask, Response, jsonify, request
 
 import requests
 import warnings
@@ -48,6 +48,21 @@ try:
 except Exception:
     ort = None
 
+from audio_cache import AudioCache, cache_key, load_warmup_phrases, model_fingerprint
+from audio_output import AudioSink, SoundDeviceSink, chunk_to_int16, make_sink
+from ort_session import (
+    GRAPH_OPTIMIZATION_LEVELS,
+    MODEL_VARIANTS,
+    benchmark_rtf,
+    cpu_session_options,
+    describe_options,
+    load_cpu_session,
+    model_variant_path,
+)
+from jaw_envelope import JawStreamer
+from stage_metrics import StageMetrics
+from tts_scheduler import TtsScheduler
+
 # Global HTTP session with connection pooling for low-latency requests
 # Reuses TCP connections for pause/resume to STT and indicator updates
 http_session = requests.Session()
@@ -85,6 +100,11 @@ _last_metrics: Dict[str, Any] = {
     "provider": None,
     "text_chars": 0,
     "duration_seconds": None,
+    "time_to_first_audio_seconds": None,
+    "playback_underruns": 0,
+    "synthesis_waits": 0,
+    "synthesis_ahead_seconds": None,
+    "turn_seconds_saved": None,
     "started_at": None,
     "finished_at": None,
 }
@@ -95,6 +115,53 @@ WHITESPACE_REGEX = re.compile(r"\s+")
 DOTS_REGEX = re.compile(r"[.]{2,}")
 EXCLAMATION_REGEX = re.compile(r"[!]{2,}")
 QUESTION_REGEX = re.compile(r"[?]{2,}")
+# Sentence boundaries for pipelined synthesis (split after terminal punctuation)
+SENTENCE_SPLIT_REGEX = re.compile(r"(?<=[.!?;:])\s+")
+
+# Synthesized audio chunks buffered ahead of playback. Bounds memory on long texts
+# while giving the synthesis thread room to run ahead of the speaker.
+SYNTH_QUEUE_MAX_CHUNKS = 16
+
+# Synthesized-audio cache for repeated short lines (stock quips, error responses)
+AUDIO_CACHE_DIR = "audio_cache"
+AUDIO_CACHE_MEMORY_MB = 64
+AUDIO_CACHE_DISK_MB = 512
+AUDIO_CACHE_MAX_CHARS = 200  # Sentences longer than this are never cached
+AUDIO_CACHE_WARMUP_FILE = "cache_warmup.txt"  # Phrases rendered into the cache at startup
+
+# Playback job queue
+TTS_QUEUE_MAX_JOBS = 16
+TTS_LOOKAHEAD = True  # Synthesize the next queued job while the current one plays
+
+# STT pause/resume timing. /pause-listening returns only after the STT server has
+# stopped capturing and cleared its buffer, so a confirmed pause needs no extra wait.
+# Resume happens when the last sample has left the output device, plus a guard for
+# speaker/room decay.
+PAUSE_UNCONFIRMED_WAIT_SECONDS = 0.2  # Pause request failed or timed out: wait as before
+RESUME_GUARD_SECONDS = 0.05
+# A reply streamed sentence by sentence keeps STT paused between its sentences; if the
+# next one (or the end marker) doesn't arrive within this long, listening resumes anyway
+LISTENING_HOLD_SECONDS = 3.0
+# Fixed sleeps used before completion signalling, for the per-turn savings report
+LEGACY_PAUSE_SLEEP_SECONDS = 0.2
+LEGACY_RESUME_SLEEP_SECONDS = 0.3
+
+# Jaw envelope streamed to the motor controller (host:port for UDP datagrams; None = off)
+JAW_TARGET = None
+JAW_LEAD_SECONDS = 0.05  # Send each frame this early to cover network + servo travel
+
+# Rolling per-stage histograms on /metrics (windows in seconds)
+METRIC_WINDOWS_SECONDS = (60, 300, 900)
+METRIC_STAGES = {
+    "queue_wait_seconds": "Time a job waited in the TTS queue before playback started",
+    "text_normalization_seconds": "Time spent normalizing text before synthesis",
+    "first_chunk_seconds": "Time from synthesis start to the first audio chunk",
+    "synthesis_rtf": "Model synthesis time divided by audio duration (cache hits excluded)",
+    "playback_seconds": "Time from the first sample written to the last sample leaving the device",
+    "pause_handshake_seconds": "Round trip of the STT pause-listening request",
+    "resume_handshake_seconds": "Round trip of the STT resume-listening request",
+}
+stage_metrics = StageMetrics(METRIC_STAGES, METRIC_WINDOWS_SECONDS)
 
 
 def optimize_text_for_speed(text: str) -> str:
@@ -110,24 +177,50 @@ def optimize_text_for_speed(text: str) -> str:
     return text.strip()
 
 
-def post_hearing_action(action: str, wait: bool) -> None:
+def split_sentences(text: str) -> list[str]:
+    """Split text into sentences so the first one can play while the rest are synthesized."""
+    return [s for s in (part.strip() for part in SENTENCE_SPLIT_REGEX.split(text)) if s]
+
+
+def synthesis_config(synth_args: Dict[str, Any]) -> SynthesisConfig:
+    """Piper SynthesisConfig from the server's synth_args dict."""
+    length_scale = synth_args.get("length_scale", DEFAULT_SPEECH_SPEED)
+    noise_scale = synth_args.get("noise_scale", 0.667)
+    noise_w = synth_args.get("noise_w", 0.8)
+    speaker_id = synth_args.get("speaker_id")
+
+    config_args: Dict[str, Any] = {
+        "length_scale": length_scale,
+        "noise_scale": noise_scale,
+        "noise_w_scale": noise_w,
+    }
+    if speaker_id is not None:
+        config_args["speaker_id"] = speaker_id
+    return SynthesisConfig(**config_args)
+
+
+def post_hearing_action(action: str, wait: bool) -> bool:
+    """POST to the STT server. With wait=True, returns whether it confirmed the action."""
     if not HEARING_SERVER_URL:
-        return
-    def _send() -> None:
+        return False
+    def _send() -> bool:
         try:
             timeout = 0.5 if wait else 0.1  # Increased timeout for pause
             # Use session for connection pooling (reduces latency)
+            start = time.perf_counter()
             resp = http_session.post(f"{HEARING_SERVER_URL}/{action}", timeout=timeout)
+            stage_metrics.observe(f"{action.split('-')[0]}_handshake_seconds", time.perf_counter() - start)
             if resp.status_code == 200:
                 LOGGER.debug(f"STT {action} successful")
-            else:
-                LOGGER.warning(f"STT {action} returned status {resp.status_code}")
+                return True
+            LOGGER.warning(f"STT {action} returned status {resp.status_code}")
         except requests.RequestException as e:
             LOGGER.warning(f"STT {action} failed: {e}")
+        return False
     if wait:
-        _send()
-    else:
-        threading.Thread(target=_send, daemon=True).start()
+        return _send()
+    threading.Thread(target=_send, daemon=True).start()
+    return False
 
 
 def post_indicator_text(text: str) -> None:
@@ -196,66 +289,228 @@ def _cuda_available() -> bool:
         return False
 
 
+class PreparedUtterance:
+    """One utterance being synthesized into a bounded queue, ahead of or during its playback."""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=SYNTH_QUEUE_MAX_CHUNKS)
+        self.stop = threading.Event()
+        self.done = threading.Event()  # producer finished, failed or was cancelled
+        self.ready_samples = 0  # samples synthesized so far
+        self.created = time.perf_counter()
+        self.thread: Optional[threading.Thread] = None
+
+    def put(self, item: Any) -> bool:
+        """Producer side: block while the queue is full. Returns False once cancelled."""
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def cancel(self) -> None:
+        self.stop.set()
+        # Unblock the producer if it is waiting on a full queue
+        try:
+            while True:
+                self.queue.get_nowait()
+        except queue.Empty:
+            pass
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+
 class PiperEngine:
     def __init__(
         self,
         model_path: Path,
         config_path: Optional[Path],
+        sink: Optional[AudioSink] = None,
+        cache: Optional[AudioCache] = None,
+        device: str = "cuda",
+        session_options: Any = None,
     ) -> None:
         if not model_path.exists():
             raise FileNotFoundError(f"Model not found: {model_path}")
 
         # Make sure NVIDIA DLL folders are on PATH before initializing the session
         _append_nvidia_dll_dirs_once()
-        if not _cuda_available():
-            raise RuntimeError("CUDAExecutionProvider not available. Ensure onnxruntime-gpu and CUDA/cuDNN DLLs are installed in the venv and on PATH.")
-        LOGGER.info("Loading Piper voice with CUDAExecutionProvider (cuDNN)")
-
+        if device == "auto":
+            device = "cuda" if _cuda_available() else "cpu"
+        if device == "cuda" and not _cuda_available():
+            raise RuntimeError("CUDAExecutionProvider not available. Ensure onnxruntime-gpu and CUDA/cuDNN DLLs are installed in the venv and on PATH, or run with --device cpu.")
+
+        self.provider = "CUDA" if device == "cuda" else "CPU"
+        self.session_info: Optional[Dict[str, Any]] = None
+        self.benchmark: Optional[Dict[str, Any]] = None  # startup self-benchmark result
+        LOGGER.info(f"Loading Piper voice {model_path.name} with {self.provider}ExecutionProvider")
         self.voice = PiperVoice.load(
             str(model_path),
             config_path=str(config_path) if config_path else None,
-            use_cuda=True,
+            use_cuda=device == "cuda",
         )
+        if device == "cpu" and session_options is not None:
+            # PiperVoice.load builds a default session; replace it with the tuned one
+            self.voice.session = load_cpu_session(model_path, session_options)
+            self.session_info = describe_options(session_options)
+            LOGGER.info(f"CPU session options: {self.session_info}")
         self.lock = threading.Lock()
+        # One long-lived output for the life of the server (sounddevice unless told otherwise)
+        self.sink = sink if sink is not None else SoundDeviceSink()
+        self.sink.start(int(getattr(self.voice.config, "sample_rate", 22050)))
+        self.cache = cache
+        self.resume_guard_seconds = RESUME_GUARD_SECONDS
+        self.jaw: Optional[JawStreamer] = None
+        self.model_id = model_fingerprint(model_path)
+
+    def _cache_key(self, sentence: str, synth_args: Dict[str, Any]) -> Optional[str]:
+        if self.cache is None or not self.cache.cacheable(sentence):
+            return None
+        return cache_key(sentence, self.model_id, synth_args)
+
+    def synthesize_array(self, text: str, synth_args: Dict[str, Any]) -> np.ndarray:
+        """Render text to one int16 array without playing it."""
+        with self.lock:
+            arrays = [a for a in (chunk_to_int16(c) for c in self._iterate_chunks(text, synth_args)) if a is not None]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=np.int16)
+
+    def warm_cache(self, phrases: Iterable[str], synth_args: Dict[str, Any]) -> int:
+        """Render phrases into the audio cache without playing them. Returns sentences rendered."""
+        rendered = 0
+        for phrase in phrases:
+            for sentence in split_sentences(optimize_text_for_speed(phrase)):
+                key = self._cache_key(sentence, synth_args)
+                if key is None or self.cache.get(key) is not None:
+                    continue
+                # Per sentence, so a real speak() request waits for at most one render
+                samples = self.synthesize_array(sentence, synth_args)
+                if samples.size:
+                    self.cache.put(key, samples)
+                    rendered += 1
+        return rendered
 
     def _iterate_chunks(
         self, text: str, synth_args: Dict[str, Any]
     ) -> Iterable[bytes]:
-        length_scale = synth_args.get("length_scale", DEFAULT_SPEECH_SPEED)
-        noise_scale = synth_args.get("noise_scale", 0.667)
-        noise_w = synth_args.get("noise_w", 0.8)
-        speaker_id = synth_args.get("speaker_id")
-
-        config_args: Dict[str, Any] = {
-            "length_scale": length_scale,
-            "noise_scale": noise_scale,
-            "noise_w_scale": noise_w,
-        }
-        if speaker_id is not None:
-            config_args["speaker_id"] = speaker_id
-
-        synthesis_config = SynthesisConfig(**config_args)
-        result = self.voice.synthesize(text, synthesis_config)
+        result = self.voice.synthesize(text, synthesis_config(synth_args))
         for chunk in result:
             if chunk:
                 yield chunk
 
-    def speak(self, text: str, synth_args: Dict[str, Any], request_id: str = None) -> None:
-        if not text.strip():
-            return
+    def _synthesize_into(
+        self,
+        prepared: PreparedUtterance,
+        synth_args: Dict[str, Any],
+        sample_rate: int,
+    ) -> None:
+        """Synthesis thread: render text sentence by sentence into prepared.queue, then None."""
+        sentence_silence = float(synth_args.get("sentence_silence") or 0.0)
+        silence = np.zeros(int(sample_rate * sentence_silence), dtype=np.int16) if sentence_silence > 0 else None
+
+        model_seconds = 0.0  # time inside the model, excluding waits on a full queue
+        model_samples = 0
+
+        def _emit(arr: np.ndarray) -> bool:
+            if prepared.ready_samples == 0:
+                stage_metrics.observe("first_chunk_seconds", time.perf_counter() - prepared.created)
+            prepared.ready_samples += len(arr)
+            return prepared.put(arr)
+
+        try:
+            sentences = split_sentences(prepared.text)
+            for index, sentence in enumerate(sentences):
+                key = self._cache_key(sentence, synth_args)
+                cached = self.cache.get(key) if key else None
+                if cached is not None:
+                    # Cache hit: the whole sentence is ready to play immediately
+                    if cached.size and not _emit(cached):
+                        return
+                else:
+                    rendered = [] if key else None
+                    chunk_start = time.perf_counter()
+                    for chunk in self._iterate_chunks(sentence, synth_args):
+                        model_seconds += time.perf_counter() - chunk_start
+                        if prepared.stop.is_set():
+                            return
+                        arr = chunk_to_int16(chunk)
+                        if arr is not None:
+                            model_samples += len(arr)
+                            if not _emit(arr):
+                                return
+                            if rendered is not None:
+                                rendered.append(arr)
+                        chunk_start = time.perf_counter()
+                    if rendered:
+                        self.cache.put(key, np.concatenate(rendered))
+                if silence is not None and index < len(sentences) - 1:
+                    if not _emit(silence):
+                        return
+            if model_samples:
+                stage_metrics.observe("synthesis_rtf", model_seconds / (model_samples / sample_rate))
+            prepared.put(None)
+        except Exception as e:
+            prepared.put(e)
+        finally:
+            prepared.done.set()
+
+    def prepare(self, text: str, synth_args: Dict[str, Any]) -> Optional[PreparedUtterance]:
+        """Start synthesizing text in the background. Pass the result to speak() to play it."""
+        normalize_start = time.perf_counter()
         optimized = optimize_text_for_speed(text)
+        stage_metrics.observe("text_normalization_seconds", time.perf_counter() - normalize_start)
+        if not optimized:
+            return None
+        sample_rate = int(getattr(self.voice.config, "sample_rate", 22050))
+        prepared = PreparedUtterance(optimized)
+        prepared.thread = threading.Thread(
+            target=self._synthesize_into,
+            args=(prepared, synth_args, sample_rate),
+            name="tts-synth",
+            daemon=True,
+        )
+        prepared.thread.start()
+        return prepared
+
+    def speak(
+        self,
+        text: str,
+        synth_args: Dict[str, Any],
+        request_id: str = None,
+        prepared: Optional[PreparedUtterance] = None,
+        pause_listening: bool = True,
+        hold_listening: Optional[Callable[[], bool]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Play text (or an utterance already started with prepare()) and block until it has
+        been played out. Returns per-utterance timing stats.
+
+        pause_listening=False skips the STT pause (it is still paused from the previous
+        sentence of the same reply). hold_listening is asked once playback has drained;
+        if it returns True, STT stays paused and the resume guard is skipped.
+        """
+        if prepared is None and not text.strip():
+            return {}
+        optimized = prepared.text if prepared is not None else optimize_text_for_speed(text)
+        if not optimized:
+            return {}
 
         start_time = time.perf_counter()
+        started_at = time.time()
         LOGGER.debug("SPEAK_START chars=%d request_id=%s", len(optimized), request_id)
         
-        if LATENCY_TRACKING_ENABLED and request_id:
-            log_timing(request_id, "tts", Events.TTS_PAUSE_SENT)
-        
-        post_hearing_action("pause-listening", wait=True)
-        # Give STT server time to fully pause and clear buffers
-        time.sleep(0.2)  # Increased from 0.05 to 0.2 seconds
-        # Fire-and-forget external indicator for speaking state
-        post_indicator_text(INDICATOR_SPEAKING_TEXT)
+        pause_wait = 0.0
+        if pause_listening:
+            if LATENCY_TRACKING_ENABLED and request_id:
+                log_timing(request_id, "tts", Events.TTS_PAUSE_SENT)
+            if not post_hearing_action("pause-listening", wait=True):
+                # No confirmation that STT stopped capturing; give it the old grace period
+                pause_wait = PAUSE_UNCONFIRMED_WAIT_SECONDS
+                time.sleep(pause_wait)
+            # Fire-and-forget external indicator for speaking state
+            post_indicator_text(INDICATOR_SPEAKING_TEXT)
         
         if LATENCY_TRACKING_ENABLED and request_id:
             log_timing(request_id, "tts", Events.TTS_SYNTHESIS_START)
@@ -264,122 +519,120 @@ class PiperEngine:
             config = self.voice.config
             sample_rate = int(getattr(config, "sample_rate", 22050))
 
-            LOGGER.info(f"Opening audio stream: sample_rate={sample_rate}, channels=1, dtype=int16")
-            
+            # Producer: synthesize sentence by sentence into a bounded queue, running ahead
+            # of playback. Consumer (this thread): drain the queue into the output stream.
+            if prepared is None:
+                prepared = self.prepare(optimized, synth_args)
+
+            chunks_written = 0
+            synthesis_waits = 0
+            sink_underruns_before = self.sink.underruns
+            first_audio_seconds = None
+            ahead_seconds = None
             try:
-                stream_obj = sd.OutputStream(
-                samplerate=sample_rate,
-                channels=1,
-                dtype="int16",
-                blocksize=max(128, sample_rate // 20),
-                device=None,
-                )
-            except Exception as e:
-                LOGGER.error(f"Failed to open audio stream: {e}")
-                raise
-
-            with stream_obj as stream:
-                chunks_written = 0
-                first_chunk = True
-                for chunk in self._iterate_chunks(optimized, synth_args):
-                    if not chunk:
-                        continue
+                while True:
+                    if chunks_written and prepared.queue.empty():
+                        # Playback caught up with synthesis; the sink's buffer may still cover it
+                        synthesis_waits += 1
+                    item = prepared.queue.get()
+                    if item is None:
+                        break
+                    if isinstance(item, Exception):
+                        raise item
                     
                     # Log when first audio chunk starts playing
-                    if first_chunk and LATENCY_TRACKING_ENABLED and request_id:
-                        log_timing(request_id, "tts", Events.TTS_AUDIO_PLAYBACK_START)
-                        first_chunk = False
+                    if first_audio_seconds is None:
+                        playback_start = time.perf_counter()
+                        first_audio_seconds = playback_start - start_time
+                        # Audio already synthesized when playback began (look-ahead margin)
+                        ahead_seconds = prepared.ready_samples / sample_rate
+                        if LATENCY_TRACKING_ENABLED and request_id:
+                            log_timing(request_id, "tts", Events.TTS_AUDIO_PLAYBACK_START)
                     
                     chunks_written += 1
-                    raw: Optional[bytes] = None
-                    if isinstance(chunk, (bytes, bytearray, memoryview)):
-                        raw = bytes(chunk)
-                    elif isinstance(chunk, np.ndarray):
-                        arr = chunk
-                        if np.issubdtype(arr.dtype, np.floating):
-                            arr = np.clip(arr, -1.0, 1.0)
-                            arr = (arr * 32767.0).astype(np.int16, copy=False)
-                        if arr.size:
-                            stream.write(arr)
-                        continue
-                    elif hasattr(chunk, "audio"):
-                        val = getattr(chunk, "audio")
-                        if isinstance(val, np.ndarray):
-                            arr = val
-                            if np.issubdtype(arr.dtype, np.floating):
-                                arr = np.clip(arr, -1.0, 1.0)
-                                arr = (arr * 32767.0).astype(np.int16, copy=False)
-                            if arr.size:
-                                stream.write(arr)
-                            continue
-                        elif isinstance(val, (bytes, bytearray, memoryview)):
-                            raw = bytes(val)
-                        else:
-                            tobytes = getattr(val, "tobytes", None)
-                            if callable(tobytes):
-                                raw = tobytes()
-                    elif str(type(chunk)) == "<class 'piper.voice.AudioChunk'>":
-                        if hasattr(chunk, 'audio_int16_array') and chunk.audio_int16_array is not None:
-                            stream.write(chunk.audio_int16_array)
-                            continue
-                        elif hasattr(chunk, 'audio_float_array') and chunk.audio_float_array is not None:
-                            float_audio = chunk.audio_float_array
-                            int16_audio = np.clip(float_audio, -1.0, 1.0)
-                            int16_audio = (int16_audio * 32767.0).astype(np.int16, copy=False)
-                            stream.write(int16_audio)
-                            continue
-                    else:
-                        tobytes = getattr(chunk, "tobytes", None)
-                        if callable(tobytes):
-                            raw = tobytes()
-
-                    if raw is not None and len(raw) > 0:
-                        arr16 = np.frombuffer(raw, dtype=np.int16)
-                        if arr16.size and np.any(arr16):
-                            stream.write(arr16)
-                        else:
-                            if len(raw) % 4 == 0:
-                                arrf = np.frombuffer(raw, dtype=np.float32)
-                                if arrf.size:
-                                    arrf = np.clip(arrf, -1.0, 1.0)
-                                    arr16 = (arrf * 32767.0).astype(np.int16, copy=False)
-                                    if arr16.size:
-                                        stream.write(arr16)
+                    if self.jaw is not None:
+                        # This chunk is heard after everything already queued in the sink
+                        self.jaw.feed(item, time.perf_counter() + self.sink.pending_seconds())
+                    # Copies into the sink's ring buffer; blocks only when it is full
+                    self.sink.write(item)
+                if self.jaw is not None:
+                    self.jaw.end_utterance(time.perf_counter() + self.sink.pending_seconds())
+                # Returns when the audio callback reports the last sample has left the device,
+                # or gives up (dropping the rest) if the device stopped consuming
+                if not self.sink.wait_until_drained():
+                    LOGGER.warning(f"Audio output did not drain; playback cut short [request_id={request_id}]")
+                if first_audio_seconds is not None:
+                    stage_metrics.observe("playback_seconds", time.perf_counter() - playback_start)
+            finally:
+                prepared.cancel()
+            # Gaps the listener actually heard, counted by the sink's audio callback
+            underruns = self.sink.underruns - sink_underruns_before
             
-            LOGGER.info(f"Audio playback complete: {chunks_written} chunks written to stream")
+            LOGGER.info(f"Audio playback complete: {chunks_written} chunks written to {self.sink.name} sink, "
+                        f"{underruns} underruns, {synthesis_waits} synthesis waits")
             
             if LATENCY_TRACKING_ENABLED and request_id:
                 log_timing(request_id, "tts", Events.TTS_AUDIO_PLAYBACK_COMPLETE, 
-                         {"chunks_written": chunks_written})
+                         {"chunks_written": chunks_written, "underruns": underruns,
+                          "synthesis_waits": synthesis_waits,
+                          "drain_tail_ms": round(self.sink.last_drain_tail_seconds * 1000, 1)})
+
+        held = hold_listening is not None and hold_listening()
+        # Speaker/room decay guard before the microphone is live again
+        resume_guard = 0.0 if held else self.resume_guard_seconds
+        time.sleep(resume_guard)
+        saved_seconds = (LEGACY_PAUSE_SLEEP_SECONDS + LEGACY_RESUME_SLEEP_SECONDS
+                         - pause_wait - resume_guard)
 
         duration = time.perf_counter() - start_time
         LOGGER.debug("SPEAK_END duration_s=%.3f request_id=%s", duration, request_id)
         with _metrics_lock:
             _last_metrics.update({
-                "provider": "CUDA",
+                "provider": self.provider,
                 "text_chars": len(optimized),
                 "duration_seconds": duration,
-                "started_at": None,
-                "finished_at": None,
+                "time_to_first_audio_seconds": first_audio_seconds,
+                "playback_underruns": underruns,
+                "synthesis_waits": synthesis_waits,
+                "synthesis_ahead_seconds": ahead_seconds,
+                "turn_seconds_saved": saved_seconds,
+                "started_at": started_at,
+                "finished_at": time.time(),
             })
 
-        # Wait for audio to finish playing and speaker output to stop
-        time.sleep(0.3)  # Increased from 0.05 to 0.3 seconds
-        
-        if LATENCY_TRACKING_ENABLED and request_id:
-            log_timing(request_id, "tts", Events.TTS_RESUME_SENT)
-        
+        if held:
+            LOGGER.debug("Listening stays paused for the next sentence [request_id=%s]", request_id)
+        else:
+            if LATENCY_TRACKING_ENABLED and request_id:
+                log_timing(request_id, "tts", Events.TTS_RESUME_SENT,
+                         {"pause_wait_ms": round(pause_wait * 1000, 1),
+                          "resume_guard_ms": round(resume_guard * 1000, 1),
+                          "saved_vs_fixed_sleeps_ms": round(saved_seconds * 1000, 1)})
+            self.resume_listening(request_id)
+
+        return {
+            "duration_seconds": duration,
+            "time_to_first_audio_seconds": first_audio_seconds,
+            "synthesis_ahead_seconds": ahead_seconds,
+            "playback_underruns": underruns,
+            "synthesis_waits": synthesis_waits,
+            "listening_held": held,
+        }
+
+    def resume_listening(self, request_id: str = None) -> None:
+        """Tell STT to listen again (fire-and-forget) and switch the indicator back."""
+        LOGGER.debug("RESUME_LISTENING request_id=%s", request_id)
         post_hearing_action("resume-listening", wait=False)
         # Fire-and-forget external indicator for listening state
         post_indicator_text(INDICATOR_LISTENING_TEXT)
 
 
-def build_flask_app(engine: PiperEngine, synth_args: Dict[str, Any]) -> Flask:
+def build_flask_app(engine: PiperEngine, synth_args: Dict[str, Any], scheduler: TtsScheduler) -> Flask:
     app = Flask(__name__)
 
     @app.route("/health", methods=["GET"])  # simple health check
     def health():
-        return jsonify({"status": "ok", "provider": "CUDA"})
+        return jsonify({"status": "ok", "provider": engine.provider})
 
     # Accept legacy paths as well as root for synthesis
     @app.route("/", methods=["GET", "POST"])  # accept text and play
@@ -415,33 +668,56 @@ def build_flask_app(engine: PiperEngine, synth_args: Dict[str, Any]) -> Flask:
                     break
 
         text = (text or "").strip()
+        body = request.get_json(silent=True) or {}
+        request_id = request.args.get('request_id') or body.get('request_id')
         if not text:
+            # End marker for a reply streamed sentence by sentence: lets STT resume once it's played
+            if request_id and str(request.args.get("end", body.get("end", ""))).lower() in ("1", "true", "yes"):
+                scheduler.end_request(request_id)
+                return jsonify({"status": "ended", "request_id": request_id})
             return jsonify({"error": "No text provided"}), 400
 
-        # Get request_id from query params or form
-        request_id = request.args.get('request_id') or (request.get_json(silent=True) or {}).get('request_id')
+        # Scheduling options from query params or JSON
+        try:
+            priority = int(request.args.get("priority", body.get("priority", 0)))
+        except (TypeError, ValueError):
+            return jsonify({"error": "priority must be an integer"}), 400
+        channel = str(request.args.get("channel", body.get("channel", "default")))
+        supersede = str(request.args.get("supersede", body.get("supersede", ""))).lower() in ("1", "true", "yes")
+        # More sentences of this request_id follow: keep STT paused between them
+        more = str(request.args.get("more", body.get("more", ""))).lower() in ("1", "true", "yes")
+        # Play between the sentences of another streamed reply instead of waiting for it to end
+        interrupt = str(request.args.get("interrupt", body.get("interrupt", ""))).lower() in ("1", "true", "yes")
+        # Sentence number when v34 streams a reply one sentence at a time
+        seq = request.args.get("seq", body.get("seq"))
         
         if LATENCY_TRACKING_ENABLED and request_id:
             log_timing(request_id, "tts", Events.TTS_REQUEST_RECEIVED, 
-                     {"text_length": len(text)})
+                     {"text_length": len(text), "seq": seq})
         
-        LOGGER.info(f"TTS request received: {len(text)} chars [request_id={request_id}]")
-
-        def _worker() -> None:
-            try:
-                LOGGER.info(f"Starting speech synthesis for: '{text[:50]}...' [request_id={request_id}]")
-                engine.speak(text, synth_args, request_id)
-                LOGGER.info("Speech synthesis completed successfully")
-            except Exception as e:
-                LOGGER.error(f"Playback error: {e}", exc_info=True)
+        LOGGER.info(f"TTS request received: {len(text)} chars [request_id={request_id} seq={seq}]")
 
-        threading.Thread(target=_worker, daemon=True).start()
-        return jsonify({"status": "playing", "text": text})
+        job = scheduler.submit(text, synth_args, priority=priority, channel=channel,
+                               supersede=supersede, request_id=request_id, more=more, interrupt=interrupt)
+        if job is None:
+            return jsonify({"error": "TTS queue full of higher-priority speech"}), 429
+        return jsonify({"status": "queued", "text": text, "job_id": job.job_id,
+                        "queue_depth": scheduler.stats()["queue_depth"]})
 
     @app.route("/metrics", methods=["GET"])  # last synthesis metrics
     def metrics():
         with _metrics_lock:
-            return jsonify(dict(_last_metrics))
+            metrics = dict(_last_metrics)
+        metrics["output"] = engine.sink.stats()
+        metrics["audio_cache"] = engine.cache.stats() if engine.cache is not None else None
+        metrics["session"] = engine.session_info
+        metrics["self_benchmark"] = engine.benchmark
+        metrics["queue"] = scheduler.stats()
+        metrics["jaw"] = engine.jaw.stats() if engine.jaw is not None else None
+        if request.args.get("format") == "prometheus":
+            return Response(stage_metrics.prometheus(), mimetype="text/plain; version=0.0.4")
+        metrics["stages"] = stage_metrics.snapshot()
+        return jsonify(metrics)
 
     return app
 
@@ -457,22 +733,91 @@ def main() -> None:
     parser.add_argument("--noise-scale", type=float)
     parser.add_argument("--noise-w", type=float)
     parser.add_argument("--sentence-silence", type=float, default=0.0)
-    # CUDA is required in this variant; no CPU fallback
+    parser.add_argument("--sink", choices=["sounddevice", "wav", "null"], default="sounddevice",
+                        help="Audio output: sound device, a WAV file (--wav-path), or discard (benchmarks)")
+    parser.add_argument("--wav-path", default="tts_output.wav", help="Output file for --sink wav")
+    parser.add_argument("--null-realtime", action="store_true",
+                        help="With --sink null, pace writes at real-time playback speed")
+    parser.add_argument("--cache", action=argparse.BooleanOptionalAction, default=True,
+                        help="Cache synthesized audio for repeated short sentences")
+    parser.add_argument("--cache-dir", default=AUDIO_CACHE_DIR, help="On-disk cache tier ('' for memory only)")
+    parser.add_argument("--cache-memory-mb", type=float, default=AUDIO_CACHE_MEMORY_MB)
+    parser.add_argument("--cache-disk-mb", type=float, default=AUDIO_CACHE_DISK_MB)
+    parser.add_argument("--cache-warmup", default=AUDIO_CACHE_WARMUP_FILE,
+                        help="Text file of phrases (one per line) to render into the cache at startup")
+    parser.add_argument("--resume-guard", type=float, default=RESUME_GUARD_SECONDS,
+                        help="Seconds to wait after the last sample leaves the device before resuming STT")
+    parser.add_argument("--hold-listening", type=float, default=LISTENING_HOLD_SECONDS,
+                        help="Keep STT paused this long for the next sentence of a streamed reply")
+    parser.add_argument("--metrics-windows", type=str, default=",".join(str(w) for w in METRIC_WINDOWS_SECONDS),
+                        help="Comma-separated rolling windows (seconds) for /metrics stage histograms")
+    parser.add_argument("--jaw-target", default=JAW_TARGET,
+                        help="host:port of the jaw motor controller; streams the openness envelope over UDP")
+    parser.add_argument("--jaw-lead", type=float, default=JAW_LEAD_SECONDS,
+                        help="Seconds to send each jaw frame ahead of its audio")
+    parser.add_argument("--max-queue", type=int, default=TTS_QUEUE_MAX_JOBS, help="Maximum queued TTS jobs")
+    parser.add_argument("--lookahead", action=argparse.BooleanOptionalAction, default=TTS_LOOKAHEAD,
+                        help="Synthesize the next queued job during current playback")
+    parser.add_argument("--device", choices=["cuda", "cpu", "auto"], default="cuda",
+                        help="ONNX Runtime execution provider (auto = CUDA if available, else CPU)")
+    parser.add_argument("--variant", choices=list(MODEL_VARIANTS), default="fp32",
+                        help="Model variant: fp16/int8 load <model>_fp16.onnx / <model>_int8.onnx")
+    parser.add_argument("--intra-op-threads", type=int, default=0, help="CPU: threads per operator (0 = onnxruntime default)")
+    parser.add_argument("--inter-op-threads", type=int, default=0, help="CPU: threads across independent operators")
+    parser.add_argument("--graph-optimization", choices=list(GRAPH_OPTIMIZATION_LEVELS), default="all")
+    parser.add_argument("--cpu-mem-arena", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--mem-pattern", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--spinning", action=argparse.BooleanOptionalAction, default=True,
+                        help="CPU: let idle worker threads spin (lower latency, higher idle CPU)")
+    parser.add_argument("--self-benchmark", action="store_true", help="Measure real-time factor at startup")
+    parser.add_argument("--benchmark-sweep", type=str, default=None,
+                        help="CPU: comma-separated intra-op thread counts to benchmark across all model variants, then exit")
     parser.add_argument("--debug", action="store_true")
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.DEBUG if args.debug else logging.INFO)
 
+    global stage_metrics
+    stage_metrics = StageMetrics(METRIC_STAGES, [float(w) for w in args.metrics_windows.split(",")])
+
     if ort is not None:
         try:
             LOGGER.info("onnxruntime version: %s, providers: %s", ort.__version__, ort.get_available_providers())
         except Exception:
             pass
 
-    model_path = Path(args.model).resolve()
+    base_model_path = Path(args.model).resolve()
+    model_path = model_variant_path(base_model_path, args.variant)
+    # Variants share the fp32 model's voice config
     config_path = Path(args.config).resolve() if args.config else None
 
-    engine = PiperEngine(model_path=model_path, config_path=config_path)
+    def _session_options(intra_op_threads: int) -> Any:
+        return cpu_session_options(
+            intra_op_threads=intra_op_threads,
+            inter_op_threads=args.inter_op_threads,
+            graph_optimization=args.graph_optimization,
+            cpu_mem_arena=args.cpu_mem_arena,
+            mem_pattern=args.mem_pattern,
+            allow_spinning=args.spinning,
+        )
+
+    sink = make_sink("null" if args.benchmark_sweep else args.sink, wav_path=args.wav_path, realtime=args.null_realtime)
+    cache = None
+    if args.cache:
+        cache = AudioCache(
+            memory_max_bytes=int(args.cache_memory_mb * 1024 * 1024),
+            disk_dir=args.cache_dir or None,
+            disk_max_bytes=int(args.cache_disk_mb * 1024 * 1024),
+            max_text_chars=AUDIO_CACHE_MAX_CHARS,
+        )
+    engine = PiperEngine(
+        model_path=model_path,
+        config_path=config_path,
+        sink=sink,
+        cache=cache,
+        device=args.device,
+        session_options=_session_options(args.intra_op_threads) if args.device != "cuda" else None,
+    )
 
     synth_args: Dict[str, Any] = {
         "speaker_id": args.speaker,
@@ -484,7 +829,58 @@ def main() -> None:
 
     LOGGER.info(f"TTS Speed Configuration: length_scale={args.length_scale} (lower=faster, via SynthesisConfig)")
 
-    app = build_flask_app(engine, synth_args)
+    sample_rate = int(getattr(engine.voice.config, "sample_rate", 22050))
+
+    def _rtf() -> Dict[str, Any]:
+        return benchmark_rtf(lambda text: engine.synthesize_array(text, synth_args), sample_rate)
+
+    if args.benchmark_sweep:
+        if engine.provider != "CPU":
+            parser.error("--benchmark-sweep needs --device cpu")
+        results = []
+        for variant in MODEL_VARIANTS:
+            variant_path = model_variant_path(base_model_path, variant)
+            if not variant_path.exists():
+                LOGGER.info(f"Sweep: skipping {variant} ({variant_path.name} not found)")
+                continue
+            for threads in (int(t) for t in args.benchmark_sweep.split(",")):
+                engine.voice.session = load_cpu_session(variant_path, _session_options(threads))
+                result = {"variant": variant, "intra_op_threads": threads, **_rtf()}
+                results.append(result)
+                LOGGER.info(f"Sweep: {variant} threads={threads} rtf={result['rtf']} first_sentence_ms={result['first_sentence_ms']}")
+        if results:
+            best = min(results, key=lambda r: r["rtf"] or float("inf"))
+            LOGGER.info(f"Fastest: --variant {best['variant']} --intra-op-threads {best['intra_op_threads']} (rtf={best['rtf']})")
+        return
+
+    if args.self_benchmark:
+        engine.benchmark = {"provider": engine.provider, "variant": args.variant, **_rtf()}
+        LOGGER.info(f"Self-benchmark: rtf={engine.benchmark['rtf']} first_sentence_ms={engine.benchmark['first_sentence_ms']} "
+                    f"({engine.provider}, {args.variant})")
+
+    if cache is not None:
+        phrases = load_warmup_phrases(args.cache_warmup)
+        if phrases:
+            def _warm() -> None:
+                try:
+                    count = engine.warm_cache(phrases, synth_args)
+                    LOGGER.info(f"Audio cache warm-up: {count} sentences rendered from {len(phrases)} phrases")
+                except Exception as e:
+                    LOGGER.warning(f"Audio cache warm-up failed: {e}")
+            threading.Thread(target=_warm, name="tts-cache-warmup", daemon=True).start()
+
+    engine.resume_guard_seconds = args.resume_guard
+    if args.jaw_target:
+        jaw_host, jaw_port = args.jaw_target.rsplit(":", 1)
+        engine.jaw = JawStreamer(jaw_host, int(jaw_port), int(getattr(engine.voice.config, "sample_rate", 22050)),
+                                 lead_seconds=args.jaw_lead)
+        LOGGER.info(f"Jaw envelope streaming to {args.jaw_target} (lead {args.jaw_lead}s)")
+
+    scheduler = TtsScheduler(engine, max_queue=args.max_queue, lookahead=args.lookahead, metrics=stage_metrics,
+                             hold_seconds=args.hold_listening)
+    scheduler.start()
+
+    app = build_flask_app(engine, synth_args, scheduler)
     app.run(host=args.host, port=args.port, threaded=True)
 
 
@@ -0,0 +1,209 @@
+# tts_benchmark.py
+# TTS benchmark: drives PiperEngine.speak() directly into a NullSink (no speakers,
+# no STT pause/resume, no indicator posts) and sweeps text length, length_scale,
+# execution provider and CPU thread count. Reports time to first chunk, total
+# synthesis time, real-time factor and peak RSS, and writes JSON so runs can be
+# compared against each other (--compare previous.json).
+#
+# Usage:
+#   python tts_benchmark.py --providers cpu --threads 1,2,4 --out cpu_sweep.json
+#   python tts_benchmark.py --providers cuda,cpu --length-scales 0.6,1.0 --compare cpu_sweep.json
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None  # peak RSS falls back to the process high-water mark
+
+import timmy_speaks_cuda
+from audio_output import NullSink
+from ort_session import cpu_session_options, model_variant_path
+
+# Sentences in Timmy's register; cycled to build each text length
+BENCHMARK_CORPUS = [
+    "Well, well. Look who finally decided to show up.",
+    "I appear to be having trouble speaking. How embarrassing.",
+    "That is, without question, the worst idea you have had all week.",
+    "Fine, I will help, but only because watching you struggle is getting tedious.",
+    "The heater needs a new thermocouple, not another one of your clever workarounds.",
+    "Do try to keep up; I am a skeleton, and even I find this slow.",
+]
+
+
+def build_text(target_chars: int) -> str:
+    """Whole corpus sentences, cycled, until the text reaches target_chars (at least one sentence)."""
+    sentences: List[str] = []
+    length = 0
+    index = 0
+    while length < target_chars or not sentences:
+        sentence = BENCHMARK_CORPUS[index % len(BENCHMARK_CORPUS)]
+        sentences.append(sentence)
+        length += len(sentence) + 1
+        index += 1
+    return " ".join(sentences)
+
+
+class RssSampler:
+    """Samples process RSS every 10 ms in the background and keeps the peak since reset()."""
+
+    def __init__(self) -> None:
+        self.peak = 0
+        self._process = psutil.Process(os.getpid()) if psutil is not None else None
+        if self._process is not None:
+            threading.Thread(target=self._run, name="rss-sampler", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            time.sleep(0.01)
+
+    def reset(self) -> None:
+        if self._process is not None:
+            self.peak = self._process.memory_info().rss
+
+    def peak_mb(self) -> Optional[float]:
+        if self._process is not None:
+            return round(self.peak / (1024 * 1024), 1)
+        try:
+            import resource  # Unix only: lifetime high-water mark, in KB on Linux
+            return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        except ImportError:
+            return None
+
+
+def _quiet_engine_side_effects() -> None:
+    # Benchmarks must not pause the STT server, poke the eye display or sleep on handshakes
+    timmy_speaks_cuda.HEARING_SERVER_URL = None
+    timmy_speaks_cuda.SKULL_EYE_ENDPOINT = None
+    timmy_speaks_cuda.PAUSE_UNCONFIRMED_WAIT_SECONDS = 0.0
+
+
+def run_case(engine: Any, sink: NullSink, text: str, synth_args: Dict[str, Any], runs: int,
+             sampler: RssSampler) -> Dict[str, Any]:
+    sample_rate = int(getattr(engine.voice.config, "sample_rate", 22050))
+    engine.speak(text, synth_args)  # warm-up: session allocations, kernel selection
+    sampler.reset()
+
+    first_chunk_ms, synth_seconds, rtfs = [], [], []
+    audio_seconds = 0.0
+    for _ in range(runs):
+        before = sink.samples_written
+        stats = engine.speak(text, synth_args)
+        audio_seconds = (sink.samples_written - before) / sample_rate
+        first_chunk_ms.append(stats["time_to_first_audio_seconds"] * 1000)
+        synth_seconds.append(stats["duration_seconds"])
+        rtfs.append(stats["duration_seconds"] / audio_seconds if audio_seconds else float("nan"))
+
+    return {
+        "chars": len(text),
+        "runs": runs,
+        "audio_seconds": round(audio_seconds, 3),
+        "first_chunk_ms": {"median": round(statistics.median(first_chunk_ms), 1),
+                           "min": round(min(first_chunk_ms), 1), "max": round(max(first_chunk_ms), 1)},
+        "synthesis_seconds": {"median": round(statistics.median(synth_seconds), 4),
+                              "min": round(min(synth_seconds), 4), "max": round(max(synth_seconds), 4)},
+        "rtf": round(statistics.median(rtfs), 4),
+        "peak_rss_mb": sampler.peak_mb(),
+    }
+
+
+def case_key(result: Dict[str, Any]) -> tuple:
+    return (result["provider"], result["variant"], result["intra_op_threads"], result["length_scale"], result["target_chars"])
+
+
+def compare(results: List[Dict[str, Any]], previous_path: str) -> None:
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {case_key(r): r for r in json.load(f)["results"]}
+    print(f"\nComparison with {previous_path} (negative = faster now):")
+    for result in results:
+        old = previous.get(case_key(result))
+        if old is None:
+            continue
+        d_first = result["first_chunk_ms"]["median"] - old["first_chunk_ms"]["median"]
+        d_rtf = result["rtf"] - old["rtf"]
+        print(f"  {result['provider']}/{result['variant']} threads={result['intra_op_threads']} "
+              f"ls={result['length_scale']} chars={result['target_chars']}: "
+              f"first_chunk {d_first:+.1f} ms, rtf {d_rtf:+.4f}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark PiperEngine synthesis without audio hardware")
+    parser.add_argument("-m", "--model", default=str(Path("models") / "skeletor_v1.onnx"))
+    parser.add_argument("-c", "--config", default=str(Path("models") / "skeletor_v1.onnx.json"))
+    parser.add_argument("--variant", default="fp32", help="Model variant (fp32, fp16, int8)")
+    parser.add_argument("--providers", default="cpu", help="Comma-separated: cuda, cpu")
+    parser.add_argument("--threads", default="0", help="CPU intra-op thread counts to sweep (0 = onnxruntime default)")
+    parser.add_argument("--lengths", default="20,80,200,500", help="Text lengths in characters")
+    parser.add_argument("--length-scales", default=str(timmy_speaks_cuda.DEFAULT_SPEECH_SPEED))
+    parser.add_argument("--runs", type=int, default=3, help="Measured runs per case (after one warm-up)")
+    parser.add_argument("--out", default="tts_benchmark_results.json")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to diff against")
+    args = parser.parse_args()
+
+    _quiet_engine_side_effects()
+    model_path = model_variant_path(Path(args.model).resolve(), args.variant)
+    config_path = Path(args.config).resolve() if args.config else None
+    lengths = [int(n) for n in args.lengths.split(",")]
+    length_scales = [float(v) for v in args.length_scales.split(",")]
+    sampler = RssSampler()
+
+    results: List[Dict[str, Any]] = []
+    for provider in args.providers.split(","):
+        thread_counts = [int(t) for t in args.threads.split(",")] if provider == "cpu" else [None]
+        for threads in thread_counts:
+            sink = NullSink()
+            engine = timmy_speaks_cuda.PiperEngine(
+                model_path=model_path,
+                config_path=config_path,
+                sink=sink,
+                device=provider,
+                session_options=cpu_session_options(intra_op_threads=threads) if provider == "cpu" else None,
+            )
+            engine.resume_guard_seconds = 0.0
+            for length_scale in length_scales:
+                synth_args = {"length_scale": length_scale, "noise_scale": 0.667, "noise_w": 0.8,
+                              "speaker_id": None, "sentence_silence": 0.0}
+                for target_chars in lengths:
+                    result = {
+                        "provider": provider,
+                        "variant": args.variant,
+                        "intra_op_threads": threads,
+                        "length_scale": length_scale,
+                        "target_chars": target_chars,
+                        **run_case(engine, sink, build_text(target_chars), synth_args, args.runs, sampler),
+                    }
+                    results.append(result)
+                    print(f"[BENCH] {provider} threads={threads} ls={length_scale} chars={result['chars']}: "
+                          f"first_chunk={result['first_chunk_ms']['median']}ms "
+                          f"synth={result['synthesis_seconds']['median']}s rtf={result['rtf']} "
+                          f"rss={result['peak_rss_mb']}MB")
+            del engine
+
+    output = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": {"platform": platform.platform(), "python": platform.python_version(), "cpu_count": os.cpu_count()},
+        "config": {"model": str(model_path), "runs": args.runs},
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2)
+    print(f"[OK] Results written to {args.out}")
+
+    if args.compare:
+        compare(results, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,345 @@
+# tts_scheduler.py
+# Single playback scheduler for the Piper TTS server.
+# /speak requests become jobs in one ordered queue (higher priority first, FIFO
+# within a priority) played by one worker thread, instead of a thread per request
+# contending on the engine lock. A new job can supersede queued jobs on its
+# channel, the queue depth is bounded, and while one job plays the next job's
+# audio is synthesized ahead so it can start as soon as the speaker is free.
+# A reply streamed one sentence per request (same request_id, more=true on all but
+# the end) keeps STT listening paused from its first sentence until its end marker,
+# instead of a pause/resume round trip around every sentence. While a reply holds
+# STT paused, other requests wait for it unless they are sent with interrupt=true
+# (or supersede=true on the reply's channel).
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+LOGGER = logging.getLogger("timmy_hears_cuda")
+
+
+class TtsJob:
+    """One queued utterance."""
+
+    def __init__(self, job_id: int, text: str, synth_args: Dict[str, Any], priority: int = 0,
+                 channel: str = "default", request_id: Optional[str] = None, more: bool = False,
+                 supersede: bool = False, interrupt: bool = False) -> None:
+        self.job_id = job_id
+        self.text = text
+        self.synth_args = synth_args
+        self.priority = priority
+        self.channel = channel
+        self.request_id = request_id
+        self.more = more  # more sentences of this request_id will follow
+        self.supersede = supersede
+        self.interrupt = interrupt  # may cut into another reply between its sentences
+        self.enqueued_at = time.perf_counter()
+        self.prepared = None  # PreparedUtterance once look-ahead synthesis has started
+
+    def sort_key(self) -> tuple:
+        return (-self.priority, self.job_id)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "priority": self.priority,
+            "channel": self.channel,
+            "request_id": self.request_id,
+            "more": self.more,
+            "chars": len(self.text),
+            "waiting_seconds": round(time.perf_counter() - self.enqueued_at, 3),
+            "prepared": self.prepared is not None,
+        }
+
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 4),
+        "p50": round(ordered[len(ordered) // 2], 4),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 4),
+        "max": round(ordered[-1], 4),
+    }
+
+
+class TtsScheduler:
+    """
+    Ordered TTS job queue played by a single worker.
+
+    engine must provide prepare(text, synth_args) -> PreparedUtterance | None,
+    speak(text, synth_args, request_id, prepared=..., pause_listening=..., hold_listening=...)
+    -> stats dict, and resume_listening(request_id).
+
+    Listening stays paused after a job while another job with its request_id is queued
+    or the request is still open (submitted with more=True and no end yet). If nothing
+    arrives within hold_seconds of the last sentence or playback end, the worker resumes
+    listening itself.
+    """
+
+    def __init__(self, engine: Any, max_queue: int = 16, lookahead: bool = True, metrics: Any = None,
+                 hold_seconds: float = 3.0) -> None:
+        self.engine = engine
+        self.metrics = metrics  # StageMetrics, observes queue_wait_seconds
+        self.max_queue = max_queue
+        self.lookahead = lookahead
+        self.hold_seconds = hold_seconds
+        self._queue: List[TtsJob] = []
+        self._current: Optional[TtsJob] = None
+        self._open: Dict[str, float] = {}  # request_id -> hold deadline, while more sentences are expected
+        self._held: Optional[str] = None  # request_id whose STT pause outlived its last job
+        self._held_channel: Optional[str] = None
+        self._cond = threading.Condition()
+        self._ids = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self.wait_seconds: "deque[float]" = deque(maxlen=200)
+        self.ahead_seconds: "deque[float]" = deque(maxlen=200)
+        self.counters = {
+            "submitted": 0,
+            "completed": 0,
+            "failed": 0,
+            "superseded": 0,
+            "dropped_overflow": 0,
+            "rejected": 0,
+            "lookahead_started": 0,
+            "lookahead_used": 0,
+            "listening_held": 0,
+            "hold_expired": 0,
+            "hold_preempted": 0,
+        }
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="tts-scheduler", daemon=True)
+            self._thread.start()
+
+    def submit(self, text: str, synth_args: Dict[str, Any], priority: int = 0, channel: str = "default",
+               supersede: bool = False, request_id: Optional[str] = None, more: bool = False,
+               interrupt: bool = False) -> Optional[TtsJob]:
+        """
+        Queue text for playback. Returns the job, or None if the queue is full of
+        higher-priority work.
+
+        supersede=True drops queued (not yet playing) jobs on the same channel whose
+        priority is not higher than this one's. more=True marks text as one sentence
+        of a longer reply: the request stays open until a job without more, or end_request().
+        interrupt=True lets this job play between the sentences of a reply holding STT
+        paused; otherwise it waits until that reply is done.
+        """
+        dropped: List[TtsJob] = []
+        with self._cond:
+            self.counters["submitted"] += 1
+            if request_id is not None:
+                if more:
+                    self._open[request_id] = time.perf_counter() + self.hold_seconds
+                else:
+                    self._open.pop(request_id, None)
+                self._cond.notify_all()
+            job = TtsJob(next(self._ids), text, synth_args, priority, channel, request_id, more,
+                         supersede, interrupt)
+            if supersede:
+                keep = []
+                for queued in self._queue:
+                    if queued.channel == channel and queued.priority <= priority:
+                        dropped.append(queued)
+                    else:
+                        keep.append(queued)
+                self._queue = keep
+                self.counters["superseded"] += len(dropped)
+            # Sentences of the reply being spoken are neither evicted nor counted against
+            # max_queue: dropping one would cut a sentence out of the middle of the reply
+            evictable = [queued for queued in self._queue if not self._in_reply_locked(queued.request_id)]
+            if not self._in_reply_locked(request_id) and len(evictable) >= self.max_queue:
+                # Lowest priority loses; among equals the oldest is the most stale
+                worst = min(evictable, key=lambda j: (j.priority, j.job_id))
+                if worst.priority > priority:
+                    self.counters["rejected"] += 1
+                    job = None
+                else:
+                    self._queue.remove(worst)
+                    dropped.append(worst)
+                    self.counters["dropped_overflow"] += 1
+            if job is not None:
+                self._queue.append(job)
+                self._queue.sort(key=TtsJob.sort_key)
+                self._cond.notify()
+                # The playing job may have finished synthesizing already; start this one now
+                current = self._current
+                if current is not None and current.prepared is not None and current.prepared.done.is_set():
+                    self._prepare_head_locked()
+
+        for old in dropped:
+            LOGGER.info(f"TTS job {old.job_id} dropped [request_id={old.request_id}]")
+            if old.prepared is not None:
+                old.prepared.cancel()
+        return job
+
+    def end_request(self, request_id: str) -> None:
+        """No more sentences will follow for request_id; resume listening once it is played out."""
+        with self._cond:
+            self._open.pop(request_id, None)
+            self._cond.notify_all()
+
+    def _in_reply_locked(self, request_id: Optional[str]) -> bool:
+        """request_id belongs to the reply now playing, or holding STT paused between sentences."""
+        if request_id is None:
+            return False
+        current = self._current
+        return request_id == self._held or (current is not None and current.request_id == request_id)
+
+    def _continues_locked(self, request_id: Optional[str]) -> bool:
+        if request_id is None:
+            return False
+        return request_id in self._open or any(queued.request_id == request_id for queued in self._queue)
+
+    def _hold_listening(self, job: TtsJob) -> bool:
+        """Called by speak() once the job is played out: keep STT paused for the next sentence?"""
+        with self._cond:
+            if not self._continues_locked(job.request_id):
+                return False
+            self._held = job.request_id
+            self._held_channel = job.channel
+            if job.request_id in self._open:
+                # The next sentence gets a full hold_seconds from the end of this one
+                self._open[job.request_id] = time.perf_counter() + self.hold_seconds
+            self.counters["listening_held"] += 1
+            return True
+
+    def _next_index_locked(self) -> Optional[int]:
+        """Queue index of the job that may take the speaker next, or None if every queued job must wait."""
+        if not self._queue:
+            return None
+        if self._held is None:
+            return 0
+        # A reply holds STT paused between sentences: its own sentences go first, whatever
+        # else is queued, so nothing plays (or resumes STT) in the middle of it
+        for index, queued in enumerate(self._queue):
+            if queued.request_id == self._held:
+                return index
+        for index, queued in enumerate(self._queue):
+            if queued.interrupt or (queued.supersede and queued.channel == self._held_channel):
+                return index
+        return None
+
+    def _next_job_locked(self) -> Optional[TtsJob]:
+        index = self._next_index_locked()
+        if index is None:
+            return None
+        job = self._queue.pop(index)
+        if self._held is not None and job.request_id != self._held:
+            # Explicit preemption ends the reply's hold; this job takes over the paused STT
+            LOGGER.info(f"TTS job {job.job_id} interrupts held reply [request_id={self._held}]")
+            self._open.pop(self._held, None)
+            self.counters["hold_preempted"] += 1
+        return job
+
+    def _run(self) -> None:
+        while True:
+            release = None
+            with self._cond:
+                while True:
+                    job = self._next_job_locked()
+                    if job is not None:
+                        break
+                    if self._held is None:
+                        self._cond.wait()
+                        continue
+                    remaining = self._open.get(self._held, 0.0) - time.perf_counter()
+                    if remaining <= 0:
+                        # Reply ended (or its next sentence never came); queued jobs may play now
+                        release, self._held = self._held, None
+                        if self._open.pop(release, None) is not None:
+                            self.counters["hold_expired"] += 1
+                        break
+                    self._cond.wait(remaining)
+                if release is None:
+                    self._current = job
+                    # STT is still paused from the held reply's previous sentence
+                    continuing = self._held is not None
+                    self._held = None
+                    wait = time.perf_counter() - job.enqueued_at
+                    self.wait_seconds.append(wait)
+                    if job.prepared is not None:
+                        self.counters["lookahead_used"] += 1
+
+            if release is not None:
+                LOGGER.info(f"Resuming listening after held reply [request_id={release}]")
+                self.engine.resume_listening(release)
+                continue
+
+            if self.metrics is not None:
+                self.metrics.observe("queue_wait_seconds", wait)
+            stats: Dict[str, Any] = {}
+            outcome = "completed"
+            try:
+                if job.prepared is None:
+                    job.prepared = self.engine.prepare(job.text, job.synth_args)
+                if job.prepared is not None and self.lookahead:
+                    threading.Thread(target=self._prepare_next, args=(job.prepared,),
+                                     name="tts-lookahead", daemon=True).start()
+                LOGGER.info(f"Starting speech synthesis for: '{job.text[:50]}...' [job={job.job_id} request_id={job.request_id}]")
+                stats = self.engine.speak(job.text, job.synth_args, job.request_id, prepared=job.prepared,
+                                          pause_listening=not continuing,
+                                          hold_listening=lambda: self._hold_listening(job))
+                LOGGER.info("Speech synthesis completed successfully")
+            except Exception as e:
+                outcome = "failed"
+                LOGGER.error(f"Playback error: {e}", exc_info=True)
+                # speak() may have paused STT without reaching its resume
+                with self._cond:
+                    self._held = None
+                self.engine.resume_listening(job.request_id)
+            with self._cond:
+                self._current = None
+                self.counters[outcome] += 1
+                if stats.get("synthesis_ahead_seconds") is not None:
+                    self.ahead_seconds.append(stats["synthesis_ahead_seconds"])
+
+    def _prepare_next(self, current: Any) -> None:
+        """Once the playing job is fully synthesized, start synthesizing the next queued one."""
+        current.done.wait()
+        with self._cond:
+            self._prepare_head_locked()
+
+    def _prepare_head_locked(self) -> None:
+        # One job of look-ahead: more would only hold audio for jobs that may be superseded
+        index = self._next_index_locked() if self.lookahead else None
+        if index is None or self._queue[index].prepared is not None:
+            return
+        job = self._queue[index]
+        try:
+            job.prepared = self.engine.prepare(job.text, job.synth_args)
+        except Exception as e:
+            LOGGER.warning(f"Look-ahead synthesis failed to start for job {job.job_id}: {e}")
+            return
+        if job.prepared is not None:
+            self.counters["lookahead_started"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            queued = [job.describe() for job in self._queue]
+            current = self._current.describe() if self._current else None
+            counters = dict(self.counters)
+            wait_seconds = list(self.wait_seconds)
+            ahead_seconds = list(self.ahead_seconds)
+            open_requests = list(self._open)
+            held = self._held
+        return {
+            "queue_depth": len(queued),
+            "max_queue": self.max_queue,
+            "lookahead": self.lookahead,
+            "open_requests": len(open_requests),
+            "listening_held_for": held,
+            "current": current,
+            "queued": queued,
+            "wait_seconds": _summary(wait_seconds),
+            "synthesis_ahead_seconds": _summary(ahead_seconds),
+            "counters": counters,
+        }
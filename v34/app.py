@@ -14,7 +14,6 @@ import sys
 from pathlib import Path
 from flask import Flask, render_template, request
 from flask_socketio import SocketIO, emit
-from sentence_transformers import SentenceTransformer
 from collections import deque
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -25,6 +24,9 @@ import llm
 import memory
 import vision_state
 import fine_tuning_capture
+import prefetch
+import ingest
+import embedding_service
 
 # Add shared directory to path for latency tracking
 shared_dir = Path(__file__).parent.parent / "shared"
@@ -140,6 +142,8 @@ def _health_check_loop():
 utils.nltk_data_check()
 memory.init_db_pool()
 atexit.register(memory.close_db_pool)
+# atexit runs in reverse order: pending memory writes are flushed before the pool closes
+atexit.register(ingest.get_queue().shutdown)
 # Set current session for vision manager so prompt builders can fetch observations
 try:
     vision_state.set_current_session(SESSION_ID)
@@ -147,19 +151,123 @@ except Exception:
     pass
 
 # --- Application Logic ---
-embed_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', device='cuda')
+# Runs each turn's retrieval (query embedding + pgvector) alongside classification
+turn_executor = ThreadPoolExecutor(max_workers=getattr(config, "TURN_PARALLEL_WORKERS", 2),
+                                   thread_name_prefix="turn-stage")
 
 
 
+def send_to_tts(text: str, request_id=None, seq=None, more=False):
+    """
+    Queue text on the TTS server (it returns as soon as the job is queued).
+    more=True: further sentences of this request_id follow, so TTS keeps STT paused
+    until end_tts_request(request_id).
+    """
+    try:
+        proxies = {'http': None, 'https': None}
+        tts_params = {"text": text}
+        if request_id:
+            tts_params["request_id"] = request_id
+        if seq is not None:
+            tts_params["seq"] = seq
+        if more:
+            tts_params["more"] = 1
+        # Use session for connection pooling (reduces latency)
+        eventlet.tpool.execute(http_session.get, config.TTS_API_URL, params=tts_params, timeout=2, proxies=proxies)
+    except requests.exceptions.RequestException as e:
+        utils.debug_print(f"*** Debug: Could not connect to TTS API: {e}")
+
+def end_tts_request(request_id):
+    """Tell TTS a streamed reply is complete, so STT resumes after its last sentence."""
+    try:
+        proxies = {'http': None, 'https': None}
+        eventlet.tpool.execute(http_session.get, config.TTS_API_URL,
+                               params={"request_id": request_id, "end": 1}, timeout=2, proxies=proxies)
+    except requests.exceptions.RequestException as e:
+        utils.debug_print(f"*** Debug: Could not connect to TTS API: {e}")
+
+class TtsSentenceStream:
+    """
+    on_sentence callback for llm.generate_api_call: sends each sentence to TTS in order.
+    Call close() when generation ends (also on error) so TTS can resume listening.
+    """
+
+    def __init__(self, request_id=None, turn_start=None):
+        self.request_id = request_id
+        # TTS groups the reply's sentences by request_id, so the web UI path needs one too
+        self.reply_id = request_id or str(uuid.uuid4())
+        self.turn_start = turn_start or time.time()
+        self.sent = 0
+
+    def __call__(self, sentence: str):
+        self.sent += 1
+        if self.sent == 1:
+            utils.debug_print(f"*** Debug: First sentence to TTS after {time.time() - self.turn_start:.2f}s [request_id={self.request_id}]")
+            if LATENCY_TRACKING_ENABLED and self.request_id:
+                log_timing(self.request_id, "v34", Events.V34_FIRST_SENTENCE_TO_TTS,
+                         {"sentence_length": len(sentence),
+                          "since_webhook_ms": round((time.time() - self.turn_start) * 1000, 2)})
+        send_to_tts(sentence, self.reply_id, seq=self.sent, more=True)
+
+    def close(self):
+        if self.sent:
+            end_tts_request(self.reply_id)
+
 def is_important_user_message(msg: str) -> tuple[bool, dict]:
     """Determines if a user message is important enough to embed."""
     metadata = llm.fast_generate_metadata(msg)
     should_embed = metadata.get("importance", 0) >= 2
     return should_embed, metadata
 
-def process_user_message(user_input: str, request_id=None):
+def _classify_stage(user_input: str, prefetched, request_id=None) -> tuple[bool, dict]:
+    """Metadata classification for the turn (reused from a prefetch when available)."""
+    t1 = time.time()
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "v34", Events.V34_CLASSIFICATION_START)
+    
+    if prefetched:
+        user_metadata = prefetched.metadata
+        should_embed_user = user_metadata.get("importance", 0) >= 2
+        utils.debug_print(f"*** Prefetch: reusing classification from partial '{prefetched.text}'")
+    else:
+        should_embed_user, user_metadata = is_important_user_message(user_input)
+    
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "v34", Events.V34_CLASSIFICATION_COMPLETE, 
+                 {"importance": user_metadata.get("importance")})
+    
+    utils.debug_print(f"--- Step 1 (Metadata Generation) took: {time.time() - t1:.2f}s")
+    return should_embed_user, user_metadata
+
+def _retrieve_stage(user_input: str, prefetched, request_id=None) -> list:
+    """Memory retrieval for the turn (query embedding + pgvector), run on turn_executor."""
+    t3 = time.time()
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "v34", Events.V34_RETRIEVAL_START)
+    
+    relevant_chunks = []
+    if getattr(config, "RETRIEVAL_ENABLED", True):
+        if prefetched:
+            # History now includes this user message; re-apply the history dedup the normal path does
+            relevant_chunks = [c for c in prefetched.chunks
+                               if not memory.is_duplicate_chunk(c["text"], utils.conversation_history)]
+        else:
+            relevant_chunks = memory.retrieve_unique_relevant_chunks(user_input, request_id=request_id)
+        utils.debug_print(f"*** Debug: Retrieved {len(relevant_chunks)} memory chunks for context")
+    else:
+        utils.debug_print("*** Debug: Retrieval disabled by config.RETRIEVAL_ENABLED=False (KV/session-only mode)")
+    
+    if LATENCY_TRACKING_ENABLED and request_id:
+        log_timing(request_id, "v34", Events.V34_RETRIEVAL_COMPLETE, 
+                 {"num_chunks": len(relevant_chunks)})
+    
+    utils.debug_print(f"--- Step 4 (Context Retrieval) took: {time.time() - t3:.2f}s")
+    return relevant_chunks
+
+def process_user_message(user_input: str, request_id=None, on_sentence=None):
     """
     Core logic to process a user's message, generate a response, and interact with memory.
+    on_sentence, if given, receives each sentence of the response while it is generated.
     """
     start_time = time.time()
     utils.debug_print(f"*** Debug: Processing user message: {user_input} [request_id={request_id}]")
@@ -180,24 +288,38 @@ def process_user_message(user_input: str, request_id=None):
         except Exception as e:
             utils.debug_print(f"*** Fine-tuning capture error: {e}")
     
-    # 2. Metadata generation
-    t1 = time.time()
-    if LATENCY_TRACKING_ENABLED and request_id:
-        log_timing(request_id, "v34", Events.V34_CLASSIFICATION_START)
-    
-    should_embed_user, user_metadata = is_important_user_message(user_input)
-    
-    if LATENCY_TRACKING_ENABLED and request_id:
-        log_timing(request_id, "v34", Events.V34_CLASSIFICATION_COMPLETE, 
-                 {"importance": user_metadata.get("importance")})
-    
-    utils.debug_print(f"--- Step 1 (Metadata Generation) took: {time.time() - t1:.2f}s")
-    
-    # 3. Add user message to conversation history
+    # Reuse speculative classification/retrieval computed from STT partials, if any
+    prefetched = None
+    if getattr(config, "PREFETCH_ENABLED", True):
+        prefetch_cache = prefetch.get_cache()
+        prefetched = prefetch_cache.lookup(user_input)
+        # Everything cached so far predates this turn's history and memory writes
+        prefetch_cache.invalidate()
+        if LATENCY_TRACKING_ENABLED and request_id:
+            if prefetched:
+                log_timing(request_id, "v34", Events.V34_PREFETCH_HIT,
+                           {"prefetched_text": prefetched.text, "prefetch_duration_ms": prefetched.duration_ms,
+                            "age_ms": round((time.time() - prefetched.created) * 1000, 2)})
+            else:
+                log_timing(request_id, "v34", Events.V34_PREFETCH_MISS, {})
+
+    # 2. Add user message to conversation history (retrieval dedups against it)
     utils.conversation_history.append({"role": "user", "content": user_input})
     utils.trim_history_if_needed()
     
-    # 3. Memory operations
+    write_behind = getattr(config, "MEMORY_WRITE_BEHIND_ENABLED", True)
+    if write_behind:
+        # Read-your-writes: earlier messages from this session must be committed before we retrieve
+        ingest.get_queue().wait_for(SESSION_ID, timeout=getattr(config, "INGEST_READ_TIMEOUT_SECONDS", 5.0))
+    
+    # 3. Classification and retrieval are independent: run retrieval on the turn pool while
+    #    this thread classifies, so the turn waits max(classification, retrieval), not the sum
+    t1 = time.time()
+    parallel = getattr(config, "TURN_PARALLEL_ENABLED", True)
+    retrieval_future = turn_executor.submit(_retrieve_stage, user_input, prefetched, request_id) if parallel else None
+    should_embed_user, user_metadata = _classify_stage(user_input, prefetched, request_id)
+    
+    # Memory operations
     t2 = time.time()
     # Always store user message importance> threshold, independent of retrieval toggle
     if should_embed_user:
@@ -205,11 +327,15 @@ def process_user_message(user_input: str, request_id=None):
         if LATENCY_TRACKING_ENABLED and request_id:
             log_timing(request_id, "v34", "v34_memory_storage_start", {})
         
-        memory.chunk_and_store_text(user_input, role="user", metadata=user_metadata, session_id=SESSION_ID, request_id=request_id)
+        if write_behind:
+            # Stored by the ingest worker while retrieval and generation run
+            ingest.get_queue().submit(user_input, role="user", metadata=user_metadata, session_id=SESSION_ID, request_id=request_id)
+        else:
+            memory.chunk_and_store_text(user_input, role="user", metadata=user_metadata, session_id=SESSION_ID, request_id=request_id)
         
         if LATENCY_TRACKING_ENABLED and request_id:
             log_timing(request_id, "v34", "v34_memory_storage_complete", 
-                     {"duration_ms": round((time.time() - t2) * 1000, 2)})
+                     {"duration_ms": round((time.time() - t2) * 1000, 2), "write_behind": write_behind})
     
     storage_duration = time.time() - t2
     utils.debug_print(f"--- Step 3 (Memory Storage) took: {storage_duration:.2f}s")
@@ -218,19 +344,12 @@ def process_user_message(user_input: str, request_id=None):
     if LATENCY_TRACKING_ENABLED and request_id:
         utils.debug_print(f"[MYSTERY GAP] request_id={request_id}, storage={storage_duration*1000:.1f}ms")
     
-    # 4. Context retrieval (can be disabled for KV/session-only testing)
-    t3 = time.time()
-    if LATENCY_TRACKING_ENABLED and request_id:
-        log_timing(request_id, "v34", Events.V34_RETRIEVAL_START)
+    # 4. Context retrieval result (can be disabled for KV/session-only testing)
+    relevant_chunks = retrieval_future.result() if parallel else _retrieve_stage(user_input, prefetched, request_id)
+    utils.debug_print(f"--- Steps 2-4 (Classification + Storage + Retrieval, parallel={parallel}) took: {time.time() - t1:.2f}s")
     
-    relevant_chunks = []
     context_text = ""
     if getattr(config, "RETRIEVAL_ENABLED", True):
-        relevant_chunks = memory.retrieve_unique_relevant_chunks(user_input, request_id=request_id)
-        try:
-            utils.debug_print(f"*** Debug: Retrieved {len(relevant_chunks)} memory chunks for context")
-        except Exception:
-            pass
         # Sort chunks by importance (descending) so most important context comes first
         sorted_chunks = sorted(relevant_chunks, key=lambda c: c.get('importance', 0), reverse=True)
         
@@ -254,14 +373,6 @@ def process_user_message(user_input: str, request_id=None):
             )
         
         context_text = "\n".join(context_strings)
-    else:
-        utils.debug_print("*** Debug: Retrieval disabled by config.RETRIEVAL_ENABLED=False (KV/session-only mode)")
-    
-    if LATENCY_TRACKING_ENABLED and request_id:
-        log_timing(request_id, "v34", Events.V34_RETRIEVAL_COMPLETE, 
-                 {"num_chunks": len(relevant_chunks)})
-    
-    utils.debug_print(f"--- Step 4 (Context Retrieval) took: {time.time() - t3:.2f}s")
     
     # 5. Main LLM call - MEGAPROMPT STRATEGY WITH KV CONTEXT
     t4 = time.time()
@@ -353,7 +464,8 @@ def process_user_message(user_input: str, request_id=None):
                   "kv_context_length": context_len,
                   "has_kv_cache": context_len > 0})
     
-    ai_response_text, new_ctx, stats = llm.generate_api_call(prompt_to_send, context=prev_ctx, raw=True, temperature=temperature)
+    ai_response_text, new_ctx, stats = llm.generate_api_call(prompt_to_send, context=prev_ctx, raw=True, temperature=temperature,
+                                                          on_sentence=on_sentence)
     
     if LATENCY_TRACKING_ENABLED and request_id:
         # Include Ollama stats for correlation analysis
@@ -451,16 +563,17 @@ def handle_user_message(data):
         user_input = data["message"]
         utils.debug_print(f"*** Debug: Received user_message via WebSocket: {user_input}")
         
-        ai_response_text = process_user_message(user_input)
+        tts_stream = TtsSentenceStream() if getattr(config, "TTS_STREAMING_ENABLED", True) else None
+        try:
+            ai_response_text = process_user_message(user_input, on_sentence=tts_stream)
+        finally:
+            if tts_stream:
+                tts_stream.close()
 
         emit("bot_message", {"message": ai_response_text})
         
-        try:
-            proxies = {'http': None, 'https': None}
-            # Use session for connection pooling (reduces latency)
-            eventlet.tpool.execute(http_session.get, config.TTS_API_URL, params={"text": ai_response_text}, timeout=2, proxies=proxies)
-        except requests.exceptions.RequestException as e:
-            utils.debug_print(f"*** Debug: Could not connect to TTS API: {e}")
+        if not (tts_stream and tts_stream.sent):
+            send_to_tts(ai_response_text)
             
     except Exception as e:
         utils.debug_print(f"*** Debug: Error in handle_user_message: {e}")
@@ -499,25 +612,53 @@ def handle_webhook():
     utils.debug_print(f"*** Debug: Received user_message via webhook: {user_input} [request_id={request_id}]")
 
     socketio.emit("display_user_message", {"message": user_input})
-    ai_response = process_user_message(user_input, request_id)
+    # Stream sentences to TTS while the LLM is still generating
+    tts_stream = TtsSentenceStream(request_id, entry_time) if getattr(config, "TTS_STREAMING_ENABLED", True) else None
+    try:
+        ai_response = process_user_message(user_input, request_id, on_sentence=tts_stream)
+    finally:
+        if tts_stream:
+            tts_stream.close()
     socketio.emit("bot_message", {"message": ai_response})
     
     if LATENCY_TRACKING_ENABLED and request_id:
         log_timing(request_id, "v34", Events.V34_SENDING_TO_TTS, 
-                 {"response_length": len(ai_response)})
+                 {"response_length": len(ai_response),
+                  "streamed_sentences": tts_stream.sent if tts_stream else 0})
     
-    try:
-        proxies = {'http': None, 'https': None}
-        tts_params = {"text": ai_response}
-        if request_id:
-            tts_params["request_id"] = request_id
-        # Use session for connection pooling (reduces latency)
-        eventlet.tpool.execute(http_session.get, config.TTS_API_URL, params=tts_params, timeout=2, proxies=proxies)
-    except requests.exceptions.RequestException as e:
-        utils.debug_print(f"*** Debug: Could not connect to TTS API: {e}")
+    # Nothing streamed (streaming off, or generation failed before a sentence): send it whole
+    if not (tts_stream and tts_stream.sent):
+        send_to_tts(ai_response, request_id)
         
     return {"status": "success", "response": ai_response}, 200
 
+@app.route("/api/prefetch", methods=['POST'])
+def handle_prefetch():
+    """Accept a partial transcript from STT and start classification/retrieval speculatively."""
+    if not getattr(config, "PREFETCH_ENABLED", True):
+        return {"status": "disabled"}, 200
+    data = request.get_json(silent=True) or {}
+    text = data.get("text")
+    if not isinstance(text, str) or not text.strip():
+        return {"error": "Invalid payload. 'text' field is required."}, 400
+    status = prefetch.get_cache().submit(text)
+    return {"status": status}, 202
+
+@app.route("/api/prefetch/stats")
+def get_prefetch_stats():
+    """Prefetch cache size and hit/miss counters."""
+    return prefetch.get_cache().stats()
+
+@app.route("/api/ingest/stats")
+def get_ingest_stats():
+    """Write-behind memory queue depth, lag and batch sizes."""
+    return ingest.get_queue().stats()
+
+@app.route("/api/embeddings/stats")
+def get_embedding_stats():
+    """Embedding cache hit/miss counters and encode latency."""
+    return embedding_service.get_service().stats()
+
 @app.route("/api/retrieve_inspect")
 def retrieve_inspect():
     """Return the same set of chunks the LLM sees for a given query string."""
@@ -530,6 +671,7 @@ def retrieve_inspect():
     # exactly the chunks supplied to the chat endpoint.
     # Convert datetime objects to ISO strings for JSON serialization
     # Note: No request_id for API inspection calls (not part of conversation flow)
+    ingest.get_queue().wait_for(timeout=getattr(config, "INGEST_READ_TIMEOUT_SECONDS", 5.0))
     raw_results = memory.retrieve_unique_relevant_chunks(query, request_id=None)
 
     import decimal, numpy as np
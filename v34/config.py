@@ -42,6 +42,9 @@ OLLAMA_SESSION_ID = "timmy_default_session"
 TTS_API_URL = "http://windows-host:5051/"
 STT_API_URL = "http://windows-host:8888/"  # STT server on Windows host
 MOTOR_API_URL = "http://motor-raspi:8080/"  # Motor controller on Raspberry Pi
+# Send each sentence to TTS as soon as the LLM finishes it instead of the whole reply at the end
+TTS_STREAMING_ENABLED = True
+TTS_STREAM_MIN_SENTENCE_CHARS = 20  # shorter fragments are joined to the next sentence
 
 # --- Database Configuration ---
 DB_CONFIG = {
@@ -56,4 +59,35 @@ DB_CONFIG = {
 MAX_CHUNK_SIZE = 512
 OVERLAP_SENTENCES = 1
 RECENCY_WEIGHT = 0.75  # Increased from 0.25 to give recent memories stronger priority
-NUM_RETRIEVED_CHUNKS = 5 
\ No newline at end of file
+NUM_RETRIEVED_CHUNKS = 5 
+
+# --- Speculative Prefetch ---
+# STT posts debounced partial transcripts to /api/prefetch; classification and retrieval
+# run ahead of time and are reused when the final transcript is the same or near-identical.
+PREFETCH_ENABLED = True
+PREFETCH_MAX_ENTRIES = 8
+PREFETCH_TTL_SECONDS = 30.0
+PREFETCH_SIMILARITY_THRESHOLD = 0.9  # difflib ratio between normalized partial and final text
+PREFETCH_WAIT_TIMEOUT_SECONDS = 0.25  # max wait for a matching prefetch the worker is already running
+
+# --- Write-Behind Memory Ingestion ---
+# User messages are stored by a background worker (batched: one embedding call, one
+# transaction) instead of on the turn's critical path. Retrieval first waits for the
+# session's earlier writes to commit, so memories are never missing from the next turn.
+MEMORY_WRITE_BEHIND_ENABLED = True
+INGEST_MAX_BATCH = 8
+INGEST_BATCH_WINDOW_SECONDS = 0.05  # worker lingers this long to batch messages arriving together
+INGEST_READ_TIMEOUT_SECONDS = 5.0  # max wait for pending writes before retrieving anyway
+
+# --- Turn Pipeline ---
+# Run memory retrieval concurrently with metadata classification (they are independent)
+TURN_PARALLEL_ENABLED = True
+TURN_PARALLEL_WORKERS = 2  # retrieval threads shared by concurrent turns
+
+# --- Embedding Cache ---
+# LRU of sentence embeddings keyed by a hash of the whitespace-normalized text (384 floats each)
+EMBEDDING_CACHE_MAX_ENTRIES = 4096
+# Cache misses from all callers are gathered for up to this long and encoded as one batch
+EMBEDDING_BATCH_WINDOW_MS = 2.0
+EMBEDDING_MAX_BATCH = 64
+EMBEDDING_DEVICE = None  # None = CUDA when available, else CPU
@@ -0,0 +1,231 @@
+"""
+Cached sentence embeddings.
+
+One user message used to be encoded several times per turn: as memory chunks in
+chunk_and_store_text, as the retrieval query and again by prefetch, and repeated
+test runs and /api/retrieve_inspect re-encoded the same strings. EmbeddingService
+sits in front of utils.get_embed_model(): each text is keyed by a hash of its
+normalized form, held in an LRU, and only texts missing from it reach the model
+(duplicates within one call are encoded once).
+
+Misses from every caller (turn threads, prefetch, the ingest worker) go through one
+MicroBatcher, which owns the only model instance: requests arriving within a few
+milliseconds of each other are encoded as a single batch by its worker thread.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+import utils
+
+
+def normalize_text(text: str) -> str:
+    """Strip and collapse whitespace; the model's tokenizer ignores both, so the vector is unchanged."""
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def _summary(values: List[float]) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 2),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class EncodeRequest:
+    """One caller's texts waiting for the batch worker."""
+
+    def __init__(self, texts: List[str]):
+        self.texts = texts
+        self.submitted = time.time()
+        self.done = threading.Event()
+        self.result: Optional[np.ndarray] = None
+        self.error: Optional[BaseException] = None
+
+
+class MicroBatcher:
+    """
+    Single worker thread that owns the embedding model. Once a request is waiting it
+    lingers up to window_seconds (or until max_batch texts are queued), then encodes
+    all queued texts in one model call and hands each caller its rows.
+    """
+
+    def __init__(self, window_seconds: float = 0.002, max_batch: int = 64):
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        self._queue: List[EncodeRequest] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.batch_texts: "deque[int]" = deque(maxlen=500)
+        self.batch_requests: "deque[int]" = deque(maxlen=500)
+        self.request_ms: "deque[float]" = deque(maxlen=500)  # submit -> result, per request
+        self.encode_ms: "deque[float]" = deque(maxlen=500)  # model time, per batch
+        self.counters = {"requests": 0, "batches": 0, "texts": 0, "errors": 0}
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        request = EncodeRequest(texts)
+        with self._cond:
+            self.counters["requests"] += 1
+            self._queue.append(request)
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+                self._thread.start()
+        request.done.wait()
+        if request.error is not None:
+            raise request.error
+        return request.result
+
+    def _run(self):
+        model = None
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                deadline = time.time() + self.window_seconds
+                while sum(len(r.texts) for r in self._queue) < self.max_batch and time.time() < deadline:
+                    self._cond.wait(deadline - time.time())
+                # Whole requests only; the batch may exceed max_batch by the last one taken
+                batch, taken = [], 0
+                while self._queue and (not batch or taken + len(self._queue[0].texts) <= self.max_batch):
+                    request = self._queue.pop(0)
+                    batch.append(request)
+                    taken += len(request.texts)
+
+            start = time.time()
+            try:
+                if model is None:
+                    model = utils.get_embed_model()  # loaded here, used only by this thread
+                vectors = np.asarray(model.encode([t for r in batch for t in r.texts]), dtype=np.float32)
+                offset = 0
+                for request in batch:
+                    request.result = vectors[offset:offset + len(request.texts)]
+                    offset += len(request.texts)
+            except Exception as e:
+                for request in batch:
+                    request.error = e
+            finished = time.time()
+
+            with self._cond:
+                self.counters["batches"] += 1
+                self.counters["texts"] += taken
+                if batch[0].error is not None:
+                    self.counters["errors"] += 1
+                self.batch_texts.append(taken)
+                self.batch_requests.append(len(batch))
+                self.encode_ms.append((finished - start) * 1000)
+                self.request_ms.extend((finished - r.submitted) * 1000 for r in batch)
+            for request in batch:
+                request.done.set()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "window_ms": round(self.window_seconds * 1000, 2),
+                "max_batch": self.max_batch,
+                "queued_requests": len(self._queue),
+                "batch_texts": _summary([float(n) for n in self.batch_texts]),
+                "batch_requests": _summary([float(n) for n in self.batch_requests]),
+                "encode_ms": _summary(list(self.encode_ms)),
+                "request_ms": _summary(list(self.request_ms)),
+                "counters": dict(self.counters),
+            }
+
+
+class EmbeddingService:
+    """LRU-cached encode() with the same list-in, array-out shape as SentenceTransformer.encode."""
+
+    def __init__(self, max_entries: int = 4096, batcher: Optional[MicroBatcher] = None):
+        self.max_entries = max_entries
+        self.batcher = batcher or MicroBatcher()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.encode_ms: "deque[float]" = deque(maxlen=500)
+        self.counters = {"hits": 0, "misses": 0, "encode_calls": 0, "texts_encoded": 0, "evictions": 0}
+
+    def encode(self, texts: Sequence[str]) -> np.ndarray:
+        """Embeddings for texts, shape (len(texts), dim). Only uncached texts are encoded."""
+        keys = [text_key(t) for t in texts]
+        vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: "OrderedDict[str, str]" = OrderedDict()  # key -> text, each unique miss once
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    vectors[i] = cached
+                    self.counters["hits"] += 1
+                else:
+                    missing.setdefault(key, texts[i])
+                    self.counters["misses"] += 1
+
+        if missing:
+            start = time.time()
+            encoded = np.asarray(self._encode_batch(list(missing.values())), dtype=np.float32)
+            elapsed_ms = (time.time() - start) * 1000
+            fresh = dict(zip(missing.keys(), encoded))
+            with self._lock:
+                self.encode_ms.append(elapsed_ms)
+                self.counters["encode_calls"] += 1
+                self.counters["texts_encoded"] += len(missing)
+                for key, vector in fresh.items():
+                    vector.setflags(write=False)  # shared between callers
+                    self._entries[key] = vector
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.counters["evictions"] += 1
+            vectors = [v if v is not None else fresh[k] for v, k in zip(vectors, keys)]
+
+        if not vectors:
+            return np.zeros((0, utils.dimension), dtype=np.float32)
+        return np.stack(vectors)
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        return self.batcher.encode(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+                "encode_ms": _summary(list(self.encode_ms)),
+                "counters": dict(self.counters),
+                "batcher": self.batcher.stats(),
+            }
+
+
+_SERVICE: Optional[EmbeddingService] = None
+
+
+def get_service() -> EmbeddingService:
+    """Lazily create the process-wide embedding service from config."""
+    global _SERVICE
+    if _SERVICE is None:
+        import config
+        _SERVICE = EmbeddingService(
+            max_entries=getattr(config, "EMBEDDING_CACHE_MAX_ENTRIES", 4096),
+            batcher=MicroBatcher(
+                window_seconds=getattr(config, "EMBEDDING_BATCH_WINDOW_MS", 2.0) / 1000.0,
+                max_batch=getattr(config, "EMBEDDING_MAX_BATCH", 64),
+            ),
+        )
+    return _SERVICE
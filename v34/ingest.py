@@ -0,0 +1,195 @@
+"""
+Write-behind memory ingestion.
+
+process_user_message used to run memory.chunk_and_store_text on the critical path
+(T5 summary, two embedding calls, two DB transactions: 414-936 ms per turn, see
+MYSTERY_GAP_SOLVED.md). Messages are now queued here and a single background
+worker stores them in batches via memory.store_texts_batch: one embedding call
+and one transaction for everything that is pending.
+
+Read-your-writes: before a turn retrieves memories it calls wait_for(session_id),
+which blocks until every message that session queued earlier is committed (normally
+long done, since the previous reply and the user's next utterance take seconds).
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Optional
+
+import memory
+import utils
+
+# Add shared directory to path for latency tracking
+shared_dir = Path(__file__).parent.parent / "shared"
+if str(shared_dir) not in sys.path:
+    sys.path.append(str(shared_dir))
+
+try:
+    from latency_tracker import log_timing
+    LATENCY_TRACKING_ENABLED = True
+except ImportError:
+    LATENCY_TRACKING_ENABLED = False
+
+
+class IngestItem:
+    """One message waiting to be stored."""
+
+    def __init__(self, text: str, role: str, metadata: Optional[dict], session_id: Optional[str],
+                 request_id: Optional[str]):
+        self.text = text
+        self.role = role
+        self.metadata = metadata
+        self.session_id = session_id
+        self.request_id = request_id
+        self.submitted = time.time()
+        self.done = threading.Event()
+        self.error: Optional[str] = None
+
+    def as_entry(self) -> dict:
+        return {"text": self.text, "role": self.role, "metadata": self.metadata, "session_id": self.session_id}
+
+
+def _summary(values: List[float]) -> dict:
+    ordered = sorted(values)
+    if not ordered:
+        return {"count": 0}
+    return {
+        "count": len(ordered),
+        "avg": round(sum(ordered) / len(ordered), 2),
+        "p50": round(ordered[len(ordered) // 2], 2),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+class IngestQueue:
+    """
+    Single-worker write-behind queue. The worker takes up to max_batch pending
+    messages, lingering batch_window_seconds for more to arrive once it has one.
+    """
+
+    def __init__(self, max_batch: int = 8, batch_window_seconds: float = 0.05):
+        self.max_batch = max_batch
+        self.batch_window_seconds = batch_window_seconds
+        self._pending: List[IngestItem] = []
+        self._in_flight: List[IngestItem] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.lag_ms: "deque[float]" = deque(maxlen=200)  # submit -> commit
+        self.batch_sizes: "deque[int]" = deque(maxlen=200)
+        self.counters = {"submitted": 0, "stored": 0, "failed": 0, "batches": 0, "chunks": 0}
+
+    def submit(self, text: str, role: str, metadata: Optional[dict] = None, session_id: Optional[str] = None,
+               request_id: Optional[str] = None) -> IngestItem:
+        item = IngestItem(text, role, metadata, session_id, request_id)
+        with self._cond:
+            self.counters["submitted"] += 1
+            self._pending.append(item)
+            self._cond.notify_all()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="memory-ingest", daemon=True)
+                self._thread.start()
+        return item
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Linger briefly so messages arriving together share one encode + transaction
+                deadline = time.time() + self.batch_window_seconds
+                while len(self._pending) < self.max_batch and time.time() < deadline:
+                    self._cond.wait(deadline - time.time())
+                batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+                self._in_flight = batch
+
+            start = time.time()
+            try:
+                chunk_counts = memory.store_texts_batch([item.as_entry() for item in batch])
+            except Exception as e:
+                utils.debug_print(f"*** Ingest: batch of {len(batch)} failed ({e}); storing individually")
+                chunk_counts = []
+                for item in batch:
+                    try:
+                        chunk_counts += memory.store_texts_batch([item.as_entry()])
+                    except Exception as item_error:
+                        item.error = str(item_error)
+                        chunk_counts.append(0)
+                        utils.debug_print(f"*** Ingest: could not store '{item.text[:60]}': {item_error}")
+            committed = time.time()
+
+            with self._cond:
+                self.counters["batches"] += 1
+                self.counters["chunks"] += sum(chunk_counts)
+                self.batch_sizes.append(len(batch))
+                for item in batch:
+                    self.counters["failed" if item.error else "stored"] += 1
+                    self.lag_ms.append((committed - item.submitted) * 1000)
+                self._in_flight = []
+            for item in batch:
+                item.done.set()
+                if LATENCY_TRACKING_ENABLED and item.request_id:
+                    log_timing(item.request_id, "v34", "v34_memory_ingested",
+                               {"lag_ms": round((committed - item.submitted) * 1000, 2),
+                                "store_ms": round((committed - start) * 1000, 2),
+                                "batch_size": len(batch), "error": item.error})
+
+    def wait_for(self, session_id: Optional[str] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until everything queued so far (for session_id, or for all sessions if None)
+        is committed. Returns False if timeout expired first.
+        """
+        with self._cond:
+            waiting = [item for item in self._in_flight + self._pending
+                       if session_id is None or item.session_id == session_id]
+        if not waiting:
+            return True
+        start = time.time()
+        for item in waiting:
+            remaining = None if timeout is None else max(0.0, timeout - (time.time() - start))
+            if not item.done.wait(remaining):
+                utils.debug_print(f"*** Ingest: read-your-writes wait timed out after {timeout}s")
+                return False
+        utils.debug_print(f"*** Ingest: waited {(time.time() - start) * 1000:.1f}ms for {len(waiting)} pending write(s)")
+        return True
+
+    def shutdown(self, timeout: float = 10.0):
+        """Flush pending writes at exit (registered with atexit before the DB pool closes)."""
+        with self._cond:
+            pending = len(self._pending) + len(self._in_flight)
+        if pending and not self.wait_for(timeout=timeout):
+            print(f"[WARNING] Memory ingest: {len(self._pending) + len(self._in_flight)} message(s) not stored at shutdown")
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._cond:
+            queued = self._pending + self._in_flight
+            return {
+                "pending": len(self._pending),
+                "in_flight": len(self._in_flight),
+                # Queue lag: how long the oldest unstored message has been waiting
+                "oldest_pending_ms": round((now - min(i.submitted for i in queued)) * 1000, 2) if queued else 0.0,
+                "commit_lag_ms": _summary(list(self.lag_ms)),
+                "batch_size": _summary([float(n) for n in self.batch_sizes]),
+                "counters": dict(self.counters),
+            }
+
+
+_QUEUE: Optional[IngestQueue] = None
+
+
+def get_queue() -> IngestQueue:
+    """Lazily create the process-wide ingest queue from config."""
+    global _QUEUE
+    if _QUEUE is None:
+        import config
+        _QUEUE = IngestQueue(
+            max_batch=getattr(config, "INGEST_MAX_BATCH", 8),
+            batch_window_seconds=getattr(config, "INGEST_BATCH_WINDOW_SECONDS", 0.05),
+        )
+    return _QUEUE
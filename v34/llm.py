@@ -3,6 +3,7 @@
 
 import requests
 import json
+import re
 from datetime import datetime
 import eventlet.tpool
 import time
@@ -829,10 +830,61 @@ def build_baseline_prompt(user_message: str) -> str:
     assistant_header = "<|start_header_id|>assistant<|end_header_id|>"
     return "\n\n".join([persona_system, user_prompt, assistant_header])
 
-def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: float = 0.4):
+# --- Sentence streaming ---
+
+# Sentence end: terminal punctuation (plus closing quotes/brackets) followed by whitespace
+SENTENCE_BOUNDARY_REGEX = re.compile(r'[.!?]+["\')\]]*\s+')
+# Words whose trailing period is not a sentence end
+NON_TERMINAL_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "st", "jr", "sr", "vs", "etc", "e.g", "i.e", "approx"}
+# Words that abbreviate only before a number ("No. 5", "pp. 12"), not in "I said no."
+NUMBER_ABBREVIATIONS = {"no", "nos", "pp", "vol"}
+
+
+class SentenceSplitter:
+    """Cuts a token stream into complete sentences as soon as each one ends.
+
+    Fragments shorter than min_chars ("Oh.", "Well!") are held and joined to the next
+    sentence so the TTS server is not sent a string of tiny utterances.
+    """
+
+    def __init__(self, min_chars: int = 20):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, token: str) -> list:
+        self._buffer += token
+        sentences = []
+        start = 0
+        for match in SENTENCE_BOUNDARY_REGEX.finditer(self._buffer):
+            candidate = self._buffer[start:match.end()].strip()
+            last_word = candidate.rstrip('.!?"\')]').rsplit(None, 1)[-1].lower() if candidate else ""
+            if len(candidate) < self.min_chars or last_word in NON_TERMINAL_ABBREVIATIONS:
+                continue
+            if last_word in NUMBER_ABBREVIATIONS:
+                following = self._buffer[match.end():match.end() + 1]
+                # Undecided until the next token arrives; flush() settles it at stream end
+                if not following or following.isdigit():
+                    continue
+            sentences.append(candidate)
+            start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self) -> str:
+        """Whatever is left once the stream ends (may be shorter than min_chars)."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return rest
+
+
+def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: float = 0.4, on_sentence=None):
     """Call Ollama /api/generate endpoint with the megaprompt.
 
-    Returns a tuple: (response_text, new_context, stats_dict).
+    If on_sentence is given, it is called with each complete sentence as soon as the
+    token stream finishes it (and once more with any trailing text), so speech can
+    start before generation ends. Exceptions from the callback are logged, not raised.
+
+    Returns a tuple: (response_text, new_context, stats_dict). If the stream fails
+    partway, the text generated so far is returned (it may already have been spoken).
     """
     import requests
     import json
@@ -882,6 +934,17 @@ def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: f
     except Exception:
         pass
     
+    collected = []
+    final_context = None
+    stats = {}
+    splitter = SentenceSplitter(getattr(config, "TTS_STREAM_MIN_SENTENCE_CHARS", 20)) if on_sentence else None
+
+    def emit(sentence):
+        try:
+            on_sentence(sentence)
+        except Exception as e:
+            debug_print(f"*** Debug: Sentence callback failed: {e}")
+
     try:
         with requests.post(
             config.OLLAMA_API_URL,
@@ -890,9 +953,6 @@ def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: f
             stream=True
         ) as r:
             r.raise_for_status()
-            collected = []
-            final_context = None
-            stats = {}
             for line in r.iter_lines():
                 if not line:
                     continue
@@ -900,6 +960,9 @@ def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: f
                 token = chunk.get("response")
                 if token:
                     collected.append(token)
+                    if splitter:
+                        for sentence in splitter.feed(token):
+                            emit(sentence)
                 if chunk.get("done"):
                     final_context = chunk.get("context", final_context)
                     
@@ -921,6 +984,10 @@ def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: f
                     break
 
             ai_response = ("".join(collected)).strip()
+            if splitter:
+                rest = splitter.flush()
+                if rest:
+                    emit(rest)
 
             if ai_response:
                 debug_print(f"*** Debug: AI Response: {ai_response[:100]}...")
@@ -938,4 +1005,13 @@ def generate_api_call(megaprompt, context=None, raw: bool = True, temperature: f
 
     except Exception as e:
         debug_print(f"*** Debug: Generate API call failed: {e}")
+        partial = "".join(collected).strip()
+        if partial:
+            # Sentences may already be playing: speak the rest and keep what was actually said
+            if splitter:
+                rest = splitter.flush()
+                if rest:
+                    emit(rest)
+            debug_print(f"*** Debug: Returning {len(partial)} chars generated before the failure")
+            return partial, final_context, stats
         return "I appear to be having trouble speaking. How embarrassing.", None, {}
\ No newline at end of file
@@ -42,6 +42,7 @@ from pathlib import Path
 import config
 import utils
 import llm
+import embedding_service
 
 # Add shared directory to path for latency tracking
 shared_dir = Path(__file__).parent.parent / "shared"
@@ -64,7 +65,8 @@ def init_db_pool():
     global db_pool
     if not db_pool:
         utils.debug_print("*** Debug: Initializing database connection pool.")
-        db_pool = pool.SimpleConnectionPool(1, 20, **config.DB_CONFIG)
+        # Threaded: turn-stage, prefetch and ingest worker threads share the pool
+        db_pool = pool.ThreadedConnectionPool(1, 20, **config.DB_CONFIG)
 
 def close_db_pool():
     """Closes all connections in the pool."""
@@ -93,6 +95,30 @@ def insert_parent_document(full_text, summary, summary_embedding, role, session_
         if conn:
             db_pool.putconn(conn)
 
+def split_into_chunks(text: str) -> list:
+    """Splits text into sentence-aligned chunks of up to MAX_CHUNK_SIZE chars with OVERLAP_SENTENCES overlap."""
+    sentences = nltk.sent_tokenize(text)
+    chunks = []
+    current_chunk_sentences = []
+    current_length = 0
+    i = 0
+    while i < len(sentences):
+        sentence = sentences[i]
+        if current_length + len(sentence) <= config.MAX_CHUNK_SIZE:
+            current_chunk_sentences.append(sentence)
+            current_length += len(sentence)
+            i += 1
+        else:
+            chunks.append(" ".join(current_chunk_sentences))
+            if len(current_chunk_sentences) > config.OVERLAP_SENTENCES:
+                 i = i - config.OVERLAP_SENTENCES
+            current_chunk_sentences = []
+            current_length = 0
+
+    if current_chunk_sentences:
+        chunks.append(" ".join(current_chunk_sentences))
+    return chunks
+
 def chunk_and_store_text(text: str, role: str, metadata=None, session_id=None, request_id=None):
     """
     Summarizes text, stores the parent document, then splits the text into
@@ -110,7 +136,7 @@ def chunk_and_store_text(text: str, role: str, metadata=None, session_id=None, r
     summary_gen_duration = time.time() - summary_start
     
     embed_summary_start = time.time()
-    summary_embedding = utils.get_embed_model().encode([summary])[0]
+    summary_embedding = embedding_service.get_service().encode([summary])[0]
     embed_summary_duration = time.time() - embed_summary_start
 
     # 2. Store the parent document and get its ID
@@ -127,30 +153,7 @@ def chunk_and_store_text(text: str, role: str, metadata=None, session_id=None, r
 
     # 3. Chunk the original text
     chunking_start = time.time()
-    sentences = nltk.sent_tokenize(text)
-    if not sentences:
-        return
-
-    chunks = []
-    current_chunk_sentences = []
-    current_length = 0
-    i = 0
-    while i < len(sentences):
-        sentence = sentences[i]
-        if current_length + len(sentence) <= config.MAX_CHUNK_SIZE:
-            current_chunk_sentences.append(sentence)
-            current_length += len(sentence)
-            i += 1
-        else:
-            chunks.append(" ".join(current_chunk_sentences))
-            if len(current_chunk_sentences) > config.OVERLAP_SENTENCES:
-                 i = i - config.OVERLAP_SENTENCES
-            current_chunk_sentences = []
-            current_length = 0
-
-    if current_chunk_sentences:
-        chunks.append(" ".join(current_chunk_sentences))
-
+    chunks = split_into_chunks(text)
     if not chunks:
         return
     
@@ -158,7 +161,7 @@ def chunk_and_store_text(text: str, role: str, metadata=None, session_id=None, r
 
     # 4. Embed chunks and store them with the parent ID
     embed_chunks_start = time.time()
-    embeddings = utils.get_embed_model().encode(chunks)
+    embeddings = embedding_service.get_service().encode(chunks)
     embed_chunks_duration = time.time() - embed_chunks_start
     
     # OPTIMIZATION 1: Reuse classification metadata for all chunks (saves 200-300ms)
@@ -205,6 +208,64 @@ def chunk_and_store_text(text: str, role: str, metadata=None, session_id=None, r
                         f"total={total_duration*1000:.1f}ms, "
                         f"num_chunks={len(chunks)}")
 
+def store_texts_batch(entries):
+    """
+    Write-behind ingestion: stores several messages at once.
+    entries is a list of dicts with text, role, metadata and session_id.
+
+    All summaries and chunks are encoded in one embedding call, and every parent
+    document and chunk is inserted in one transaction (all or nothing).
+    Returns the number of chunks stored per entry.
+    """
+    summaries = [llm.fast_generate_summary(e["text"]) for e in entries]
+    chunk_lists = [split_into_chunks(e["text"]) for e in entries]
+    chunk_metadatas = [
+        [e["metadata"]] * len(chunks) if e.get("metadata") else [llm.fast_generate_metadata(c) for c in chunks]
+        for e, chunks in zip(entries, chunk_lists)
+    ]
+
+    # One encode call: summaries first, then every chunk in entry order
+    embeddings = embedding_service.get_service().encode(summaries + [c for chunks in chunk_lists for c in chunks])
+
+    conn = None
+    try:
+        conn = db_pool.getconn()
+        with conn.cursor() as cur:
+            offset = len(entries)
+            for entry, summary, summary_embedding, chunks, metadatas in zip(
+                    entries, summaries, embeddings[:len(entries)], chunk_lists, chunk_metadatas):
+                cur.execute("""
+                    INSERT INTO parent_documents (full_text, summary, summary_embedding, speaker, session_id)
+                    VALUES (%s, %s, %s, %s, %s) RETURNING id;
+                """, (entry["text"], summary, np.array(summary_embedding).tolist(), entry["role"], entry.get("session_id")))
+                parent_id = cur.fetchone()[0]
+                for chunk_text, emb, chunk_metadata in zip(chunks, embeddings[offset:offset + len(chunks)], metadatas):
+                    cur.execute("""
+                        INSERT INTO memory_chunks (embedding, content, speaker, topic, importance, tags, session_id, parent_id)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s);
+                    """, (
+                        np.array(emb).tolist(),
+                        chunk_text,
+                        entry["role"],
+                        chunk_metadata.get("topic"),
+                        chunk_metadata.get("importance", 0),
+                        chunk_metadata.get("tags", []),
+                        entry.get("session_id"),
+                        parent_id
+                    ))
+                offset += len(chunks)
+        conn.commit()
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            db_pool.putconn(conn)
+
+    utils.debug_print(f"*** Debug: Batch stored {len(entries)} messages ({sum(map(len, chunk_lists))} chunks) in one transaction.")
+    return [len(chunks) for chunks in chunk_lists]
+
 def insert_chunk_to_postgres(text, role, embedding, topic, importance, tags, session_id, parent_id):
     """Inserts a single memory chunk into the database, linked to a parent."""
     conn = None
@@ -268,7 +329,7 @@ def retrieve_similar_chunks(query_text, k=config.NUM_RETRIEVED_CHUNKS, request_i
         log_timing(request_id, "v34", Events.V34_RETRIEVAL_EMBEDDING_START, {})
     
     embedding_start = time.time()
-    query_embedding = utils.get_embed_model().encode([query_text])[0]
+    query_embedding = embedding_service.get_service().encode([query_text])[0]
     embedding_duration = time.time() - embedding_start
     
     if LATENCY_TRACKING_ENABLED and request_id:
@@ -439,7 +500,7 @@ def retrieve_unique_relevant_chunks(query: str, k: int = config.NUM_RETRIEVED_CH
         log_timing(request_id, "v34", Events.V34_RETRIEVAL_EMBEDDING_START, {})
     
     embedding_start = time.time()
-    query_embedding = utils.get_embed_model().encode([query])[0]
+    query_embedding = embedding_service.get_service().encode([query])[0]
     embedding_duration = time.time() - embedding_start
     
     if LATENCY_TRACKING_ENABLED and request_id:
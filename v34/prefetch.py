@@ -0,0 +1,196 @@
+"""
+Speculative classification and retrieval from STT partial transcripts.
+
+While the user is still talking, the STT server posts debounced partials to
+/api/prefetch. A single background worker runs fast_generate_metadata and
+memory.retrieve_unique_relevant_chunks on the newest partial and caches the
+result keyed by normalized text. When the final transcript arrives on
+/api/webhook, process_user_message reuses a cached result for the same or a
+near-identical text instead of classifying and retrieving on the critical path.
+"""
+
+from __future__ import annotations
+
+import difflib
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional
+
+import ingest
+import llm
+import memory
+import utils
+
+_NORMALIZE_REGEX = re.compile(r"[^\w\s']+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so STT variants share a key."""
+    return " ".join(_NORMALIZE_REGEX.sub(" ", text.lower()).split())
+
+
+class PrefetchEntry:
+    """Classification + retrieval result for one normalized transcript."""
+
+    def __init__(self, key: str, text: str, generation: int):
+        self.key = key
+        self.text = text
+        self.generation = generation
+        self.created = time.time()
+        self.started: Optional[float] = None  # set when the worker picks it up
+        self.done = threading.Event()
+        self.metadata: Optional[dict] = None
+        self.chunks: Optional[list] = None
+        self.error: Optional[str] = None
+        self.duration_ms: Optional[float] = None
+
+
+class PrefetchCache:
+    """
+    Single-worker speculative prefetcher with a small LRU of results.
+
+    Only the newest submitted partial waits for the worker; older pending ones
+    are superseded. invalidate() is called once per turn so results computed
+    against older conversation history or memory state are never reused.
+    """
+
+    def __init__(self, max_entries: int = 8, ttl_seconds: float = 30.0,
+                 similarity_threshold: float = 0.9, wait_timeout: float = 0.25,
+                 ingest_timeout: float = 2.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.wait_timeout = wait_timeout
+        self.ingest_timeout = ingest_timeout
+        self.durations_ms: "deque[float]" = deque(maxlen=20)  # recent successful prefetches
+        self._entries: "OrderedDict[str, PrefetchEntry]" = OrderedDict()
+        self._pending: Optional[PrefetchEntry] = None
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self.counters = {"submitted": 0, "superseded": 0, "computed": 0, "hits": 0, "misses": 0, "errors": 0,
+                         "wait_timeouts": 0}
+
+    def submit(self, text: str) -> str:
+        """Queue a partial transcript for speculative work. Returns 'cached', 'queued' or 'skipped'."""
+        key = normalize_text(text)
+        if not key:
+            return "skipped"
+        with self._cond:
+            self.counters["submitted"] += 1
+            if key in self._entries:
+                return "cached"
+            if self._pending is not None:
+                if self._pending.key == key:
+                    return "queued"
+                self.counters["superseded"] += 1
+            self._pending = PrefetchEntry(key, text, self._generation)
+            self._cond.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="prefetch-worker", daemon=True)
+                self._thread.start()
+        return "queued"
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                entry, self._pending = self._pending, None
+                entry.started = time.time()
+                self._entries[entry.key] = entry
+                self._entries.move_to_end(entry.key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+            start = time.time()
+            try:
+                entry.metadata = llm.fast_generate_metadata(entry.text)
+                # Retrieval must see memories still queued for write-behind storage
+                ingest.get_queue().wait_for(timeout=self.ingest_timeout)
+                entry.chunks = memory.retrieve_unique_relevant_chunks(entry.text)
+                with self._cond:
+                    self.counters["computed"] += 1
+                    self.durations_ms.append((time.time() - start) * 1000)
+            except Exception as e:
+                entry.error = str(e)
+                with self._cond:
+                    self.counters["errors"] += 1
+                utils.debug_print(f"*** Prefetch error for '{entry.text[:60]}': {e}")
+            entry.duration_ms = round((time.time() - start) * 1000, 2)
+            entry.done.set()
+
+    def lookup(self, text: str) -> Optional[PrefetchEntry]:
+        """
+        Return a finished result for text (exact or near-identical normalized match), or None.
+
+        A match the worker is still computing is awaited only for its expected remaining
+        time (median of recent prefetch durations minus time already spent), capped at
+        wait_timeout, so a slow or stuck prefetch costs the turn at most wait_timeout.
+        A partial still queued behind the worker is not waited for.
+        """
+        key = normalize_text(text)
+        now = time.time()
+        with self._cond:
+            candidates = [e for e in reversed(self._entries.values())
+                          if e.generation == self._generation and now - e.created <= self.ttl_seconds]
+            recent = sorted(self.durations_ms)
+        match = next((e for e in candidates if e.key == key), None)
+        if match is None:
+            best_ratio = 0.0
+            for entry in candidates:
+                ratio = difflib.SequenceMatcher(None, entry.key, key).ratio()
+                if ratio >= self.similarity_threshold and ratio > best_ratio:
+                    match, best_ratio = entry, ratio
+
+        if match is not None and not match.done.is_set():
+            wait = self.wait_timeout
+            if recent:
+                expected_remaining = recent[len(recent) // 2] / 1000.0 - (now - match.started)
+                wait = min(wait, max(0.0, expected_remaining))
+            if not match.done.wait(wait):
+                with self._cond:
+                    self.counters["wait_timeouts"] += 1
+                utils.debug_print(f"*** Prefetch: in-flight match not done after {wait * 1000:.0f}ms, not waiting longer")
+
+        if match is not None and match.done.is_set() and match.error is None:
+            with self._cond:
+                self.counters["hits"] += 1
+            return match
+        with self._cond:
+            self.counters["misses"] += 1
+        return None
+
+    def invalidate(self):
+        """Drop all results and pending work (the conversation moved on)."""
+        with self._cond:
+            self._generation += 1
+            self._entries.clear()
+            self._pending = None
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "entries": len(self._entries),
+                "pending": self._pending.text if self._pending else None,
+                "counters": dict(self.counters),
+            }
+
+
+_CACHE: Optional[PrefetchCache] = None
+
+
+def get_cache() -> PrefetchCache:
+    """Lazily create the process-wide prefetch cache from config."""
+    global _CACHE
+    if _CACHE is None:
+        import config
+        _CACHE = PrefetchCache(
+            max_entries=getattr(config, "PREFETCH_MAX_ENTRIES", 8),
+            ttl_seconds=getattr(config, "PREFETCH_TTL_SECONDS", 30.0),
+            similarity_threshold=getattr(config, "PREFETCH_SIMILARITY_THRESHOLD", 0.9),
+            wait_timeout=getattr(config, "PREFETCH_WAIT_TIMEOUT_SECONDS", 0.25),
+        )
+    return _CACHE
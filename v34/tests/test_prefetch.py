@@ -0,0 +1,64 @@
+import time
+
+from prefetch import PrefetchCache, PrefetchEntry, normalize_text
+
+
+def add_entry(cache, text, done=True, error=None, started_ago=0.0):
+    """Put a result in the cache as the worker would, without running classification/retrieval."""
+    entry = PrefetchEntry(normalize_text(text), text, cache._generation)
+    entry.started = time.time() - started_ago
+    entry.error = error
+    if done:
+        entry.done.set()
+    cache._entries[entry.key] = entry
+    return entry
+
+
+def test_normalize_text_shares_key_across_stt_variants():
+    assert normalize_text("What's the  weather, today?") == normalize_text("what's the weather today")
+
+
+def test_lookup_exact_and_near_match():
+    cache = PrefetchCache()
+    entry = add_entry(cache, "what is the weather like in paris today")
+
+    assert cache.lookup("What is the weather like in Paris today?") is entry
+    assert cache.lookup("what is the weather like in paris toda") is entry
+    assert cache.lookup("play some music") is None
+    assert cache.stats()["counters"]["hits"] == 2
+    assert cache.stats()["counters"]["misses"] == 1
+
+
+def test_invalidate_drops_results_from_earlier_turns():
+    cache = PrefetchCache()
+    add_entry(cache, "tell me a joke")
+    cache.invalidate()
+
+    assert cache.lookup("tell me a joke") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_failed_prefetch_is_a_miss():
+    cache = PrefetchCache()
+    add_entry(cache, "tell me a joke", error="ollama unavailable")
+    assert cache.lookup("tell me a joke") is None
+
+
+def test_in_flight_match_waits_at_most_wait_timeout():
+    cache = PrefetchCache(wait_timeout=0.1)
+    add_entry(cache, "tell me a joke", done=False)
+
+    start = time.time()
+    assert cache.lookup("tell me a joke") is None
+    assert time.time() - start < 0.5
+    assert cache.stats()["counters"]["wait_timeouts"] == 1
+
+
+def test_in_flight_match_past_expected_duration_is_not_waited_for():
+    cache = PrefetchCache(wait_timeout=1.0)
+    cache.durations_ms.extend([100.0, 120.0, 140.0])
+    add_entry(cache, "tell me a joke", done=False, started_ago=0.5)
+
+    start = time.time()
+    assert cache.lookup("tell me a joke") is None
+    assert time.time() - start < 0.1
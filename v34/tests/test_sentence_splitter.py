@@ -0,0 +1,48 @@
+from llm import SentenceSplitter
+
+
+def feed_tokens(splitter, text, size=3):
+    """Feed text in small chunks, the way Ollama streams tokens."""
+    sentences = []
+    for i in range(0, len(text), size):
+        sentences.extend(splitter.feed(text[i:i + size]))
+    return sentences
+
+
+def test_sentences_emitted_as_soon_as_they_end():
+    splitter = SentenceSplitter()
+    assert splitter.feed("The weather is lovely today") == []
+    assert splitter.feed(". Shall we go") == ["The weather is lovely today."]
+    assert splitter.flush() == "Shall we go"
+    assert splitter.flush() == ""
+
+
+def test_short_fragments_join_the_next_sentence():
+    splitter = SentenceSplitter(min_chars=20)
+    sentences = feed_tokens(splitter, "Oh. Well! I suppose that is true. ")
+    assert sentences == ["Oh. Well! I suppose that is true."]
+
+
+def test_abbreviations_do_not_end_sentences():
+    splitter = SentenceSplitter()
+    text = "I spoke with Dr. Smith about the plan. It went well, e.g. on the budget. "
+    assert feed_tokens(splitter, text) == [
+        "I spoke with Dr. Smith about the plan.",
+        "It went well, e.g. on the budget.",
+    ]
+
+
+def test_no_ends_a_sentence_unless_a_number_follows():
+    splitter = SentenceSplitter()
+    text = "Honestly, I told them all no. Absolutely not. Please go to room No. 5 right now. "
+    assert feed_tokens(splitter, text) == [
+        "Honestly, I told them all no.",
+        "Absolutely not. Please go to room No. 5 right now.",
+    ]
+
+
+def test_closing_quotes_stay_with_their_sentence():
+    splitter = SentenceSplitter()
+    sentences = feed_tokens(splitter, 'She said "that is wonderful!" Then she quietly left the room. Bye')
+    assert sentences == ['She said "that is wonderful!"', "Then she quietly left the room."]
+    assert splitter.flush() == "Bye"
@@ -12,6 +12,7 @@ import config
 conversation_history = []
 
 # The embedding model will be loaded lazily to avoid blocking server startup.
+# The app encodes through embedding_service, whose batch worker is the only caller.
 embed_model = None
 dimension = 384 # Hardcoded for sentence-transformers/all-MiniLM-L6-v2
 
@@ -20,7 +21,8 @@ def get_embed_model():
     global embed_model
     if embed_model is None:
         print("*** Debug: Initializing embed_model for the first time...")
-        embed_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
+        embed_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2',
+                                          device=getattr(config, "EMBEDDING_DEVICE", None))
         print("*** Debug: Embed model initialized.")
     return embed_model
 